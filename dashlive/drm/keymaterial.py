@@ -81,6 +81,15 @@ class KeyMaterial:
 
     b64 = property(to_base64, from_base64)
 
+    def to_base64url(self) -> str:
+        # See https://tools.ietf.org/html/rfc7515#page-54
+        return str(base64.urlsafe_b64encode(self.raw).rstrip(b'='), 'ascii')
+
+    def from_base64url(self, value: str) -> None:
+        self.raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+    b64url = property(to_base64url, from_base64url)
+
     def hex_to_le_guid(self, raw: bool) -> bytes | str:
         guid: str = self.hex
         if len(guid) != 32:
@@ -8,6 +8,9 @@
 
 import base64
 import binascii
+from collections.abc import Iterable
+from functools import lru_cache
+import hashlib
 import re
 import io
 import struct
@@ -17,7 +20,6 @@ import urllib.parse
 
 from xml.etree import ElementTree
 from Crypto.Cipher import AES
-from Crypto.Hash import SHA256
 from jinja2 import DictLoader, Environment, Template, select_autoescape
 
 from dashlive.mpeg.mp4.boxes.piff import PiffSampleEncryptionBox
@@ -34,6 +36,9 @@ from .keymaterial import KeyMaterial
 from .location import DrmLocation
 from .system import DrmSystem
 
+# maximum number of (KID, key seed) entries to keep in the content key cache
+CONTENT_KEY_CACHE_SIZE: int = 1024
+
 class PlayReadyRecord(NamedTuple):
     record_type: int
     length: int
@@ -158,48 +163,37 @@ class PlayReady(DrmBase):
     @classmethod
     def generate_content_key(clz, keyId: bytes, keySeed: bytes | None = None) -> bytearray:
         """Generate a content key from the key ID"""
-        if keySeed is None:
-            keySeed = PlayReady.TEST_KEY_SEED
         if len(keyId) != 16:
             raise ValueError("KID should be a raw 16 byte value")
-        keyId = KeyMaterial(raw=keyId).hex_to_le_guid(raw=True)
+        truncatedKeySeed: bytes = clz.truncate_key_seed(keySeed)
+        return bytearray(derive_content_key(bytes(keyId), truncatedKeySeed))
+
+    @classmethod
+    def generate_content_keys(clz,
+                              keyIds: Iterable[bytes],
+                              keySeed: bytes | None = None) -> list[bytearray]:
+        """
+        Generate the content keys for a list of key IDs, for example when
+        importing a stream. The key seed is only checked once and the
+        SHA-256 state of the key seed is shared by all of the KIDs.
+        """
+        truncatedKeySeed: bytes = clz.truncate_key_seed(keySeed)
+        rv: list[bytearray] = []
+        for keyId in keyIds:
+            if len(keyId) != 16:
+                raise ValueError("KID should be a raw 16 byte value")
+            rv.append(bytearray(derive_content_key(bytes(keyId), truncatedKeySeed)))
+        return rv
+
+    @staticmethod
+    def truncate_key_seed(keySeed: bytes | None) -> bytes:
+        if keySeed is None:
+            keySeed = PlayReady.TEST_KEY_SEED
         if len(keySeed) < 30:
             raise ValueError("Key seed must be at least 30 bytes")
         # Truncate the key seed to 30 bytes, key seed must be at least 30 bytes
         # long.
-        truncatedKeySeed = keySeed[:30]
-        assert len(keyId) == 16
-        assert len(truncatedKeySeed) == 30
-        # Create sha_A_Output buffer.  It is the SHA of the truncatedKeySeed
-        # and the keyIdAsBytes
-        sha_A = SHA256.new()
-        sha_A.update(truncatedKeySeed)
-        sha_A.update(keyId)
-        sha_A_Output = bytearray(sha_A.digest())
-
-        # Create sha_B_Output buffer.  It is the SHA of the truncatedKeySeed, the keyIdAsBytes, and
-        # the truncatedKeySeed again.
-        sha_B = SHA256.new()
-        sha_B.update(truncatedKeySeed)
-        sha_B.update(keyId)
-        sha_B.update(truncatedKeySeed)
-        sha_B_Output = bytearray(sha_B.digest())
-
-        # Create sha_C_Output buffer.  It is the SHA of the truncatedKeySeed, the keyIdAsBytes,
-        # the truncatedKeySeed again, and the keyIdAsBytes again.
-        sha_C = SHA256.new()
-        sha_C.update(truncatedKeySeed)
-        sha_C.update(keyId)
-        sha_C.update(truncatedKeySeed)
-        sha_C.update(keyId)
-        sha_C_Output = bytearray(sha_C.digest())
-
-        contentKey = bytearray(PlayReady.DRM_AES_KEYSIZE_128)
-        for i in range(PlayReady.DRM_AES_KEYSIZE_128):
-            contentKey[i] = sha_A_Output[i] ^ sha_A_Output[i + PlayReady.DRM_AES_KEYSIZE_128] \
-                ^ sha_B_Output[i] ^ sha_B_Output[i + PlayReady.DRM_AES_KEYSIZE_128] \
-                ^ sha_C_Output[i] ^ sha_C_Output[i + PlayReady.DRM_AES_KEYSIZE_128]
-        return contentKey
+        return bytes(keySeed[:30])
 
     def generate_wrmheader(self,
                            la_url: str | None,
@@ -480,6 +474,41 @@ class PlayReady(DrmBase):
         return template.render(**kwargs)
 
 
+@lru_cache(maxsize=8)
+def key_seed_hash(truncatedKeySeed: bytes) -> "hashlib._Hash":
+    """
+    The SHA-256 state after hashing the key seed, which is the common
+    prefix of every hash used to derive a content key
+    """
+    return hashlib.sha256(truncatedKeySeed)
+
+
+@lru_cache(maxsize=CONTENT_KEY_CACHE_SIZE)
+def derive_content_key(keyId: bytes, truncatedKeySeed: bytes) -> bytes:
+    """
+    Derives a PlayReady content key from a raw KID and a 30 byte key seed.
+    The result only depends upon the KID and key seed, so it is cached.
+    """
+    guid_kid: bytes = KeyMaterial(raw=keyId).hex_to_le_guid(raw=True)
+    # sha_A = SHA(seed + kid)
+    # sha_B = SHA(seed + kid + seed)
+    # sha_C = SHA(seed + kid + seed + kid)
+    sha = key_seed_hash(truncatedKeySeed).copy()
+    sha.update(guid_kid)
+    sha_A: bytes = sha.digest()
+    sha.update(truncatedKeySeed)
+    sha_B: bytes = sha.digest()
+    sha.update(guid_kid)
+    sha_C: bytes = sha.digest()
+    # XOR all six 128 bit halves of the three hashes, using integer
+    # arithmetic rather than a loop over each byte
+    combined: int = (int.from_bytes(sha_A, 'big') ^ int.from_bytes(sha_B, 'big') ^
+                     int.from_bytes(sha_C, 'big'))
+    key_size: int = PlayReady.DRM_AES_KEYSIZE_128
+    mask: int = (1 << (8 * key_size)) - 1
+    return ((combined >> (8 * key_size)) ^ (combined & mask)).to_bytes(key_size, 'big')
+
+
 if __name__ == "__main__":
     for arg in sys.argv[1:]:
         data: bytes = base64.b64decode(arg)
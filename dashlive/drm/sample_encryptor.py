@@ -0,0 +1,465 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from enum import Enum
+import hashlib
+import struct
+import threading
+from typing import ClassVar, NamedTuple
+
+from Crypto.Cipher import AES
+
+from dashlive.mpeg.mp4 import Mp4Atom, TrackFragmentRunBox, VisualSampleEntry
+from dashlive.mpeg.mp4.boxes.frma import OriginalFormatBox
+from dashlive.mpeg.mp4.boxes.saio import SampleAuxiliaryInformationOffsetsBox
+from dashlive.mpeg.mp4.boxes.saiz import SampleAuxiliaryInformationSizesBox
+from dashlive.mpeg.mp4.boxes.schi import SchemaInformationBox
+from dashlive.mpeg.mp4.boxes.schm import ProtectionSchemeTypeBox
+from dashlive.mpeg.mp4.boxes.senc import (
+    CencSampleAuxiliaryData,
+    CencSampleEncryptionBox,
+    CencSubSample,
+)
+from dashlive.mpeg.mp4.boxes.sinf import ProtectionSchemeInformationBox
+from dashlive.mpeg.mp4.boxes.tenc import TrackEncryptionBox
+from dashlive.utils.binary import HexBinary
+
+from .keymaterial import KeyMaterial
+
+ENCRYPTED_FRAGMENT_CACHE_SIZE: int = 64
+
+class EncryptionScheme(Enum):
+    CBCS = 'cbcs'
+    CENC = 'cenc'
+
+    @classmethod
+    def from_string(cls, name: str) -> "EncryptionScheme":
+        """
+        Convert name string into this enum
+        """
+        return cls[name.upper()]  # type: ignore
+
+    def to_json(self) -> str:
+        return self.value
+
+
+# (BytesOfClearData, BytesOfProtectedData) of one subsample
+Subsample = tuple[int, int]
+
+class EncryptedSamples(NamedTuple):
+    # the contents of the mdat box, after encryption
+    data: bytes
+    # the IV of each sample, empty if the scheme uses a constant IV
+    ivs: list[bytes]
+    # the subsamples of each sample, empty if whole samples are encrypted
+    subsamples: list[list[Subsample]]
+
+
+class FragmentCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class EncryptedFragmentCache:
+    """
+    LRU cache of encrypted fragments. Entries are keyed by the content key,
+    IV seed, protection scheme and an identifier of the clear fragment, so
+    that a fragment that is requested by many clients only needs to be
+    encrypted once.
+    """
+
+    entries: OrderedDict[Hashable, EncryptedSamples]
+    hits: int
+    lock: threading.Lock
+    maxsize: int
+    misses: int
+
+    def __init__(self, maxsize: int = ENCRYPTED_FRAGMENT_CACHE_SIZE) -> None:
+        self.entries = OrderedDict()
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> EncryptedSamples | None:
+        with self.lock:
+            try:
+                value: EncryptedSamples = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: EncryptedSamples) -> None:
+        if self.maxsize < 1:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> FragmentCacheInfo:
+        with self.lock:
+            return FragmentCacheInfo(
+                hits=self.hits, misses=self.misses, maxsize=self.maxsize,
+                currsize=len(self.entries))
+
+
+encrypted_fragment_cache = EncryptedFragmentCache()
+
+
+class SampleEncryptor:
+    """
+    Encrypts clear fragmented MP4 media using either the "cenc" (AES-CTR)
+    or "cbcs" (AES-CBC with a 1:9 pattern) protection scheme of ISO/IEC
+    23001-7.
+
+    For "cenc", each sample uses a 16 byte IV that is the IV of the
+    fragment plus the number of AES blocks used by the earlier samples of
+    the fragment. This allows the protected bytes of every sample in a
+    fragment to be encrypted by a single AES-CTR call.
+
+    For "cbcs", a constant IV is used and the CBC chain restarts at each
+    subsample, so one AES-CBC call is made per subsample, covering all of
+    the encrypted blocks of its pattern.
+    """
+
+    # the number of bytes at the start of each video slice NAL that are
+    # left in the clear, so that the NAL header and slice header can be
+    # parsed without needing the key.
+    VIDEO_CLEAR_LEAD: ClassVar[int] = 32
+    MAX_CLEAR_BYTES: ClassVar[int] = 0xFFFF
+    CBCS_VIDEO_PATTERN: ClassVar[tuple[int, int]] = (1, 9)
+
+    cache: EncryptedFragmentCache | None
+    codec: str | None
+    iv_seed: bytes
+    key: KeyMaterial
+    kid: KeyMaterial
+    nal_length_size: int
+    scheme: EncryptionScheme
+
+    def __init__(self,
+                 scheme: EncryptionScheme,
+                 kid: KeyMaterial,
+                 key: KeyMaterial,
+                 codecs: str,
+                 content_type: str,
+                 nal_length_size: int | None = None,
+                 iv_seed: bytes | None = None,
+                 cache: EncryptedFragmentCache | None = None) -> None:
+        self.scheme = scheme
+        self.kid = kid
+        self.key = key
+        self.codec = None
+        if content_type == 'video':
+            if codecs.startswith('avc'):
+                self.codec = 'avc'
+            elif codecs.startswith('hev') or codecs.startswith('hvc'):
+                self.codec = 'hevc'
+        if nal_length_size is None:
+            nal_length_size = 4
+        self.nal_length_size = nal_length_size
+        if iv_seed is None:
+            iv_seed = hashlib.sha256(b'iv:' + kid.raw).digest()[:16]
+        self.iv_seed = iv_seed
+        self.cache = cache
+
+    @property
+    def subsample_encryption(self) -> bool:
+        return self.codec is not None
+
+    @property
+    def iv_size(self) -> int:
+        if self.scheme == EncryptionScheme.CBCS:
+            return 0
+        return 16
+
+    @property
+    def pattern(self) -> tuple[int, int]:
+        if self.scheme == EncryptionScheme.CBCS and self.subsample_encryption:
+            return self.CBCS_VIDEO_PATTERN
+        return (0, 0)
+
+    @property
+    def constant_iv(self) -> bytes:
+        return hashlib.sha256(self.iv_seed + b':cbcs').digest()[:16]
+
+    def fragment_iv(self, fragment_id: str) -> bytes:
+        """
+        The first 8 bytes of the IVs of every sample of a "cenc" fragment.
+        """
+        return hashlib.sha256(self.iv_seed + bytes(fragment_id, 'utf-8')).digest()[:8]
+
+    def protect_init_segment(self, atom: Mp4Atom) -> None:
+        """
+        Converts every sample entry of an init segment into an encrypted
+        sample entry ("encv" or "enca") with a protection scheme
+        information box.
+        """
+        stsd: Mp4Atom | None = atom.find_child('stsd')
+        if stsd is None:
+            raise ValueError('Failed to find stsd box in init segment')
+        for child in list(stsd.children):
+            entry: Mp4Atom = child.lazy_load()
+            if entry.atom_type in {'encv', 'enca'}:
+                continue
+            data_format: str = entry.atom_type
+            if isinstance(entry, VisualSampleEntry):
+                entry.atom_type = 'encv'
+            else:
+                entry.atom_type = 'enca'
+            entry.append_child(self.create_sinf_box(data_format))
+
+    def create_sinf_box(self, data_format: str) -> ProtectionSchemeInformationBox:
+        if self.scheme == EncryptionScheme.CENC:
+            tenc = TrackEncryptionBox(
+                version=0, flags=0, is_encrypted=1, iv_size=self.iv_size,
+                default_kid=HexBinary(self.kid.raw))
+        else:
+            crypt, skip = self.pattern
+            tenc = TrackEncryptionBox(
+                version=1, flags=0, is_encrypted=1, iv_size=0,
+                crypt_byte_block=crypt, skip_byte_block=skip,
+                default_kid=HexBinary(self.kid.raw),
+                constant_iv=HexBinary(self.constant_iv))
+        return ProtectionSchemeInformationBox(children=[
+            OriginalFormatBox(data_format=data_format),
+            ProtectionSchemeTypeBox(
+                version=0, flags=0, scheme_type=self.scheme.value,
+                scheme_version=0x10000, scheme_uri=None),
+            SchemaInformationBox(children=[tenc]),
+        ])
+
+    def protect_media_segment(self, atom: Mp4Atom, fragment_id: str) -> None:
+        """
+        Encrypts the samples in the mdat box of a media segment and adds
+        the saiz, saio and senc boxes that describe the encryption of each
+        sample. The fragment_id must uniquely identify the clear fragment.
+        """
+        moof: Mp4Atom = atom['moof']
+        traf: Mp4Atom = moof['traf']
+        tfhd: Mp4Atom = traf['tfhd']
+        trun: TrackFragmentRunBox = traf['trun']
+        mdat: Mp4Atom = atom['mdat']
+        base_data_offset: int | None = tfhd.base_data_offset
+        if base_data_offset is None:
+            base_data_offset = moof.position
+        payload_start: int = mdat.position + mdat.header_size
+        samples: list[tuple[int, int]] = [
+            (base_data_offset + sample.offset - payload_start, sample.size)
+            for sample in trun.samples]
+        data: HexBinary | bytes = mdat.data
+        if not isinstance(data, bytes):
+            data = data.data
+        result: EncryptedSamples = self.encrypt_fragment(data, samples, fragment_id)
+        mdat.data = result.data
+        boxes: list[Mp4Atom] = self.create_traf_boxes(result)
+        pos: int = traf.index('trun')
+        for box in reversed(boxes):
+            traf.insert_child(pos, box)
+        # force the trun data_offset and tfhd base_data_offset to be
+        # re-calculated, as the position of the mdat has changed
+        trun.flags |= TrackFragmentRunBox.data_offset_present
+        tfhd.base_data_offset = None
+
+    def create_traf_boxes(self, result: EncryptedSamples) -> list[Mp4Atom]:
+        if self.iv_size == 0 and not self.subsample_encryption:
+            # constant IV and whole sample encryption, so there is no
+            # per-sample information to provide
+            return []
+        aux_samples: list[CencSampleAuxiliaryData] = []
+        sizes: list[int] = []
+        # offset of first sample from the start of the senc box
+        offset: int = 16
+        for iv, subsamples in zip(result.ivs, result.subsamples):
+            size: int = len(iv)
+            if self.subsample_encryption:
+                size += 2 + 6 * len(subsamples)
+            aux_samples.append(CencSampleAuxiliaryData(
+                initialization_vector=HexBinary(iv), iv_size=len(iv),
+                offset=offset, size=size,
+                subsamples=[CencSubSample(clear=clear, encrypted=enc)
+                            for clear, enc in subsamples]))
+            sizes.append(size)
+            offset += size
+        default_size: int = 0
+        if sizes and min(sizes) == max(sizes):
+            default_size = sizes[0]
+        saiz = SampleAuxiliaryInformationSizesBox(
+            version=0, flags=0, default_sample_info_size=default_size,
+            sample_info_sizes=([] if default_size else sizes),
+            sample_count=len(sizes))
+        saio = SampleAuxiliaryInformationOffsetsBox(
+            version=0, flags=0, offsets=None)
+        senc = CencSampleEncryptionBox(
+            version=0, flags=(CencSampleAuxiliaryData.UseSubsampleEncryption
+                              if self.subsample_encryption else 0),
+            iv_size=self.iv_size, samples=aux_samples)
+        return [saiz, saio, senc]
+
+    def encrypt_fragment(self, data: bytes, samples: list[tuple[int, int]],
+                         fragment_id: str) -> EncryptedSamples:
+        """
+        Encrypts the samples of one fragment, using the cache if available.
+        Each sample is a tuple of (offset, size) within data.
+        """
+        if self.cache is None:
+            return self.encrypt_samples(data, samples, fragment_id)
+        key = (self.key.raw, self.iv_seed, self.scheme, fragment_id)
+        result: EncryptedSamples | None = self.cache.get(key)
+        if result is None:
+            result = self.encrypt_samples(data, samples, fragment_id)
+            self.cache.put(key, result)
+        return result
+
+    def encrypt_samples(self, data: bytes, samples: list[tuple[int, int]],
+                        fragment_id: str) -> EncryptedSamples:
+        src = memoryview(data)
+        all_subsamples: list[list[Subsample]] = []
+        ranges: list[list[tuple[int, int]]] = []
+        for start, size in samples:
+            subsamples: list[Subsample] = []
+            if self.subsample_encryption:
+                subsamples = self.calculate_subsamples(src[start:start + size])
+                ranges.append(self.protected_ranges(start, subsamples))
+            else:
+                ranges.append([(start, start + size)])
+            all_subsamples.append(subsamples)
+        if self.scheme == EncryptionScheme.CENC:
+            output, ivs = self.encrypt_ctr(src, ranges, fragment_id)
+        else:
+            output = self.encrypt_cbc_pattern(src, ranges)
+            ivs = [b''] * len(samples)
+        return EncryptedSamples(
+            data=bytes(output), ivs=ivs, subsamples=all_subsamples)
+
+    def encrypt_ctr(self, src: memoryview, ranges: list[list[tuple[int, int]]],
+                    fragment_id: str) -> tuple[bytearray, list[bytes]]:
+        nonce: bytes = self.fragment_iv(fragment_id)
+        pieces: list[memoryview | bytes] = []
+        ivs: list[bytes] = []
+        block: int = 0
+        for sample_ranges in ranges:
+            ivs.append(nonce + struct.pack('>Q', block))
+            length: int = 0
+            for start, end in sample_ranges:
+                pieces.append(src[start:end])
+                length += end - start
+            # each sample starts at the beginning of an AES block
+            padding: int = -length % AES.block_size
+            if padding:
+                pieces.append(bytes(padding))
+            block += (length + padding) // AES.block_size
+        cipher = AES.new(self.key.raw, AES.MODE_CTR, nonce=nonce, initial_value=0)
+        encrypted = memoryview(cipher.encrypt(b''.join(pieces)))
+        output = bytearray(src)
+        pos: int = 0
+        for sample_ranges in ranges:
+            length = 0
+            for start, end in sample_ranges:
+                output[start:end] = encrypted[pos:pos + end - start]
+                pos += end - start
+                length += end - start
+            pos += -length % AES.block_size
+        return (output, ivs,)
+
+    def encrypt_cbc_pattern(self, src: memoryview,
+                            ranges: list[list[tuple[int, int]]]) -> bytearray:
+        crypt, skip = self.pattern
+        iv: bytes = self.constant_iv
+        output = bytearray(src)
+        for sample_ranges in ranges:
+            for start, end in sample_ranges:
+                # any partial block at the end is left in the clear
+                end = start + AES.block_size * ((end - start) // AES.block_size)
+                if end <= start:
+                    continue
+                cipher = AES.new(self.key.raw, AES.MODE_CBC, iv=iv)
+                if crypt == 0:
+                    output[start:end] = cipher.encrypt(src[start:end])
+                    continue
+                step: int = AES.block_size * (crypt + skip)
+                blocks: list[tuple[int, int]] = [
+                    (pos, min(pos + AES.block_size * crypt, end))
+                    for pos in range(start, end, step)]
+                encrypted = memoryview(cipher.encrypt(
+                    b''.join([src[a:b] for a, b in blocks])))
+                pos = 0
+                for a, b in blocks:
+                    output[a:b] = encrypted[pos:pos + b - a]
+                    pos += b - a
+        return output
+
+    def calculate_subsamples(self, sample: memoryview) -> list[Subsample]:
+        """
+        Finds the subsamples of a video sample. Slice NALs are encrypted,
+        apart from their first VIDEO_CLEAR_LEAD bytes. All other NALs
+        are left in the clear.
+        """
+        result: list[Subsample] = []
+        size: int = len(sample)
+        nls: int = self.nal_length_size
+        clear: int = 0
+        pos: int = 0
+        while pos + nls < size:
+            nal_size: int = int.from_bytes(sample[pos:pos + nls], 'big')
+            nal_end: int = min(pos + nls + nal_size, size)
+            encrypted: int = 0
+            if nal_size > 0 and self.is_slice(sample[pos + nls]):
+                encrypted = nal_end - pos - nls - self.VIDEO_CLEAR_LEAD
+                encrypted -= encrypted % AES.block_size
+            if encrypted > 0:
+                result += self.split_subsample(clear + nal_end - pos - encrypted, encrypted)
+                clear = 0
+            else:
+                clear += nal_end - pos
+            pos = nal_end
+        clear += size - pos
+        if clear:
+            result += self.split_subsample(clear, 0)
+        return result
+
+    def split_subsample(self, clear: int, encrypted: int) -> list[Subsample]:
+        result: list[Subsample] = []
+        while clear > self.MAX_CLEAR_BYTES:
+            result.append((self.MAX_CLEAR_BYTES, 0,))
+            clear -= self.MAX_CLEAR_BYTES
+        result.append((clear, encrypted,))
+        return result
+
+    @staticmethod
+    def protected_ranges(start: int, subsamples: list[Subsample]) -> list[tuple[int, int]]:
+        result: list[tuple[int, int]] = []
+        pos: int = start
+        for clear, encrypted in subsamples:
+            pos += clear
+            if encrypted:
+                result.append((pos, pos + encrypted,))
+            pos += encrypted
+        return result
+
+    def is_slice(self, header: int) -> bool:
+        if self.codec == 'avc':
+            # coded slice NAL unit types 1 to 5
+            return 1 <= (header & 0x1F) <= 5
+        # HEVC VCL NAL unit types 0 to 31
+        return ((header >> 1) & 0x3F) < 32
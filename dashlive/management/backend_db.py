@@ -124,14 +124,13 @@ class BackendDatabaseAccess(DatabaseAccess):
         rep = Representation.load(filename=mf.name, atoms=atom.children)
         mf.representation = rep
         mf.encryption_keys = []
-        for kid in rep.kids:
-            key_model = Key.get(hkid=kid.hex)
-            if key_model is None:
-                key = KeyMaterial(
-                    raw=PlayReady.generate_content_key(kid.raw))
-                key_model = Key(hkid=kid.hex, hkey=key.hex, computed=True)
-                key_model.add()
-            mf.encryption_keys.append(key_model)
+        if rep.kids:
+            keys: dict[str, Key] = Key.get_kids(set(rep.kids), derive_missing=True)
+            for kid in rep.kids:
+                key_model = keys[kid.hex]
+                if key_model.pk is None:
+                    key_model.add()
+                mf.encryption_keys.append(key_model)
         mf.content_type = rep.content_type
         mf.bitrate = rep.bitrate
         mf.encrypted = rep.encrypted
@@ -71,6 +71,8 @@ class AdaptationSet(ObjectWithFields):
     mediaURL: str
     mode: str
     presentation_time_offset: timedelta
+    # the value of the mp4protection ContentProtection element
+    protection_scheme: str = 'cenc'
     representations: list[Representation]
     segmentAlignment: bool
     segment_timeline: bool
@@ -37,7 +37,13 @@ from dashlive.mpeg.mp4 import (
     AudioSampleEntry, MediaHeaderBox, MovieBox, Mp4Atom, SampleDescriptionBox,
     SampleEntry, TrackBox, TrackExtendsBox, TrackFragmentBox, TrackFragmentRunBox,
     VisualSampleEntry, XMLSubtitleSampleEntry)
-from dashlive.utils.date_time import scale_timedelta, timecode_to_timedelta, timedelta_to_timecode
+from dashlive.utils.date_time import (
+    MICROSECONDS_PER_SECOND,
+    microseconds_to_timecode,
+    timecode_to_timedelta,
+    timedelta_to_microseconds,
+    timedelta_to_timecode,
+)
 from dashlive.utils.list_of import ListOf
 from dashlive.utils.object_with_fields import ObjectWithFields
 
@@ -127,6 +133,7 @@ class Representation(ObjectWithFields):
     bitrate: int
     max_bitrate: int | None = None
     period_start: datetime.timedelta  # start of period, relative to start of DASH stream
+    period_start_us: int  # period_start, in microseconds
     period_duration: datetime.timedelta | None
     presentation_time_offset: int  # in timescale units
     sar: str | None
@@ -156,6 +163,7 @@ class Representation(ObjectWithFields):
             'segments': [],
             'codecs': '',
             'period_start': datetime.timedelta(),
+            'period_start_us': 0,
         }
         if self.content_type == 'video':
             defaults.update({
@@ -304,6 +312,7 @@ class Representation(ObjectWithFields):
                         duration: datetime.timedelta | None) -> None:
         self._timing = timing
         self.period_start = period_start
+        self.period_start_us = timedelta_to_microseconds(period_start)
         self.presentation_time_offset = timedelta_to_timecode(period_time_offset, self.timescale)
         self.period_duration = duration
 
@@ -475,21 +484,20 @@ class Representation(ObjectWithFields):
             end = min(end, self.mediaDuration)
 
         if self._timing.mode == 'live':
-            timeline_start = timedelta_to_timecode(
-                max(self.period_start, self._timing.firstAvailableTime) - self.period_start,
+            timeline_start = microseconds_to_timecode(
+                max(self.period_start_us, self._timing.first_available_us) - self.period_start_us,
                 self.timescale)
             assert timeline_start >= 0
             mod_segment, origin_time, seg_start_time = self.calculate_segment_from_timecode(
                 timeline_start, True)
             drift = ref_duration_tc - self.mediaDuration
-            period_duration: datetime.timedelta
+            period_dur_tc: int
             if self.period_duration is None:
                 assert self._timing.availabilityStartTime is not None
-                period_start_date: datetime.datetime = self._timing.availabilityStartTime + self.period_start
-                period_duration = self._timing.now - period_start_date
+                period_dur_tc = microseconds_to_timecode(
+                    self._timing.elapsed_us - self.period_start_us, self.timescale)
             else:
-                period_duration = self.period_duration
-            period_dur_tc: int = timedelta_to_timecode(period_duration, self.timescale)
+                period_dur_tc = timedelta_to_timecode(self.period_duration, self.timescale)
             end = min(period_dur_tc, self._timing.timeShiftBufferDepth * self.timescale)
             end += self.presentation_time_offset
             logging.debug(
@@ -533,14 +541,13 @@ class Representation(ObjectWithFields):
         """
         Convert the given timedelta into the timescale used by this representation
         """
-        return int(delta.total_seconds() * self.timescale)
+        return timedelta_to_timecode(delta, self.timescale)
 
     def timescale_to_timedelta(self, timecode: int) -> datetime.timedelta:
         """
         Convert the given timecode (in timescale units) into a timedelta
         """
-        seconds = float(timecode) / float(self.timescale)
-        return datetime.timedelta(seconds=seconds)
+        return timecode_to_timedelta(timecode, self.timescale)
 
     def calculate_first_and_last_segment_number(self) -> tuple[int, int]:
         """
@@ -551,8 +558,9 @@ class Representation(ObjectWithFields):
         timing = self._timing
         if timing.mode != 'live':
             return (self.start_number, self.num_media_segments + self.start_number - 1)
-        last_fragment = self.start_number + int(scale_timedelta(
-            timing.elapsedTime, self.timescale, self.segment_duration))
+        last_fragment = self.start_number + (
+            microseconds_to_timecode(timing.elapsed_us, self.timescale) //
+            self.segment_duration)
         # For services with MPD@type='dynamic', the Segment availability start time
         # of a Media Segment is the sum of
         # - the value of the MPD@availabilityStartTime,
@@ -604,16 +612,19 @@ class Representation(ObjectWithFields):
             # the reference Representation
             segment_num = int(segment_time // self.segment_duration)
 
-        seg_delta = self.timescale_to_timedelta(timecode)
-        fta = timing.firstAvailableTime - timing.leeway
+        # compare timecode/timescale against the available range (in microseconds)
+        # without rounding, by cross multiplying
+        seg_delta: int = timecode * MICROSECONDS_PER_SECOND
+        fta_us: int = timing.first_available_us - timing.leeway_us
         if (
-                seg_delta < fta or
-                seg_delta > timing.elapsedTime
+                seg_delta < fta_us * self.timescale or
+                seg_delta > timing.elapsed_us * self.timescale
         ):
             msg = (
-                f'$Time$={segment_time} $Number$={segment_num} ({seg_delta}) not available ' +
+                f'$Time$={segment_time} $Number$={segment_num} ' +
+                f'({self.timescale_to_timedelta(timecode)}) not available ' +
                 f'(valid range= {timing.firstAvailableTime} -> {timing.elapsedTime})' +
-                f'(available range= {fta} -> {timing.elapsedTime})')
+                f'(available range= {timing.firstAvailableTime - timing.leeway} -> {timing.elapsedTime})')
             raise ValueError(msg)
 
         mod_segment, origin_time, _ = self.calculate_segment_from_timecode(
@@ -26,7 +26,12 @@ import logging
 from typing import ClassVar
 
 from dashlive.utils.timezone import UTC
-from dashlive.utils.date_time import timecode_to_timedelta
+from dashlive.utils.date_time import (
+    MICROSECONDS_PER_SECOND,
+    microseconds_to_timecode,
+    timecode_to_microseconds,
+    timedelta_to_microseconds,
+)
 from dashlive.server.options.container import OptionsContainer
 
 from .reference import StreamTimingReference
@@ -49,18 +54,24 @@ class StaticManifestTimingContext:
 
 
 class DashTiming:
+    """
+    Calculates the timing values for a DASH stream. All of the calculations
+    are performed using integer microseconds, with timedelta objects only
+    being created when the elapsedTime, firstAvailableTime, leeway or
+    mediaDuration properties are used (e.g. by manifest templates).
+    """
     DEFAULT_TIMESHIFT_BUFFER_DEPTH: ClassVar[int] = 60  # in seconds
 
     __slots__ = ('timeShiftBufferDepth', 'mode', 'now', 'availabilityStartTime',
-                 'publishTime', 'stream_reference', 'elapsedTime', 'leeway',
-                 'mediaDuration', 'minimumUpdatePeriod',
-                 'firstAvailableTime')
+                 'publishTime', 'stream_reference', 'elapsed_us', 'leeway_us',
+                 'media_duration_us', 'minimumUpdatePeriod',
+                 'first_available_us')
 
     availabilityStartTime: datetime.datetime | None
-    elapsedTime: datetime.timedelta
-    firstAvailableTime: datetime.timedelta
-    leeway: datetime.timedelta
-    mediaDuration: datetime.timedelta
+    elapsed_us: int  # time since availabilityStartTime, in microseconds
+    first_available_us: int  # oldest available time, in microseconds
+    leeway_us: int
+    media_duration_us: int
     minimumUpdatePeriod: int | None
     mode: str
     now: datetime.datetime
@@ -76,19 +87,35 @@ class DashTiming:
         self.now = now
         self.publishTime = now.replace(microsecond=0)
         self.stream_reference = stream_ref
-        self.leeway = datetime.timedelta(seconds=0)
+        self.leeway_us = 0
         if options.mode == 'live':
             self.calculate_live_params(now, options)
         else:
             self.calculate_vod_params(now, options)
 
+    @property
+    def elapsedTime(self) -> datetime.timedelta:
+        return datetime.timedelta(microseconds=self.elapsed_us)
+
+    @property
+    def firstAvailableTime(self) -> datetime.timedelta:
+        return datetime.timedelta(microseconds=self.first_available_us)
+
+    @property
+    def leeway(self) -> datetime.timedelta:
+        return datetime.timedelta(microseconds=self.leeway_us)
+
+    @property
+    def mediaDuration(self) -> datetime.timedelta:
+        return datetime.timedelta(microseconds=self.media_duration_us)
+
     def calculate_vod_params(self,
                              now: datetime.datetime,
                              options: OptionsContainer) -> None:
         self.availabilityStartTime = None
         self.timeShiftBufferDepth = 0
-        self.elapsedTime = self.firstAvailableTime = datetime.timedelta(seconds=0)
-        self.mediaDuration = timecode_to_timedelta(
+        self.elapsed_us = self.first_available_us = 0
+        self.media_duration_us = timecode_to_microseconds(
             self.stream_reference.media_duration, self.stream_reference.timescale)
         self.minimumUpdatePeriod = None
 
@@ -123,21 +150,21 @@ class DashTiming:
                 datetime.timedelta(seconds=self.DEFAULT_TIMESHIFT_BUFFER_DEPTH))
         else:
             self.availabilityStartTime = options.availabilityStartTime
-        self.elapsedTime = now - self.availabilityStartTime
+        self.elapsed_us = timedelta_to_microseconds(now - self.availabilityStartTime)
         logging.debug(
-            'calculate_live_params elapsed=%s (%f) now=%s availabilityStartTime=%s timescale=%d',
-            self.elapsedTime, self.elapsedTime.total_seconds(),
-            now, self.availabilityStartTime, self.stream_reference.timescale)
+            'calculate_live_params elapsed=%dus now=%s availabilityStartTime=%s timescale=%d',
+            self.elapsed_us, now, self.availabilityStartTime,
+            self.stream_reference.timescale)
         logging.debug(
             'elapsed_fragments=%d',
-            self.elapsedTime.total_seconds() * self.stream_reference.timescale //
+            microseconds_to_timecode(self.elapsed_us, self.stream_reference.timescale) //
             self.stream_reference.segment_duration)
-        if self.elapsedTime.total_seconds() == 0:
+        if self.elapsed_us == 0:
             logging.info('Elapsed time is zero, moving availabilityStartTime back one day')
-            self.elapsedTime = datetime.timedelta(days=1)
-            self.availabilityStartTime -= self.elapsedTime
-        if self.elapsedTime.total_seconds() < self.timeShiftBufferDepth:
-            self.timeShiftBufferDepth = int(self.elapsedTime.total_seconds())
+            self.elapsed_us = timedelta_to_microseconds(one_day)
+            self.availabilityStartTime -= one_day
+        if self.elapsed_us < self.timeShiftBufferDepth * MICROSECONDS_PER_SECOND:
+            self.timeShiftBufferDepth = self.elapsed_us // MICROSECONDS_PER_SECOND
         logging.debug('timeShiftBufferDepth: %d seconds', self.timeShiftBufferDepth)
         default_mup = round(2.0 * self.stream_reference.segment_duration / self.stream_reference.timescale)
         self.minimumUpdatePeriod = options.minimumUpdatePeriod
@@ -145,13 +172,13 @@ class DashTiming:
             self.minimumUpdatePeriod = default_mup
         elif self.minimumUpdatePeriod <= 0:
             self.minimumUpdatePeriod = None
-        self.firstAvailableTime = self.elapsedTime - datetime.timedelta(
-            seconds=self.timeShiftBufferDepth)
+        self.first_available_us = (
+            self.elapsed_us - self.timeShiftBufferDepth * MICROSECONDS_PER_SECOND)
         if options.leeway is not None:
-            self.leeway = datetime.timedelta(seconds=options.leeway)
-        if self.minimumUpdatePeriod is not None:
-            num_refreshes = int(
-                self.elapsedTime.total_seconds() // self.minimumUpdatePeriod)
+            self.leeway_us = options.leeway * MICROSECONDS_PER_SECOND
+        if self.minimumUpdatePeriod:
+            num_refreshes: int = self.elapsed_us // (
+                self.minimumUpdatePeriod * MICROSECONDS_PER_SECOND)
             self.publishTime = (
                 self.availabilityStartTime +
                 datetime.timedelta(seconds=(
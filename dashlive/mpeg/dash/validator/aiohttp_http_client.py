@@ -0,0 +1,155 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import json
+import logging
+
+import aiohttp
+from lxml import etree as ET
+from werkzeug.utils import cached_property
+
+class AiohttpResponse:
+    headers: dict[str, str]
+    status: str
+    status_int: int
+    status_code: int
+    response: aiohttp.ClientResponse
+    _body: bytes | None
+    _pos: int
+
+    def __init__(self, response: aiohttp.ClientResponse, body: bytes | None) -> None:
+        self.response = response
+        self.status_int = self.status_code = response.status
+        self.headers = {}
+        for key, value in response.headers.items():
+            name: str = '-'.join([k.title() for k in key.split('-')])
+            self.headers[name] = value
+        if response.ok:
+            self.status = 'OK'
+        else:
+            self.status = str(response.reason)
+        self._body = body
+        self._pos = 0
+
+    @cached_property
+    def xml(self) -> ET.Element:
+        return ET.fromstring(self.body)
+
+    @property
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            raise ValueError('Body has not been loaded, use load_body()')
+        return self._body
+
+    def get_data(self, as_text: bool) -> bytes | str:
+        if as_text:
+            return self.body.decode(self.response.charset or 'utf-8')
+        self.response.raise_for_status()
+        return self.body
+
+    def tell(self) -> int:
+        return self._pos
+
+    async def read_chunk(self, length: int) -> bytes:
+        """
+        Read part of a streamed response body
+        """
+        rv: bytes = await self.response.content.read(length)
+        self._pos += len(rv)
+        return rv
+
+    async def load_body(self) -> bytes:
+        """
+        Read the remainder of a streamed response body
+        """
+        if self._body is None:
+            self._body = await self.response.read()
+            self._pos = len(self._body)
+        return self._body
+
+    def release(self) -> None:
+        """
+        Return the connection of a streamed response to the connection pool
+        """
+        self.response.release()
+
+
+class AiohttpHttpClient:
+    """
+    Implements HttpClient protocol using the aiohttp library. Connections are
+    kept alive and shared between requests, with at most "concurrency"
+    requests in progress to any one host.
+    """
+
+    concurrency: int
+    log: logging.Logger
+    session: aiohttp.ClientSession | None
+
+    def __init__(self, concurrency: int = 16, log: logging.Logger | None = None) -> None:
+        self.concurrency = concurrency
+        self.log = log if log is not None else logging.getLogger()
+        self.session = None
+
+    async def __aenter__(self) -> "AiohttpHttpClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        # the session must be created inside the asyncio loop that will use it
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=0, limit_per_host=self.concurrency, keepalive_timeout=30)
+            self.session = aiohttp.ClientSession(connector=connector, raise_for_status=False)
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def head(self, url, headers=None, params=None, status=None, xhr=False) -> AiohttpResponse:
+        if xhr:
+            headers = self.add_xhr_headers(headers)
+        async with self.get_session().head(url, data=params, headers=headers) as resp:
+            return AiohttpResponse(resp, b'')
+
+    async def get(self,
+                  url: str,
+                  headers: dict | None = None,
+                  params: dict | None = None,
+                  status: int | None = None,
+                  xhr: bool = False,
+                  stream: bool = False) -> AiohttpResponse:
+        """
+        Make a GET request. If stream is True, the body is not read and the
+        caller must either call load_body() or release() on the response.
+        """
+        self.log.debug('GET %s', url)
+        if xhr:
+            headers = self.add_xhr_headers(headers)
+        resp = await self.get_session().get(url, data=params, headers=headers)
+        if stream:
+            return AiohttpResponse(resp, None)
+        try:
+            body: bytes = await resp.read()
+        finally:
+            resp.release()
+        return AiohttpResponse(resp, body)
+
+    def add_xhr_headers(self, headers: dict | None = None) -> dict:
+        if headers is None:
+            return {'X-REQUESTED-WITH': 'XMLHttpRequest'}
+        return {
+            'X-REQUESTED-WITH': 'XMLHttpRequest',
+            **headers
+        }
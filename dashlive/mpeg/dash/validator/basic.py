@@ -12,6 +12,7 @@ import logging
 import sys
 import time
 
+from .aiohttp_http_client import AiohttpHttpClient
 from .concurrent_pool import ConcurrentWorkerPool
 from .http_client import HttpClient
 from .options import ValidatorOptions
@@ -80,12 +81,30 @@ class BasicDashValidator(DashValidator):
                             type=int,
                             required=False)
         parser.add_argument(
-            '--threads',
-            dest='threads',
-            help='Use mulit-threaded validation with a maximum number of threads (0=auto)',
+            '--concurrency', '--threads',
+            dest='concurrency',
+            help='Maximum number of concurrent requests and threads (0=auto)',
             type=int,
             default=0,
             required=False)
+        parser.add_argument(
+            '--http-client',
+            dest='http_client',
+            help='HTTP client library to use',
+            choices=['aiohttp', 'requests'],
+            default='aiohttp',
+            required=False)
+        parser.add_argument(
+            '--buffered',
+            help='download each media segment before parsing it, rather than parsing it as it arrives',
+            action='store_true')
+        parser.add_argument(
+            '--cache-size',
+            dest='cache_size',
+            help='Maximum number of segment validation results to cache (0=disabled)',
+            type=int,
+            default=1024,
+            required=False)
         parser.add_argument('--ivsize',
                             help='IV size (in bits or bytes)',
                             type=int,
@@ -143,28 +162,35 @@ class BasicDashValidator(DashValidator):
         if args.ivsize is not None and args.ivsize > 16:
             args.ivsize = args.ivsize // 8
         kwargs = {**vars(args)}
-        del kwargs['manifest']
-        try:
-            del kwargs['threads']
-        except KeyError:
-            pass
+        for name in ['manifest', 'concurrency', 'http_client', 'buffered']:
+            del kwargs[name]
         log = logging.getLogger('DashValidator')
         progress = ConsoleProgress()
         if args.verbose > 0:
             log.setLevel(logging.DEBUG)
             progress = NullProgress()
+        # the aiohttp client can parse segments as they are received
+        kwargs['stream_segments'] = args.http_client == 'aiohttp' and not args.buffered
         options = ValidatorOptions(log=log, progress=progress, **kwargs)
-        max_workers: int | None = args.threads
+        max_workers: int | None = args.concurrency
         if max_workers < 1:
             max_workers = None
         start_time = time.time()
         with ThreadPoolExecutor(max_workers=max_workers) as pool:
             options.pool = ConcurrentWorkerPool(pool)
-            bdv = cls(args.manifest, http_client=RequestsHttpClient(options), options=options)
-            await bdv.run()
+            if args.http_client == 'requests':
+                bdv = cls(args.manifest, http_client=RequestsHttpClient(options), options=options)
+                await bdv.run()
+            else:
+                async with AiohttpHttpClient(
+                        concurrency=(max_workers or 16), log=log) as http_client:
+                    bdv = cls(args.manifest, http_client=http_client, options=options)
+                    await bdv.run()
         options.progress.finished(args.manifest)
         sys.stdout.write('\n')
         duration = time.time() - start_time
+        if bdv.cache.hits:
+            print(f'{bdv.cache.hits} segment checks skipped using cached results')
         if not bdv.has_errors():
             print(f'No errors found. Validation took {duration:#5.1f} seconds')
             return 0
@@ -0,0 +1,355 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import argparse
+import asyncio
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from typing import TextIO
+
+from dashlive.utils.date_time import to_iso_datetime
+from dashlive.utils.json_object import JsonObject
+
+from .aiohttp_http_client import AiohttpHttpClient
+from .basic import BasicDashValidator
+from .concurrent_pool import ConcurrentWorkerPool
+from .http_client import HttpClient
+from .load_generator import LoadStats, MeasuringHttpClient
+from .options import ValidatorOptions
+from .progress import NullProgress
+from .requests_http_client import RequestsHttpClient
+
+@dataclass(slots=True, kw_only=True)
+class BatchOptions:
+    """
+    Options that can be passed to the batch validator
+    """
+    processes: int = 0  # 0 = validate in this process
+    concurrency: int = 4  # manifests validated at the same time by each process
+    duration: int | None = None
+    encrypted: bool | None = None  # None = use the "drm" parameter of each URL
+    http_client: str = 'aiohttp'
+    cache_size: int = 1024
+    verbose: int = 0
+
+
+@dataclass(slots=True, kw_only=True)
+class BatchResult:
+    """
+    The result of validating one manifest
+    """
+    url: str
+    status: str = 'ok'  # ok, errors or failed
+    errors: list[str] = field(default_factory=list)
+    duration: float = 0.0  # seconds
+    num_bytes: int = 0
+    requests: int = 0
+
+    def to_dict(self) -> JsonObject:
+        return {
+            'url': self.url,
+            'status': self.status,
+            'errorCount': len(self.errors),
+            'errors': self.errors,
+            'duration': self.duration,
+            'bytes': self.num_bytes,
+            'requests': self.requests,
+            'finished': to_iso_datetime(datetime.datetime.now(datetime.timezone.utc)),
+        }
+
+
+@dataclass(slots=True)
+class BatchSummary:
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.passed + self.failed + self.skipped
+
+
+def is_encrypted_url(url: str) -> bool:
+    return re.search(r'[?&]drm=', url) is not None and 'drm=none' not in url
+
+
+async def validate_url(url: str, http_client: HttpClient, pool: ConcurrentWorkerPool,
+                       options: BatchOptions) -> BatchResult:
+    stats = LoadStats()
+    encrypted: bool = options.encrypted
+    if encrypted is None:
+        encrypted = is_encrypted_url(url)
+    log = logging.getLogger('DashValidator')
+    vopts = ValidatorOptions(
+        duration=options.duration, encrypted=encrypted, pool=pool,
+        progress=NullProgress(), log=log, cache_size=options.cache_size)
+    result = BatchResult(url=url)
+    start: float = time.perf_counter()
+    try:
+        bdv = BasicDashValidator(url, MeasuringHttpClient(http_client, stats), options=vopts)
+        loaded: bool | None = await bdv.run()
+        result.errors = [str(err) for err in bdv.get_errors()]
+        if loaded is False:
+            result.status = 'failed'
+            if not result.errors:
+                result.errors.append('Failed to load manifest')
+        elif result.errors:
+            result.status = 'errors'
+    except Exception as err:
+        log.warning('%s: %s', url, err)
+        result.status = 'failed'
+        result.errors.append(f'{type(err).__name__}: {err}')
+    result.duration = time.perf_counter() - start
+    result.num_bytes = stats.total.num_bytes
+    result.requests = stats.total.count
+    return result
+
+
+async def validate_urls(urls: list[str], options: BatchOptions,
+                        http_client: HttpClient | None = None) -> list[JsonObject]:
+    """
+    Validates a list of manifests, with at most options.concurrency
+    manifests being validated at the same time.
+    """
+    sem = asyncio.Semaphore(max(options.concurrency, 1))
+
+    async def limited(url: str, client: HttpClient) -> BatchResult:
+        async with sem:
+            return await validate_url(url, client, pool, options)
+
+    with ThreadPoolExecutor(max_workers=2 * max(options.concurrency, 1)) as tpe:
+        pool = ConcurrentWorkerPool(tpe)
+        if http_client is not None:
+            results = await asyncio.gather(*[limited(url, http_client) for url in urls])
+        elif options.http_client == 'requests':
+            client = RequestsHttpClient(ValidatorOptions(pool=pool))
+            results = await asyncio.gather(*[limited(url, client) for url in urls])
+        else:
+            async with AiohttpHttpClient(concurrency=4 * max(options.concurrency, 1)) as client:
+                results = await asyncio.gather(*[limited(url, client) for url in urls])
+    return [res.to_dict() for res in results]
+
+
+def validate_chunk(urls: list[str], options: BatchOptions) -> list[JsonObject]:
+    """
+    Entry point used by each process in the process pool
+    """
+    logging.basicConfig(level=(logging.DEBUG if options.verbose else logging.ERROR))
+    return asyncio.run(validate_urls(urls, options))
+
+
+class BatchValidator:
+    """
+    Validates a list of manifest URLs, spread across a pool of processes.
+    The result of each validation is appended to a JSON-lines report as
+    soon as it is available, and URLs that are already in the report are
+    skipped when resuming an interrupted run.
+    """
+
+    options: BatchOptions
+    output: str
+    resume: bool
+    urls: Iterable[str]
+
+    def __init__(self, urls: Iterable[str], output: str,
+                 options: BatchOptions | None = None, resume: bool = False,
+                 http_client: HttpClient | None = None) -> None:
+        self.urls = urls
+        self.output = output
+        self.options = options if options is not None else BatchOptions()
+        self.resume = resume
+        self.http_client = http_client
+        self.log = logging.getLogger('BatchValidator')
+
+    def completed_urls(self) -> set[str]:
+        done: set[str] = set()
+        if not self.resume or not os.path.exists(self.output):
+            return done
+        with open(self.output, 'rt', encoding='utf-8') as src:
+            for line in src:
+                try:
+                    done.add(json.loads(line)['url'])
+                except (ValueError, KeyError):
+                    # a partially written line from an interrupted run
+                    continue
+        return done
+
+    def open_report(self) -> TextIO:
+        if not self.resume:
+            return open(self.output, 'wt', encoding='utf-8')
+        partial: bool = False
+        if os.path.exists(self.output) and os.path.getsize(self.output) > 0:
+            with open(self.output, 'rb') as src:
+                src.seek(-1, os.SEEK_END)
+                partial = src.read(1) != b'\n'
+        report = open(self.output, 'at', encoding='utf-8')
+        if partial:
+            # make sure new results do not get appended to a partial line
+            report.write('\n')
+        return report
+
+    def chunks(self, done: set[str], summary: BatchSummary) -> Iterator[list[str]]:
+        """
+        Splits the URLs into chunks, skipping the URLs in "done".
+        "done" only contains the URLs from the report being resumed, URLs
+        are not added to it, so that memory use does not grow with the
+        number of URLs.
+        """
+        size: int = max(self.options.concurrency, 1)
+        todo: Iterator[str] = iter(self.urls)
+        chunk: list[str] = []
+        for url in todo:
+            if url in done:
+                summary.skipped += 1
+                continue
+            chunk.append(url)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def run(self) -> BatchSummary:
+        summary = BatchSummary()
+        done: set[str] = self.completed_urls()
+        with self.open_report() as report:
+            if self.options.processes < 1:
+                for chunk in self.chunks(done, summary):
+                    results = await validate_urls(chunk, self.options, self.http_client)
+                    self.write_results(report, results, summary)
+                return summary
+            loop = asyncio.get_running_loop()
+            # the event loop and thread pools of this process must not be
+            # inherited by the worker processes
+            with ProcessPoolExecutor(max_workers=self.options.processes,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                pending: set[asyncio.Future] = set()
+                for chunk in self.chunks(done, summary):
+                    pending.add(loop.run_in_executor(
+                        executor, validate_chunk, chunk, self.options))
+                    if len(pending) >= 2 * self.options.processes:
+                        pending = await self.wait_for_results(pending, report, summary)
+                while pending:
+                    pending = await self.wait_for_results(pending, report, summary)
+        return summary
+
+    async def wait_for_results(self, pending: set[asyncio.Future], report: TextIO,
+                               summary: BatchSummary) -> set[asyncio.Future]:
+        finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for fut in finished:
+            self.write_results(report, fut.result(), summary)
+        return pending
+
+    def write_results(self, report: TextIO, results: list[JsonObject],
+                      summary: BatchSummary) -> None:
+        for item in results:
+            report.write(json.dumps(item))
+            report.write('\n')
+            if item['status'] == 'ok':
+                summary.passed += 1
+            else:
+                summary.failed += 1
+            self.log.info('%s: %s (%d errors)', item['url'], item['status'], item['errorCount'])
+        report.flush()
+
+    @staticmethod
+    def manifest_combinations(url: str, simplified: bool = False,
+                              shard: int = 0, num_shards: int = 1) -> Iterator[str]:
+        """
+        Generates the URL of every combination of the options supported by
+        a manifest served by this server.
+        """
+        from dashlive.server.manifests import manifest_map
+
+        parts = re.match(
+            r'^(?P<base>.+/dash/(?P<mode>live|vod|odvod)/[^/]+/(?P<manifest>[^/?]+))$', url)
+        if parts is None:
+            raise ValueError(f'{url} is not a DASH manifest URL of this server')
+        manifest = manifest_map[parts['manifest']]
+        options = manifest.get_supported_dash_options(
+            mode=parts['mode'], simplified=simplified)
+        for query in options.cgi_query_combinations(shard=shard, num_shards=num_shards):
+            yield f'{url}{query}'
+
+    @classmethod
+    def read_urls(cls, args: argparse.Namespace) -> Iterator[str]:
+        yield from cls.expand_urls(args.manifests, args)
+        if args.input == '-':
+            yield from cls.expand_urls(sys.stdin, args)
+        elif args.input:
+            with open(args.input, 'rt', encoding='utf-8') as src:
+                yield from cls.expand_urls(src, args)
+
+    @classmethod
+    def expand_urls(cls, lines: Iterable[str], args: argparse.Namespace) -> Iterator[str]:
+        for url in lines:
+            url = url.strip()
+            if not url or url.startswith('#'):
+                continue
+            if args.combinations:
+                shard, _, num_shards = args.shard.partition('/')
+                yield from cls.manifest_combinations(
+                    url, simplified=args.simplified, shard=int(shard), num_shards=int(num_shards))
+            else:
+                yield url
+
+    @classmethod
+    async def main(cls) -> int:
+        parser = argparse.ArgumentParser(
+            description='Validate many DASH manifests, writing the results to a JSON-lines file')
+        parser.add_argument('--output', '-o', required=True,
+                            help='JSON-lines file to write results into')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip URLs that are already in the output file')
+        parser.add_argument('--input', '-i',
+                            help='File containing a list of manifest URLs ("-" for stdin)')
+        parser.add_argument('--combinations', action='store_true',
+                            help='Validate every combination of options of each manifest')
+        parser.add_argument('--simplified', action='store_true',
+                            help='Reduce the number of combinations of options')
+        parser.add_argument('--shard', default='0/1',
+                            help='Only validate shard "i/n" of the combinations of options')
+        parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                            help='Number of processes (0=validate in this process)')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of manifests each process validates at the same time')
+        parser.add_argument('--duration', type=int,
+                            help='Maximum duration (in seconds) to validate')
+        parser.add_argument('--http-client', dest='http_client',
+                            choices=['aiohttp', 'requests'], default='aiohttp',
+                            help='HTTP client library to use')
+        parser.add_argument('-v', '--verbose', action='count', default=0,
+                            help='increase verbosity')
+        parser.add_argument('manifests', nargs='*', help='URLs of manifests to validate')
+        args = parser.parse_args()
+        logging.basicConfig(
+            level=(logging.DEBUG if args.verbose else logging.INFO),
+            datefmt=r'%H:%M:%S',
+            format='%(asctime)-8s:%(levelname)s:%(filename)s@%(lineno)d: %(message)s')
+        options = BatchOptions(
+            processes=args.processes, concurrency=args.concurrency,
+            duration=args.duration, http_client=args.http_client,
+            verbose=args.verbose)
+        start: float = time.time()
+        bv = cls(cls.read_urls(args), args.output, options=options, resume=args.resume)
+        summary: BatchSummary = await bv.run()
+        print(f'{summary.passed} passed, {summary.failed} failed, {summary.skipped} skipped ' +
+              f'in {time.time() - start:#5.1f} seconds')
+        return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(BatchValidator.main()))
@@ -20,9 +20,11 @@ from dashlive.mpeg.dash.representation import Representation as DashRepresentati
 from dashlive.mpeg.dash.validator.http_client import HttpResponse
 
 from .dash_element import DashElement
+from .validation_cache import ValidationCache
 
 class InitSegment(DashElement):
     atoms: list[mp4.Mp4Atom] | None
+    content_id: str | None
     dash_rep: DashRepresentation | None
     name: str
     seg_range: str | None
@@ -31,6 +33,7 @@ class InitSegment(DashElement):
     def __init__(self, parent, url: str | None, seg_range: str | None) -> None:
         super().__init__(None, parent)
         self.atoms = None
+        self.content_id = None
         self.dash_rep = None
         self.seg_range = seg_range
         self.url = url
@@ -128,6 +131,14 @@ class InitSegment(DashElement):
             return False
         if self.progress.aborted():
             return False
+        if not self.options.save:
+            self.content_id = ValidationCache.content_id(response.headers, body)
+            cached: tuple | None = self.validator.cache.get(
+                ('init-parse', self.url, self.seg_range, self.content_id))
+            if cached is not None:
+                self.log.debug('%s: using cached init segment', self.name)
+                self.atoms, self.dash_rep = cached
+                return True
         try:
             async with self.pool.group(self.progress) as tg:
                 if self.options.save:
@@ -135,6 +146,10 @@ class InitSegment(DashElement):
                 task = tg.submit(self.parse_body, body)
             if not task.result():
                 return False
+            if self.content_id is not None:
+                self.validator.cache.put(
+                    ('init-parse', self.url, self.seg_range, self.content_id),
+                    (self.atoms, self.dash_rep))
         except Exception as exc:
             traceback.print_exception(exc)
             self.elt.add_error(f'Exception whilst loading init segment {self.url}: {exc}')
@@ -187,6 +202,30 @@ class InitSegment(DashElement):
             if not await self.load():
                 self.elt.add_error('Failed to load init segment')
                 return
+        cache_key: tuple | None = self.cache_key()
+        if cache_key is not None and self.validator.cache.get(cache_key):
+            self.log.debug('%s: using cached validation result', self.name)
+            return
+        self.validate_atoms()
+        if cache_key is not None and not self.elt.has_errors():
+            self.validator.cache.put(cache_key, True)
+
+    def cache_key(self) -> tuple | None:
+        """
+        Key used to find a previous validation of this init segment
+        against the same Representation values.
+        """
+        if self.content_id is None:
+            return None
+        rep = self.parent
+        adp = rep.parent
+        return (
+            'init', self.url, self.seg_range, self.content_id, adp.contentType,
+            rep.codecs, rep.width, rep.height, str(rep.frameRate), str(adp.frameRate),
+            rep.audioSamplingRate, adp.audioSamplingRate, rep.dash_timescale(),
+            self.options.encrypted, self.mpd.params.get('playready__version'))
+
+    def validate_atoms(self) -> None:
         if not self.elt.check_greater_than(
                 len(self.atoms), 1,
                 msg='Expected more than one MP4 atom in init segment'):
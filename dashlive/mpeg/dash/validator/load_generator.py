@@ -0,0 +1,473 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+import json
+import logging
+from logging import Logger
+import random
+import statistics
+import sys
+import time
+from typing import Optional, TYPE_CHECKING
+import urllib.parse
+
+from dashlive.utils.json_object import JsonObject
+
+from .concurrent_pool import ConcurrentWorkerPool
+from .http_client import HttpClient, HttpResponse
+from .media_segment import MediaSegment
+from .options import ValidatorOptions
+from .pool import WorkerPool
+from .progress import NullProgress
+from .representation import Representation
+from .requests_http_client import RequestsHttpClient
+from .validation_flag import ValidationFlag
+from .validator import DashValidator
+
+if TYPE_CHECKING:
+    import flask
+
+class AbrPolicy(Enum):
+    LOWEST = 'lowest'
+    HIGHEST = 'highest'
+    RANDOM = 'random'
+    THROUGHPUT = 'throughput'
+
+
+@dataclass(slots=True, kw_only=True)
+class LoadGeneratorOptions:
+    """
+    Options that can be passed to the load generator
+    """
+    players: int = 4
+    duration: float = 60.0  # seconds
+    speed: float = 1.0  # playback speed of on-demand streams
+    buffer_time: float = 10.0  # seconds of media to fetch ahead of playback
+    ramp_up: float = 0.0  # seconds over which the player start times are spread
+    abr: AbrPolicy = AbrPolicy.THROUGHPUT
+    seed: int | None = None
+    log: Logger | None = None
+    pool: Optional[WorkerPool] = None
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """
+    Statistics for one kind of HTTP request
+    """
+    count: int = 0
+    errors: int = 0
+    num_bytes: int = 0
+    latencies: list[float] = field(default_factory=list)  # seconds
+
+    def record(self, latency: float, num_bytes: int, ok: bool) -> None:
+        self.count += 1
+        self.num_bytes += num_bytes
+        self.latencies.append(latency)
+        if not ok:
+            self.errors += 1
+
+    @property
+    def error_rate(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.errors / self.count
+
+    def percentiles(self) -> tuple[float, float, float]:
+        """
+        Returns the p50, p95 and p99 latency (in seconds)
+        """
+        if not self.latencies:
+            return (0.0, 0.0, 0.0)
+        if len(self.latencies) == 1:
+            return (self.latencies[0], self.latencies[0], self.latencies[0])
+        pct = statistics.quantiles(self.latencies, n=100, method='inclusive')
+        return (pct[49], pct[94], pct[98])
+
+
+class LoadStats:
+    """
+    Statistics of all the requests made by all the simulated players
+    """
+    KINDS: tuple[str, ...] = ('manifest', 'init', 'media')
+
+    kinds: dict[str, RequestStats]
+    start_time: float
+    end_time: float | None
+
+    def __init__(self) -> None:
+        self.kinds = {kind: RequestStats() for kind in self.KINDS}
+        self.start_time = time.monotonic()
+        self.end_time = None
+
+    def record(self, kind: str, latency: float, num_bytes: int, ok: bool) -> None:
+        self.kinds[kind].record(latency, num_bytes, ok)
+
+    def finish(self) -> None:
+        self.end_time = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        end: float = time.monotonic() if self.end_time is None else self.end_time
+        return end - self.start_time
+
+    @property
+    def total(self) -> RequestStats:
+        rv = RequestStats()
+        for stats in self.kinds.values():
+            rv.count += stats.count
+            rv.errors += stats.errors
+            rv.num_bytes += stats.num_bytes
+            rv.latencies += stats.latencies
+        return rv
+
+    def to_dict(self) -> JsonObject:
+        elapsed: float = max(self.elapsed, 1e-6)
+        kinds: JsonObject = {}
+        for name, stats in [*self.kinds.items(), ('total', self.total)]:
+            p50, p95, p99 = stats.percentiles()
+            kinds[name] = {
+                'requests': stats.count,
+                'errors': stats.errors,
+                'errorRate': stats.error_rate,
+                'bytes': stats.num_bytes,
+                'requestsPerSecond': stats.count / elapsed,
+                'bitsPerSecond': 8 * stats.num_bytes / elapsed,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+            }
+        return {
+            'elapsed': elapsed,
+            'requests': kinds,
+        }
+
+    def format_report(self) -> list[str]:
+        summary: JsonObject = self.to_dict()
+        lines: list[str] = [
+            f'{"Kind":<10} {"Requests":>9} {"Errors":>7} {"Error %":>8} {"Req/s":>8} '
+            f'{"Mbit/s":>8} {"p50":>9} {"p95":>9} {"p99":>9}',
+        ]
+        for name, item in summary['requests'].items():
+            lines.append(
+                f'{name:<10} {item["requests"]:9d} {item["errors"]:7d} '
+                f'{100 * item["errorRate"]:8.2f} {item["requestsPerSecond"]:8.1f} '
+                f'{item["bitsPerSecond"] / 1e6:8.2f} {1000 * item["p50"]:7.1f}ms '
+                f'{1000 * item["p95"]:7.1f}ms {1000 * item["p99"]:7.1f}ms')
+        return lines
+
+
+class MeasuringHttpClient:
+    """
+    Implements HttpClient protocol by passing every request to another
+    HttpClient and recording its latency and size in a LoadStats.
+    """
+    client: HttpClient
+    kind: str
+    stats: LoadStats
+
+    def __init__(self, client: HttpClient, stats: LoadStats) -> None:
+        self.client = client
+        self.stats = stats
+        self.kind = 'manifest'
+
+    async def head(self, url: str, **kwargs) -> HttpResponse:
+        return await self.client.head(url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> HttpResponse:
+        return await self.fetch(self.kind, url, **kwargs)
+
+    async def fetch(self, kind: str, url: str, **kwargs) -> HttpResponse:
+        start: float = time.perf_counter()
+        try:
+            response = await self.client.get(url, **kwargs)
+        except Exception:
+            self.stats.record(kind, time.perf_counter() - start, 0, False)
+            raise
+        ok: bool = response.status_code in {200, 206}
+        num_bytes: int = 0
+        if ok:
+            num_bytes = len(response.get_data(as_text=False))
+        self.stats.record(kind, time.perf_counter() - start, num_bytes, ok)
+        return response
+
+
+class SimulatedPlayer:
+    """
+    A DASH player that fetches the segments of one Representation from each
+    AdaptationSet, keeping buffer_time seconds of media ahead of playback.
+    """
+    LIVE_EDGE_SEGMENTS: int = 3
+
+    abr_throughput: float | None  # bits per second
+    dv: DashValidator
+    http: MeasuringHttpClient
+    options: LoadGeneratorOptions
+    positions: dict[tuple[str | int, int], int]
+    rand: random.Random
+
+    def __init__(self, url: str, http_client: HttpClient, stats: LoadStats,
+                 options: LoadGeneratorOptions, rand: random.Random) -> None:
+        self.options = options
+        self.rand = rand
+        self.http = MeasuringHttpClient(http_client, stats)
+        self.log = options.log if options.log is not None else logging.getLogger('LoadGenerator')
+        vopts = ValidatorOptions(
+            log=self.log, pool=options.pool, progress=NullProgress(),
+            verify=ValidationFlag(0))
+        self.dv = DashValidator(url, self.http, options=vopts)
+        self.positions = {}
+        self.abr_throughput = None
+
+    async def run(self, deadline: float) -> None:
+        self.http.kind = 'manifest'
+        if not await self.dv.load():
+            self.log.warning('Failed to load manifest %s', self.dv.url)
+            return
+        self.http.kind = 'init'
+        if not await self.dv.prefetch_media_info():
+            self.log.warning('Failed to fetch init segments for %s', self.dv.url)
+            return
+        start: float = time.monotonic()
+        buffered: float = 0.0  # seconds of media fetched
+        next_refresh: float | None = self.next_refresh_time()
+        while time.monotonic() < deadline:
+            segments = self.next_segments()
+            if segments:
+                durations = await asyncio.gather(*[
+                    self.fetch_segment(rep, seg) for rep, seg in segments])
+                buffered += max(durations)
+            elif self.dv.mode != 'live':
+                if not self.positions:
+                    self.log.warning('No media segments found in %s', self.dv.url)
+                    break
+                # loop back to the start of an on-demand stream
+                self.positions = {}
+                continue
+            elif next_refresh is None:
+                break
+            now: float = time.monotonic()
+            if next_refresh is not None and (now >= next_refresh or not segments):
+                await asyncio.sleep(max(0.0, min(next_refresh, deadline) - now))
+                if time.monotonic() >= deadline:
+                    break
+                self.http.kind = 'manifest'
+                await self.dv.refresh()
+                next_refresh = self.next_refresh_time()
+                continue
+            if self.dv.mode == 'live':
+                continue
+            position: float = (now - start) * self.options.speed
+            delay: float = (buffered - position - self.options.buffer_time) / self.options.speed
+            if delay > 0:
+                await asyncio.sleep(min(delay, max(0.0, deadline - now)))
+
+    def next_refresh_time(self) -> float | None:
+        manifest = self.dv.manifest
+        if self.dv.mode != 'live' or manifest is None or manifest.minimumUpdatePeriod is None:
+            return None
+        return time.monotonic() + max(manifest.minimumUpdatePeriod.total_seconds(), 1.0)
+
+    def next_segments(self) -> list[tuple[Representation, MediaSegment]]:
+        """
+        Find the next segment to fetch from each AdaptationSet, using the
+        first Period that has not been completely fetched
+        """
+        assert self.dv.manifest is not None
+        for p_idx, period in enumerate(self.dv.manifest.periods):
+            todo: list[tuple[Representation, MediaSegment]] = []
+            p_key: str | int = period.id if period.id is not None else p_idx
+            for a_idx, adp in enumerate(period.adaptation_sets):
+                if not adp.representations:
+                    continue
+                rep: Representation = self.choose_representation(adp.representations)
+                if not rep.media_segments:
+                    continue
+                position: int | None = self.positions.get((p_key, a_idx))
+                if position is None and self.dv.mode == 'live':
+                    segs = rep.media_segments[-self.LIVE_EDGE_SEGMENTS:]
+                    position = self.segment_key(0, segs[0]) - 1
+                for idx, seg in enumerate(rep.media_segments):
+                    key: int = self.segment_key(idx, seg)
+                    if position is None or key > position:
+                        self.positions[(p_key, a_idx)] = key
+                        todo.append((rep, seg))
+                        break
+            if todo:
+                return todo
+        return []
+
+    @staticmethod
+    def segment_key(idx: int, seg: MediaSegment) -> int:
+        if seg.expected_seg_num is not None:
+            return seg.expected_seg_num
+        if seg.expected_decode_time is not None:
+            return seg.expected_decode_time
+        return idx
+
+    def choose_representation(self, representations: list[Representation]) -> Representation:
+        reps = sorted(representations, key=lambda r: r.bandwidth or 0)
+        if self.options.abr == AbrPolicy.LOWEST:
+            return reps[0]
+        if self.options.abr == AbrPolicy.HIGHEST:
+            return reps[-1]
+        if self.options.abr == AbrPolicy.RANDOM:
+            return self.rand.choice(reps)
+        if self.abr_throughput is None:
+            return reps[0]
+        chosen: Representation = reps[0]
+        for rep in reps:
+            if (rep.bandwidth or 0) <= 0.8 * self.abr_throughput:
+                chosen = rep
+        return chosen
+
+    async def fetch_segment(self, rep: Representation, seg: MediaSegment) -> float:
+        """
+        Fetch one media segment, returning its duration (in seconds)
+        """
+        headers: dict[str, str] | None = None
+        if seg.seg_range is not None:
+            headers = {"Range": f"bytes={seg.seg_range}"}
+        start: float = time.perf_counter()
+        try:
+            response = await self.http.fetch('media', seg.url, headers=headers)
+        except Exception as err:
+            self.log.warning('Failed to fetch %s: %s', seg.url, err)
+            return 0.0
+        latency: float = time.perf_counter() - start
+        if response.status_code in {200, 206} and latency > 0:
+            bps: float = 8 * len(response.get_data(as_text=False)) / latency
+            if self.abr_throughput is None:
+                self.abr_throughput = bps
+            else:
+                self.abr_throughput = 0.7 * self.abr_throughput + 0.3 * bps
+        if not seg.expected_duration:
+            # assume a typical segment duration
+            return 2.0
+        return seg.expected_duration / rep.dash_timescale()
+
+
+class LoadGenerator:
+    """
+    Runs multiple simulated DASH players against a server
+    """
+    url: str
+    http_client: HttpClient
+    options: LoadGeneratorOptions
+
+    def __init__(self, url: str, http_client: HttpClient,
+                 options: LoadGeneratorOptions | None = None) -> None:
+        self.url = url
+        self.http_client = http_client
+        self.options = options if options is not None else LoadGeneratorOptions()
+
+    async def run(self) -> LoadStats:
+        stats = LoadStats()
+        rand = random.Random(self.options.seed)
+        deadline: float = stats.start_time + self.options.duration
+        players: list[SimulatedPlayer] = [
+            SimulatedPlayer(self.url, self.http_client, stats, self.options,
+                            random.Random(rand.random()))
+            for _ in range(self.options.players)]
+
+        async def start_player(idx: int, player: SimulatedPlayer) -> None:
+            if self.options.ramp_up > 0:
+                await asyncio.sleep(idx * self.options.ramp_up / len(players))
+            await player.run(deadline)
+
+        await asyncio.gather(*[start_player(idx, p) for idx, p in enumerate(players)])
+        stats.finish()
+        return stats
+
+    @staticmethod
+    def in_process_http_client(url: str,
+                               fallback: HttpClient,
+                               options: LoadGeneratorOptions,
+                               app: Optional["flask.Flask"] = None,
+                               instance_path: str | None = None) -> HttpClient:
+        """
+        Creates an HttpClient that sends requests for the origin of the given
+        URL directly to a Flask app, rather than to a server. This allows the
+        request handling code to be measured (and profiled) without any
+        network overhead. If app is None, a new app is created.
+        """
+        # the server is only imported when needed, so that the validator
+        # does not depend upon the server's packages
+        from dashlive.server.wsgi_http_client import WsgiHttpClient
+
+        if app is None:
+            from dashlive.server.app import create_app
+            app = create_app(instance_path=instance_path, create_default_user=False, wss=False)
+        parts = urllib.parse.urlsplit(url)
+        return WsgiHttpClient(
+            app, origins=[f'{parts.scheme}://{parts.netloc}'], fallback=fallback,
+            pool=options.pool, log=options.log)
+
+    @classmethod
+    async def main(cls) -> int:
+        parser = argparse.ArgumentParser(
+            description='Simulate multiple DASH players to measure server throughput')
+        parser.add_argument('--players', type=int, default=4,
+                            help='Number of concurrent players')
+        parser.add_argument('--duration', type=float, default=60,
+                            help='Duration of the test (in seconds)')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Playback speed multiplier for on-demand streams')
+        parser.add_argument('--buffer', type=float, default=10.0, dest='buffer_time',
+                            help='Seconds of media each player fetches ahead of playback')
+        parser.add_argument('--ramp-up', type=float, default=0.0, dest='ramp_up',
+                            help='Seconds over which to spread the start of each player')
+        parser.add_argument('--abr', choices=[p.value for p in AbrPolicy],
+                            default=AbrPolicy.THROUGHPUT.value,
+                            help='Representation selection policy')
+        parser.add_argument('--seed', type=int, help='Random number seed')
+        parser.add_argument('--threads', type=int, default=0,
+                            help='Maximum number of HTTP threads (0=auto)')
+        parser.add_argument('--max-error-rate', type=float, default=0.0, dest='max_error_rate',
+                            help='Fraction of requests that may fail before returning an error')
+        parser.add_argument('--output', help='Write statistics to this JSON file')
+        parser.add_argument('--in-process', action='store_true', dest='in_process',
+                            help='Serve the requests using a Flask app created in this process')
+        parser.add_argument('--instance', help='Instance folder of the in-process Flask app')
+        parser.add_argument('-v', '--verbose', action='store_true', help='increase verbosity')
+        parser.add_argument('manifest', help='URL of manifest to play')
+        args = parser.parse_args()
+        logging.basicConfig(
+            level=(logging.DEBUG if args.verbose else logging.WARNING),
+            datefmt=r'%H:%M:%S',
+            format='%(asctime)-8s:%(levelname)s:%(filename)s@%(lineno)d: %(message)s')
+        max_workers: int = args.threads if args.threads > 0 else 2 * args.players
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            options = LoadGeneratorOptions(
+                players=args.players, duration=args.duration, speed=args.speed,
+                buffer_time=args.buffer_time, ramp_up=args.ramp_up,
+                abr=AbrPolicy(args.abr), seed=args.seed,
+                log=logging.getLogger('LoadGenerator'),
+                pool=ConcurrentWorkerPool(pool))
+            http_client: HttpClient = RequestsHttpClient(
+                ValidatorOptions(log=options.log, pool=options.pool))
+            if args.in_process:
+                http_client = cls.in_process_http_client(
+                    args.manifest, http_client, options, instance_path=args.instance)
+            stats: LoadStats = await cls(args.manifest, http_client, options).run()
+        for line in stats.format_report():
+            print(line)
+        if args.output:
+            with open(args.output, 'wt') as dest:
+                json.dump(stats.to_dict(), dest, indent=2)
+        if stats.total.error_rate > args.max_error_rate:
+            return 1
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(LoadGenerator.main()))
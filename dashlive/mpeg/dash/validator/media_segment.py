@@ -8,17 +8,27 @@
 import datetime
 import io
 from pathlib import Path
-from typing import Optional, cast
+from typing import BinaryIO, NamedTuple, Optional, cast
 import urllib.parse
 
 from dashlive.mpeg import mp4
 from dashlive.utils.date_time import timecode_to_timedelta, to_iso_datetime
+from dashlive.utils.io_with_offset import BytesIoWithOffset
 from dashlive.mpeg.dash.representation import Representation as DashRepresentation
 
 from .dash_element import DashElement
 from .events import InbandEventStream
+from .http_client import HttpResponse
 from .http_range import HttpRange
 from .init_segment import InitSegment
+from .segment_reader import BoxPosition, StreamingResponse, StreamingSegmentReader
+from .validation_cache import ValidationCache
+
+class SegmentResult(NamedTuple):
+    seg_num: int | None
+    decode_time: int | None
+    duration: int | None
+    next_decode_time: int | None
 
 class MediaSegment(DashElement):
     availability_start_time: datetime.datetime | None = None
@@ -123,34 +133,39 @@ class MediaSegment(DashElement):
         if self.seg_range is not None:
             headers = {"Range": f"bytes={self.seg_range}"}
         # self.log.debug('MediaSegment: url=%s headers=%s', self.url, headers)
-        response = await self.http.get(self.url, headers=headers)
-        # self.log.debug('Status: %d  Length: %s', response.status_code,
-        #               response.headers['Content-Length'])
-        if self.progress.aborted():
-            return
-        if self.seg_range is None:
-            if not self.elt.check_equal(
-                    response.status_code, 200,
-                    msg=f'Missing segment {self.url}: {response.status_code}'):
-                return
+        stream: bool = self.options.stream_segments and self.parent.uses_mp4_format()
+        if stream:
+            response = await self.http.get(self.url, headers=headers, stream=True)
         else:
-            if not self.elt.check_equal(
-                    response.status_code, 206,
-                    msg=f'Incorrect HTTP status code for RANGE GET {self.url}: {response.status_code}'):
+            response = await self.http.get(self.url, headers=headers)
+        # only responses that can be read incrementally are parsed as they arrive
+        streaming: bool = stream and hasattr(response, 'read_chunk')
+        cache_key: tuple | None = None
+        try:
+            if not self.check_response(response):
                 return
-        if self.parent.mimeType is not None:
-            self.elt.check_starts_with(
-                response.headers['Content-Type'], self.parent.mimeType,
-                template=r'HTTP Content-Type "{0}" should match Representation MIME type "{1}"')
-        body: bytes = response.get_data(as_text=False)
-        async with self.pool.group(self.progress) as tg:
-            if self.options.save:
-                tg.submit(self.save, body)
-            if self.parent.uses_mp4_format():
-                parse_task = tg.submit(self.parse_data, body)
-        if not self.parent.uses_mp4_format():
-            return
-        moof = parse_task.result()
+            moof: mp4.Mp4Atom | None
+            if streaming:
+                cache_key = self.cache_key(response, None)
+                if self.load_from_cache(cache_key):
+                    return
+                moof = await self.stream_data(response)
+            else:
+                body: bytes = response.get_data(as_text=False)
+                cache_key = self.cache_key(response, body)
+                if self.load_from_cache(cache_key):
+                    return
+                async with self.pool.group(self.progress) as tg:
+                    if self.options.save:
+                        tg.submit(self.save, body)
+                    if self.parent.uses_mp4_format():
+                        parse_task = tg.submit(self.parse_data, body)
+                if not self.parent.uses_mp4_format():
+                    return
+                moof = parse_task.result()
+        finally:
+            if streaming:
+                response.release()
         if not self.elt.check_not_none(
                 moof, msg='Failed to find MOOF box'):
             return
@@ -238,21 +253,77 @@ class MediaSegment(DashElement):
                 msg=f'Expected duration {self.expected_duration} but duration is {self.duration}')
         self.log.debug('Segment %d duration %d. Next expected DTS %d',
                        self.seg_num, self.duration, dts)
+        if cache_key is not None and not self.elt.has_errors():
+            self.validator.cache.put(cache_key, SegmentResult(
+                seg_num=self.seg_num, decode_time=self.decode_time,
+                duration=self.duration, next_decode_time=self.next_decode_time))
 
-    def save(self, body: bytes) -> None:
+    def cache_key(self, response: HttpResponse, body: bytes | None) -> tuple | None:
+        """
+        Key used to find a previous validation of this segment. Segments
+        are not cached when saving, as every segment needs to be written.
+        """
+        if self.options.save:
+            return None
+        content_id: str | None = ValidationCache.content_id(response.headers, body)
+        if content_id is None:
+            return None
+        return (
+            'media', self.url, str(self.seg_range), content_id,
+            self.expected_seg_num, self.expected_decode_time,
+            self.expected_duration, self.presentation_time_offset,
+            self.tolerance, self.parent.dash_timescale(), self.options.encrypted)
+
+    def load_from_cache(self, cache_key: tuple | None) -> bool:
+        if cache_key is None:
+            return False
+        result: SegmentResult | None = self.validator.cache.get(cache_key)
+        if result is None:
+            return False
+        self.log.debug('%s: using cached validation result', self.name)
+        self.seg_num = result.seg_num
+        self.decode_time = result.decode_time
+        self.duration = result.duration
+        self.next_decode_time = result.next_decode_time
+        return True
+
+    def check_response(self, response: HttpResponse) -> bool:
+        # self.log.debug('Status: %d  Length: %s', response.status_code,
+        #               response.headers['Content-Length'])
+        if self.progress.aborted():
+            return False
+        if self.seg_range is None:
+            if not self.elt.check_equal(
+                    response.status_code, 200,
+                    msg=f'Missing segment {self.url}: {response.status_code}'):
+                return False
+        else:
+            if not self.elt.check_equal(
+                    response.status_code, 206,
+                    msg=f'Incorrect HTTP status code for RANGE GET {self.url}: {response.status_code}'):
+                return False
+        if self.parent.mimeType is not None:
+            self.elt.check_starts_with(
+                response.headers['Content-Type'], self.parent.mimeType,
+                template=r'HTTP Content-Type "{0}" should match Representation MIME type "{1}"')
+        return True
+
+    def save_filename(self) -> str:
         if self.parent.id:
             default = f'media-{self.parent.id}-{self.seg_num}'
         else:
             default = f'media-{self.parent.bandwidth}-{self.seg_num}'
-        filename = self.output_filename(
+        return self.output_filename(
             default=default, bandwidth=self.parent.bandwidth,
             prefix=self.options.prefix, elt_id=self.parent.id)
+
+    def save(self, body: bytes) -> None:
+        filename = self.save_filename()
         self.log.debug('saving media segment: %s', filename)
         with self.open_file(filename, self.options) as dest:
             dest.write(body)
 
-    def parse_data(self, body: bytes) -> mp4.Mp4Atom | None:
-        src = io.BytesIO(body)
+    def parser_options(self) -> mp4.Options | None:
         options: mp4.Options = {"strict": True, "lazy_load": True, "mode": "r"}
         info: DashRepresentation | None = cast(InitSegment, self.parent.init_segment).dash_representation
         if not self.elt.check_not_none(info, msg='Failed to get representation info from init segment'):
@@ -271,6 +342,13 @@ class MediaSegment(DashElement):
                     info.iv_size, msg='IV size is unknown'):
                 return None
             options["iv_size"] = info.iv_size
+        return options
+
+    def parse_data(self, body: bytes) -> mp4.Mp4Atom | None:
+        src = io.BytesIO(body)
+        options: mp4.Options | None = self.parser_options()
+        if options is None:
+            return None
         atoms: mp4.Wrapper = mp4.IsoParser.load_wrapped(src, options=options)
         moof: mp4.MovieFragmentBox
         mdat: mp4.Mp4Atom
@@ -288,6 +366,57 @@ class MediaSegment(DashElement):
             self.check_emsg_box(atoms['emsg'])
         except KeyError:
             pass
+        self.check_trun_offset(moof, mdat)
+        return moof
+
+    async def stream_data(self, response: StreamingResponse) -> mp4.Mp4Atom | None:
+        """
+        Parses a media segment as it is received, without holding the
+        entire body in memory. The payload of the mdat box is skipped,
+        and the response is only written to disk if the save option is set.
+        """
+        options: mp4.Options | None = self.parser_options()
+        if options is None:
+            return None
+        dest: BinaryIO | None = None
+        if self.options.save:
+            filename = self.save_filename()
+            self.log.debug('saving media segment: %s', filename)
+            dest = self.open_file(filename, self.options)
+        moof: mp4.MovieFragmentBox | None = None
+        mdat: BoxPosition | None = None
+        try:
+            reader = StreamingSegmentReader(response, dest)
+            async for box, data in reader.boxes():
+                if data is None:
+                    if box.atom_type == 'mdat' and mdat is None:
+                        mdat = box
+                    continue
+                if box.atom_type not in {'moof', 'emsg'}:
+                    continue
+                src = BytesIoWithOffset(data, box.position)
+                atom = mp4.IsoParser.load(src, options=options)[0]
+                if atom.atom_type == 'emsg':
+                    self.check_emsg_box(atom)
+                elif moof is None:
+                    moof = cast(mp4.MovieFragmentBox, atom)
+        finally:
+            if dest is not None:
+                dest.close()
+        if reader.truncated:
+            self.elt.add_error(
+                f'Media segment truncated after {reader.position} bytes')
+            return None
+        if moof is None:
+            self.elt.add_error('MOOF box missing from media segment')
+            return None
+        if mdat is None:
+            self.elt.add_error('MDAT box missing from media segment')
+            return None
+        self.check_trun_offset(moof, mdat)
+        return moof
+
+    def check_trun_offset(self, moof: mp4.Mp4Atom, mdat: mp4.Mp4Atom | BoxPosition) -> None:
         first_sample_pos = moof['traf.tfhd'].base_data_offset + moof['traf.trun'].data_offset
         last_sample_end = first_sample_pos
         for samp in moof['traf.trun'].samples:
@@ -305,7 +434,6 @@ class MediaSegment(DashElement):
             first_sample_pos, mdat.position + mdat.header_size, msg=msg)
         self.elt.check_less_than_or_equal(
             last_sample_end, mdat.position + mdat.size, msg=msg)
-        return moof
 
     def check_emsg_box(self, emsg):
         found = False
@@ -22,6 +22,7 @@ class ValidatorOptions:
     """
     encrypted: bool = False
     save: bool = False
+    stream_segments: bool = False
     ivsize: int | None = None
     dest: str | None = None
     duration: int | None = None
@@ -36,3 +37,4 @@ class ValidatorOptions:
     pool: Optional[WorkerPool] = None
     retry_count: int = 2
     retry_delay_ms: int = 250
+    cache_size: int = 1024
@@ -0,0 +1,149 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections.abc import AsyncIterator
+import struct
+from typing import BinaryIO, NamedTuple, Protocol
+
+class StreamingResponse(Protocol):
+    async def read_chunk(self, length: int) -> bytes:
+        ...
+
+    def release(self) -> None:
+        ...
+
+
+class BoxPosition(NamedTuple):
+    atom_type: str
+    position: int
+    size: int
+    header_size: int
+
+
+class StreamingSegmentReader:
+    """
+    Reads the top level boxes of an MP4 segment from a streamed HTTP
+    response. The contents of boxes listed in "skip" (e.g. mdat) are
+    discarded as they arrive, so that only the small boxes that are
+    needed for validation are held in memory. If "dest" is provided,
+    every chunk of the response is also written to that file.
+    """
+
+    CHUNK_SIZE: int = 65536
+
+    buffer: bytearray
+    dest: BinaryIO | None
+    position: int
+    response: StreamingResponse
+    skip: set[str]
+    truncated: bool
+
+    def __init__(self,
+                 response: StreamingResponse,
+                 dest: BinaryIO | None = None,
+                 skip: set[str] | None = None) -> None:
+        self.response = response
+        self.dest = dest
+        self.skip = skip if skip is not None else {'mdat'}
+        self.buffer = bytearray()
+        self.position = 0
+        self.truncated = False
+
+    async def boxes(self) -> AsyncIterator[tuple[BoxPosition, bytes | None]]:
+        """
+        Yields (box, data) for each top level box. data is the complete
+        box, including its header, or None for skipped boxes.
+        """
+        while await self.fill(8):
+            size, fourcc = struct.unpack('>I4s', self.buffer[:8])
+            atom_type: str = fourcc.decode('ascii', errors='replace')
+            header_size: int = 8
+            if size == 1:
+                if not await self.fill(16):
+                    self.truncated = True
+                    return
+                size = struct.unpack('>Q', self.buffer[8:16])[0]
+                header_size = 16
+            if size == 0:
+                # box extends to the end of the response
+                size = await self.read_to_end(atom_type in self.skip)
+                yield self.box_at(atom_type, size, header_size)
+                return
+            if size < header_size:
+                self.truncated = True
+                return
+            if atom_type in self.skip:
+                box = BoxPosition(atom_type, self.position, size, header_size)
+                if not await self.discard(size):
+                    self.truncated = True
+                    return
+                yield (box, None)
+                continue
+            if not await self.fill(size):
+                self.truncated = True
+                return
+            box = BoxPosition(atom_type, self.position, size, header_size)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            self.position += size
+            yield (box, data)
+
+    async def read_chunk(self) -> bytes:
+        chunk: bytes = await self.response.read_chunk(self.CHUNK_SIZE)
+        if chunk and self.dest is not None:
+            self.dest.write(chunk)
+        return chunk
+
+    async def fill(self, size: int) -> bool:
+        """
+        Makes sure that at least "size" bytes are in the buffer
+        """
+        while len(self.buffer) < size:
+            chunk = await self.read_chunk()
+            if not chunk:
+                return False
+            self.buffer += chunk
+        return True
+
+    async def discard(self, size: int) -> bool:
+        """
+        Consumes "size" bytes of the response without keeping them
+        """
+        while size > 0:
+            if not self.buffer:
+                chunk = await self.read_chunk()
+                if not chunk:
+                    return False
+                self.buffer += chunk
+            count = min(size, len(self.buffer))
+            del self.buffer[:count]
+            self.position += count
+            size -= count
+        return True
+
+    async def read_to_end(self, discard: bool) -> int:
+        start = self.position
+        while True:
+            if discard:
+                self.position += len(self.buffer)
+                self.buffer.clear()
+            chunk = await self.read_chunk()
+            if not chunk:
+                break
+            self.buffer += chunk
+        return self.position + len(self.buffer) - start
+
+    def box_at(self, atom_type: str, size: int,
+               header_size: int) -> tuple[BoxPosition, bytes | None]:
+        box = BoxPosition(atom_type, self.position + len(self.buffer) - size,
+                          size, header_size)
+        data: bytes | None = None
+        if self.buffer:
+            data = bytes(self.buffer)
+            self.buffer.clear()
+        self.position = box.position + size
+        return (box, data)
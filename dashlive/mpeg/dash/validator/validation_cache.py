@@ -0,0 +1,77 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+import hashlib
+from typing import Any
+
+class ValidationCache:
+    """
+    LRU cache of the results of validating init and media segments.
+    Entries are keyed by the segment URL, an identifier of its contents
+    (the ETag or a hash of the body) and the values that the segment was
+    checked against, so that a segment that appears again after a live
+    manifest refresh does not need to be parsed and checked again.
+    """
+
+    entries: OrderedDict[Hashable, Any]
+    max_entries: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def content_id(headers: Mapping[str, str], body: bytes | None) -> str | None:
+        """
+        Returns an identifier for the contents of an HTTP response.
+        """
+        etag: str | None = headers.get('Etag')
+        if etag:
+            return etag
+        if body is None:
+            return None
+        return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def get(self, key: Hashable) -> Any | None:
+        if not self.enabled:
+            return None
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return (f'{self.hits} checks skipped using cached results, ' +
+                f'{self.misses} cache misses, {len(self.entries)} entries')
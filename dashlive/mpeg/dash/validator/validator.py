@@ -21,8 +21,10 @@ from .errors import ValidationError, ValidationHistory
 from .http_client import HttpClient, HttpResponse
 from .manifest import Manifest
 from .options import ValidatorOptions
+from .validation_cache import ValidationCache
 
 class DashValidator(DashElement):
+    cache: ValidationCache
     http_client: HttpClient
     history: list[ValidationHistory]
     manifest: Manifest | None
@@ -52,6 +54,7 @@ class DashValidator(DashElement):
         assert self.options.pool is not None
         self.pool = self.options.pool
         self.history = []
+        self.cache = ValidationCache(self.options.cache_size)
 
     async def load(self,
                    xml: ET.ElementBase | None = None,
@@ -105,8 +105,8 @@ class CencSampleEncryptionBox(FullBox):
     }
 
     def encode_fields(self, dest):
-        if len(self.samples) > 0:
-            self.flags |= 0x02
+        if any(samp.subsamples for samp in self.samples):
+            self.flags |= CencSampleAuxiliaryData.UseSubsampleEncryption
         super().encode_fields(dest)
 
     def encode_box_fields(self, dest):
@@ -150,7 +150,7 @@ class CencSampleEncryptionBoxFactory(FullBoxFactory[CencSampleEncryptionBox]):
             except AttributeError:
                 rv["iv_size"] = options.iv_size if options is not None else None
         num_entries = r.get('I', 'num_entries')
-        assert rv['iv_size'] in {8, 16}
+        assert rv['iv_size'] in {0, 8, 16}
         rv["samples"] = []
         saiz = parent.find_child('saiz')
         if saiz is None:
@@ -18,15 +18,26 @@ from .full import FullBox, FullBoxFactory
 class TrackEncryptionBox(FullBox):
     ATOM_FOURCC = 'tenc'
     OBJECT_FIELDS = {
+        "constant_iv": HexBinary,
         "default_kid": HexBinary,
     }
     OBJECT_FIELDS.update(FullBox.OBJECT_FIELDS)
 
     def encode_box_fields(self, dest):
         w = FieldWriter(self, dest)
-        w.write('3I', "is_encrypted")
+        if self.version == 0:
+            w.write('3I', "is_encrypted")
+        else:
+            w.write('B', "reserved", value=0)
+            w.write('B', "pattern",
+                    value=(self.crypt_byte_block << 4) + self.skip_byte_block)
+            w.write('B', "is_encrypted")
         w.write('B', "iv_size")
         w.write(16, "default_kid")
+        if self.is_encrypted and self.iv_size == 0:
+            # constant IV, used by the cbcs scheme
+            w.write('B', "constant_iv_size", value=len(self.constant_iv))
+            w.write(None, "constant_iv")
 
 
 class TrackEncryptionBoxFactory(FullBoxFactory[TrackEncryptionBox]):
@@ -38,7 +49,17 @@ class TrackEncryptionBoxFactory(FullBoxFactory[TrackEncryptionBox]):
         if rv is None:
             return None
         r = FieldReader(self.classname(), src, rv)
-        r.read('3I', "is_encrypted")
+        if rv["version"] == 0:
+            r.read('3I', "is_encrypted")
+        else:
+            r.skip('B')
+            pattern: int = r.get('B', "pattern")
+            rv["crypt_byte_block"] = pattern >> 4
+            rv["skip_byte_block"] = pattern & 0x0F
+            r.read('B', "is_encrypted")
         r.read('B', "iv_size")
         r.read(16, "default_kid")
+        if rv["is_encrypted"] and rv["iv_size"] == 0:
+            constant_iv_size: int = r.get('B', "constant_iv_size")
+            r.read(constant_iv_size, "constant_iv")
         return rv
@@ -48,6 +48,24 @@ class Wrapper(Mp4Atom):
         self.size = dest.tell() - here
         return dest
 
+    def encode_with_prefix(self, dest: BinaryIO, atom_type: str, data: bytes) -> BinaryIO:
+        """
+        Encode all children, writing the pre-encoded "data" immediately
+        before the first child of type "atom_type"
+        """
+        here: int = dest.tell()
+        inserted: bool = False
+        for child in self.get_children():
+            if not inserted and child.atom_type == atom_type:
+                dest.write(data)
+                inserted = True
+            child.encode(dest=dest, depth=1)
+        if not inserted:
+            raise KeyError(atom_type)
+        self.post_encode_all(dest=dest)
+        self.size = dest.tell() - here
+        return dest
+
     def encode_fields(self, dest: BinaryIO) -> None:
         pass
 
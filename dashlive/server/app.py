@@ -23,10 +23,14 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_jwt_extended import JWTManager
 from netifaces import interfaces, ifaddresses, AF_INET
 
+from dashlive.drm.playready import derive_content_key
+from dashlive.drm.sample_encryptor import encrypted_fragment_cache
+from dashlive.server.events.repeating_event_base import emsg_schedule, manifest_event_payload
 from dashlive.server.models.all import create_all_tables
-from dashlive.server.models.connection import make_db_connection_string
+from dashlive.server.models.connection import SqliteTuning, make_db_connection_string
 from dashlive.server.models.content_type import ContentType
 from dashlive.server.models.db import db
+from dashlive.server.models.key import key_jwk_cache
 from dashlive.server.models.token import Token, DecodedJwtToken
 from dashlive.server.models.user import User
 from dashlive.server.requesthandler.websocket import WebsocketHandler
@@ -35,8 +39,13 @@ from dashlive.utils.json_object import JsonObject
 from .anonymous_user import AnonymousUser
 from .asyncio_loop import AsyncioLoop
 from .folders import AppFolders
+from .metrics import server_metrics
+from .profiler import request_profiler
+from .query_stats import init_query_stats
 from .routes import Route, routes, ui_routes
+from .server_timing import init_server_timing
 from .template_tags import custom_tags
+from .validator_worker import ValidatorWorker, worker_config
 # from .thread_pool import pool_executor
 
 login_manager = LoginManager()
@@ -158,7 +167,30 @@ def create_app(config: JsonObject | None = None,
         log = logging.getLogger(module)
         mod_log_level: str = app.config.get(f'{module.upper()}_LOG_LEVEL', log_level)
         log.setLevel(mod_log_level.upper())
+    sqlite_tuning: SqliteTuning | None = None
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        sqlite_tuning = SqliteTuning.from_settings({**environ, **app.config})
+    if sqlite_tuning is not None:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **sqlite_tuning.engine_options(),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        }
     db.init_app(app)
+    if sqlite_tuning is not None:
+        with app.app_context():
+            sqlite_tuning.install(db.engine)
+            db.engine.dispose()
+    init_query_stats(app)
+    server_metrics.init_app(app)
+    server_metrics.register_cache('emsg_schedule', emsg_schedule.cache_info)
+    server_metrics.register_cache('manifest_event_payload', manifest_event_payload.cache_info)
+    server_metrics.register_cache('encrypted_fragments', encrypted_fragment_cache.cache_info)
+    server_metrics.register_cache('playready_content_keys', derive_content_key.cache_info)
+    # the database might have been replaced since the previous app was created
+    key_jwk_cache.clear()
+    server_metrics.register_cache('clearkey_jwks', key_jwk_cache.cache_info)
+    init_server_timing(app)
+    request_profiler.init_app(app)
     jwt = JWTManager(app)
     login_manager.anonymous_user = AnonymousUser
     login_manager.init_app(app)
@@ -236,7 +268,14 @@ def create_app(config: JsonObject | None = None,
         socketio = SocketIO(
             app, async_mode='threading', cors_allowed_origins=cors_allowed_origins,
             logger=wss_log, engineio_logger=wss_log)
-        wss_handler: WebsocketHandler = WebsocketHandler(asyncio_loop, socketio)
+        validator_worker: ValidatorWorker | None = None
+        if app.config.get('VALIDATOR_PROCESS', True):
+            validator_worker = ValidatorWorker(
+                socketio, worker_config(app), folders,
+                max_jobs=int(app.config.get('VALIDATOR_MAX_JOBS', 2)),
+                queue_size=int(app.config.get('VALIDATOR_QUEUE_SIZE', 8)))
+        wss_handler: WebsocketHandler = WebsocketHandler(
+            asyncio_loop, socketio, worker=validator_worker)
         socketio.on_event('connect', wss_handler.connect)
         socketio.on_event('disconnect', wss_handler.disconnect)
         socketio.on_event('cmd', wss_handler.event_handler)
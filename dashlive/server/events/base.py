@@ -8,6 +8,7 @@
 
 from abc import abstractmethod
 import datetime
+import io
 
 from dashlive.mpeg.mp4 import EventMessageBox
 from dashlive.server.options.dash_option import (
@@ -43,13 +44,30 @@ class EventBase(ObjectWithFields):
     version: int
 
     @abstractmethod
-    def create_manifest_context(self, context: dict) -> dict:
+    def create_manifest_context(
+            self,
+            context: dict,
+            window: tuple[datetime.timedelta, datetime.timedelta] | None = None) -> dict:
+        """
+        Creates the EventStream for this event generator. If window is
+        provided, only events that overlap the window (relative to the start
+        of the Period) are included.
+        """
         ...
 
     @abstractmethod
     def create_emsg_boxes(self, **kwargs) -> list[EventMessageBox]:
         ...
 
+    def encode_emsg_boxes(self, **kwargs) -> bytes:
+        """
+        Returns the emsg boxes for a fragment as encoded bytes
+        """
+        dest = io.BytesIO()
+        for emsg in self.create_emsg_boxes(**kwargs):
+            emsg.encode(dest)
+        return dest.getvalue()
+
     @classmethod
     def get_dash_options(cls) -> list[DashOption]:
         """
@@ -21,41 +21,81 @@
 #############################################################################
 
 from abc import abstractmethod
-from typing import TYPE_CHECKING
+import datetime
+from functools import lru_cache
+import io
+from typing import TYPE_CHECKING, Any
 
 from dashlive.mpeg.dash.event_stream import EventStream
 from dashlive.mpeg.mp4 import EventMessageBox, MovieFragmentBox
+from dashlive.utils.date_time import timedelta_to_timecode
 
 from .base import EventBase
 
 if TYPE_CHECKING:
     from dashlive.mpeg.dash.representation import Representation
 
+# maximum number of (event settings, segment time range) entries to
+# keep in the emsg schedule cache
+EMSG_SCHEDULE_CACHE_SIZE: int = 1024
+
+# maximum number of (event settings, event ID) entries to keep in the
+# manifest event payload cache
+MANIFEST_PAYLOAD_CACHE_SIZE: int = 1024
+
 class RepeatingEventBase(EventBase):
     """
     A base class for events that repeat at a fixed interval
     """
 
-    def create_manifest_context(self, context: dict) -> dict:
+    def create_manifest_context(
+            self,
+            context: dict,
+            window: tuple[datetime.timedelta, datetime.timedelta] | None = None) -> dict:
         stream = EventStream(
             schemeIdUri=self.schemeIdUri,
             value=self.value,
             timescale=self.timescale,
             inband=self.inband)
 
-        if not self.inband and self.count > 0:
-            presentation_time = self.start
-            for idx in range(self.count):
-                data = self.get_manifest_event_payload(idx, presentation_time)
-                stream.events.append({
-                    'data': data,
-                    'duration': self.duration,
-                    'id': idx,
-                    'presentationTime': presentation_time
-                })
-                presentation_time += self.interval
+        if self.inband:
+            return stream
+        settings = self.cache_key()
+        for idx in self.manifest_event_ids(window):
+            presentation_time = self.start + idx * self.interval
+            data = manifest_event_payload(
+                type(self), settings, idx, presentation_time)
+            stream.events.append({
+                'data': data,
+                'duration': self.duration,
+                'id': idx,
+                'presentationTime': presentation_time
+            })
         return stream
 
+    def manifest_event_ids(
+            self,
+            window: tuple[datetime.timedelta, datetime.timedelta] | None) -> range:
+        """
+        Returns the range of event IDs that overlap the given window. The window
+        start and end are relative to the start of the Period.
+        """
+        if window is None:
+            return range(max(self.count, 0))
+        win_start: int = timedelta_to_timecode(window[0], self.timescale)
+        win_end: int = timedelta_to_timecode(window[1], self.timescale)
+        if self.interval < 1:
+            if self.start < win_end and (self.start + self.duration) > win_start:
+                return range(1)
+            return range(0)
+        # first event that ends after the start of the window
+        first: int = max(0, 1 + (win_start - self.start - self.duration) // self.interval)
+        # first event that starts at or after the end of the window
+        last: int = -((self.start - win_end) // self.interval)
+        if self.count > 0:
+            last = min(last, self.count)
+        return range(first, max(first, last))
+
     @abstractmethod
     def get_manifest_event_payload(self, index, presentation_time) -> str:
         return ""
@@ -68,14 +108,52 @@ class RepeatingEventBase(EventBase):
                           **kwargs) -> list[EventMessageBox]:
         if not self.inband:
             return []
+        seg_start, seg_end = self.segment_event_range(moof, mod_segment, representation)
+        return self.emsg_boxes_for_range(seg_start, seg_end)
+
+    def encode_emsg_boxes(self,
+                          segment_num: int,
+                          mod_segment: int,
+                          moof: MovieFragmentBox,
+                          representation: "Representation",
+                          **kwargs) -> bytes:
+        """
+        Returns the encoded emsg boxes for the given fragment. The result
+        is taken from the emsg schedule cache, as the events are a pure
+        function of the event options and the fragment's time range.
+        """
+        if not self.inband:
+            return b''
+        seg_start, seg_end = self.segment_event_range(moof, mod_segment, representation)
+        return emsg_schedule(type(self), self.cache_key(), seg_start, seg_end)
+
+    def cache_key(self) -> tuple[tuple[str, Any], ...]:
+        """
+        Returns a hashable key that identifies the settings of this event generator
+        """
+        return tuple((name, getattr(self, name)) for name in sorted(self.DEFAULT_VALUES.keys()))
+
+    def segment_event_range(self,
+                            moof: MovieFragmentBox,
+                            mod_segment: int,
+                            representation: "Representation") -> tuple[int, int]:
+        """
+        Calculates the start and end time of the fragment, using the event timebase
+        """
         # start and end time of the fragment (representation timebase)
         seg_start: int = moof['traf.tfdt'].base_media_decode_time
         seg_end: int = seg_start + representation.segments[mod_segment].duration
 
         # convert seg_start and seg_end to event timebase
-        seg_start: int = (seg_start * self.timescale) // representation.timescale
-        seg_end: int = (seg_end * self.timescale) // representation.timescale
-
+        seg_start = (seg_start * self.timescale) // representation.timescale
+        seg_end = (seg_end * self.timescale) // representation.timescale
+        return (seg_start, seg_end,)
+
+    def emsg_boxes_for_range(self, seg_start: int, seg_end: int) -> list[EventMessageBox]:
+        """
+        Creates the emsg boxes for all events that start within the range
+        seg_start to seg_end (using the event timebase)
+        """
         # print('seg start={} end={} duration={}'.format(
         #    seg_start, seg_end, seg_end - seg_start))
 
@@ -131,3 +209,31 @@ class RepeatingEventBase(EventBase):
     @abstractmethod
     def get_emsg_event_payload(self, event_id: int, presentation_time: int) -> bytes:
         ...
+
+
+@lru_cache(maxsize=EMSG_SCHEDULE_CACHE_SIZE)
+def emsg_schedule(clazz: type[RepeatingEventBase],
+                  settings: tuple[tuple[str, Any], ...],
+                  seg_start: int,
+                  seg_end: int) -> bytes:
+    """
+    Returns the encoded emsg boxes for all events of the given event generator
+    settings that start within seg_start to seg_end (using the event timebase)
+    """
+    evgen = clazz(**dict(settings))
+    dest = io.BytesIO()
+    for emsg in evgen.emsg_boxes_for_range(seg_start, seg_end):
+        emsg.encode(dest)
+    return dest.getvalue()
+
+
+@lru_cache(maxsize=MANIFEST_PAYLOAD_CACHE_SIZE)
+def manifest_event_payload(clazz: type[RepeatingEventBase],
+                           settings: tuple[tuple[str, Any], ...],
+                           event_id: int,
+                           presentation_time: int) -> str:
+    """
+    Returns the manifest payload of one event of the given event generator settings
+    """
+    evgen = clazz(**dict(settings))
+    return evgen.get_manifest_event_payload(event_id, presentation_time)
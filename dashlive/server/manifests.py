@@ -7,13 +7,15 @@
 #############################################################################
 
 from dataclasses import dataclass, field
-import hashlib
 import logging
+import math
 from typing import AbstractSet, Any, Iterator, NamedTuple, Set, cast
 
 from dashlive.mpeg.dash.profiles import primary_profiles
+from dashlive.server.options.container import OptionsContainer
 from dashlive.server.options.dash_option import DashOption
 from dashlive.server.options.drm_options import DrmLocationOption, DrmSelection
+from dashlive.server.options.name_maps import DashOptionNameMaps
 from dashlive.server.options.repository import OptionsRepository
 from dashlive.server.options.types import OptionUsage
 from dashlive.utils.json_object import JsonObject
@@ -68,46 +70,93 @@ class SupportedOptionTupleList:
                 count = opt.num_options
         return count
 
-    def cgi_query_combinations(self) -> Iterator[str]:
+    def cgi_query_combinations(self, shard: int = 0, num_shards: int = 1) -> Iterator[str]:
         """
-        Returns an iterator that yields of all possible combinations of CGI query parameters
+        Returns an iterator that yields all unique combinations of CGI query parameters.
+        Values that are not allowed by the restrictions are removed before the
+        combinations are generated, and options that are not used with the
+        selected mode or DRM system only use one value. This allows every
+        combination to be unique without remembering the combinations that
+        have already been produced. The combinations can be shared between
+        "num_shards" workers, with this iterator only producing the
+        combinations for "shard".
         """
-        indexes = [0] * len(self.options)
-        done = False
-        num_options = len(self.options)
-        checked: set[bytes] = set()
-        while not done:
-            params: dict[str, str] = {}
-            allowed = True
-            for opt, idx in zip(self.options, indexes):
-                name, length, param_options = opt
-                val = param_options[idx]
-                try:
-                    allowed = val in self.restrictions[name]
-                except KeyError:
-                    pass
-                if not allowed:
-                    break
-                params[name] = val
-            if allowed:
+        assert 0 <= shard < num_shards
+        count: int = 0
+        offset: int = 0
+        for block in self.combination_blocks():
+            size: int = math.prod([len(values) for _, values in block])
+            for index in range((shard - offset) % num_shards, size, num_shards):
+                params: dict[str, str] = {}
+                remainder: int = index
+                for name, values in block:
+                    remainder, pos = divmod(remainder, len(values))
+                    params[name] = values[pos]
                 candidate = OptionsRepository.convert_cgi_options(params)
                 candidate.update(**self.kwargs)
                 candidate.reset_unused_parameters(self.mode)
-                cgi_str = candidate.generate_cgi_parameters_string()
-                digest: bytes = hashlib.sha1(bytes(cgi_str, 'ascii')).digest()
-                if digest not in checked:
-                    checked.add(digest)
-                    yield cgi_str
-            idx = 0
-            while idx < num_options:
-                indexes[idx] += 1
-                if indexes[idx] < self.options[idx][1]:
-                    break
-                indexes[idx] = 0
-                idx += 1
-            if idx == num_options:
-                done = True
-        logging.debug('%s total tests=%d', self.title, len(checked))
+                count += 1
+                yield candidate.generate_cgi_parameters_string()
+            offset += size
+        logging.debug('%s total tests=%d', self.title, count)
+
+    def combination_blocks(self) -> Iterator[list[DashCgiOption]]:
+        """
+        Splits the options into blocks, one for each DRM choice, where each
+        block lists the values of each option that produce unique CGI
+        query parameters.
+        """
+        allowed: list[DashCgiOption] = []
+        for name, _, values in self.options:
+            try:
+                restriction = self.restrictions[name]
+                values = [val for val in values if val in restriction]
+            except KeyError:
+                pass
+            if not values:
+                return
+            allowed.append((name, values))
+        overridden: set[str] = set()
+        for key, value in self.kwargs.items():
+            if isinstance(value, dict):
+                overridden.update({f'{key}.{k2}' for k2 in value.keys()})
+            else:
+                overridden.add(key)
+        last_index: dict[str, int] = {name: idx for idx, (name, _) in enumerate(allowed)}
+        drm_choices: list[str | None] = [None]
+        for name, values in allowed:
+            if name == 'drm':
+                drm_choices = values
+                if self.parameter_names(name).intersection(overridden):
+                    drm_choices = values[:1]
+        for drm in drm_choices:
+            candidate = OptionsRepository.convert_cgi_options(
+                {} if drm is None else {'drm': drm})
+            candidate.update(**self.kwargs)
+            unused: set[str] = overridden.union(OptionsContainer.unused_parameter_names(
+                self.mode, candidate.encrypted,
+                {item[0] for item in candidate.drmSelection}))
+            block: list[DashCgiOption] = []
+            for idx, (name, values) in enumerate(allowed):
+                if name == 'drm':
+                    block.append((name, [drm]))
+                elif last_index[name] != idx or self.parameter_names(name).intersection(unused):
+                    # either a later option with the same name replaces this
+                    # value, or this option is not used
+                    block.append((name, values[:1]))
+                else:
+                    block.append((name, values))
+            yield block
+
+    @staticmethod
+    def parameter_names(cgi_name: str) -> set[str]:
+        try:
+            opt: DashOption = DashOptionNameMaps.get_cgi_map()[cgi_name]
+        except KeyError:
+            return set()
+        if opt.prefix:
+            return {f'{opt.prefix}.{opt.full_name}', f'{opt.prefix}.{opt.short_name}'}
+        return {opt.full_name}
 
 
 @dataclass(slots=True, frozen=True)
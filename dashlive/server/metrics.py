@@ -0,0 +1,296 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from bisect import bisect_left
+from collections.abc import Callable
+import threading
+import time
+from typing import Protocol
+
+import flask
+
+from dashlive.server.models.db import QueryStats
+from dashlive.server.query_stats import request_query_stats
+from dashlive.server.routes import routes, ui_routes
+
+# upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class CacheInfo(Protocol):
+    """
+    The statistics returned by the cache_info() function of a functools.lru_cache
+    """
+    hits: int
+    misses: int
+    currsize: int
+
+
+CacheInfoFunction = Callable[[], CacheInfo]
+
+class RouteStats:
+    """
+    Request statistics for one route
+    """
+    __slots__ = ('buckets', 'bytes_sent', 'db_queries', 'db_time', 'latency_sum', 'statuses')
+
+    buckets: list[int]
+    bytes_sent: int
+    db_queries: int
+    db_time: float
+    latency_sum: float
+    statuses: dict[int, int]
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (1 + len(LATENCY_BUCKETS))
+        self.bytes_sent = 0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.latency_sum = 0.0
+        self.statuses = {}
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets)
+
+    def add_request(self, duration: float, status: int, num_bytes: int,
+                    db_queries: int, db_time: float = 0.0) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.latency_sum += duration
+        self.bytes_sent += num_bytes
+        self.db_queries += db_queries
+        self.db_time += db_time
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def merge(self, other: "RouteStats") -> None:
+        for idx, value in enumerate(other.buckets):
+            self.buckets[idx] += value
+        self.bytes_sent += other.bytes_sent
+        self.db_queries += other.db_queries
+        self.db_time += other.db_time
+        self.latency_sum += other.latency_sum
+        for status, value in list(other.statuses.items()):
+            self.statuses[status] = self.statuses.get(status, 0) + value
+
+
+def merge_route_stats(dest: dict[str, RouteStats], src: dict[str, RouteStats]) -> None:
+    """
+    Add the per-route statistics of src into dest
+    """
+    for handler, stats in list(src.items()):
+        try:
+            total = dest[handler]
+        except KeyError:
+            total = dest[handler] = RouteStats()
+        total.merge(stats)
+
+
+class ServerMetrics:
+    """
+    Collects per-route request statistics.
+
+    To avoid contention between the worker threads, each thread records its
+    statistics into its own shard. The lock is only used when a thread
+    creates its shard and when the shards are combined by collect().
+    The shards of threads that have exited are merged into a single
+    "retired" shard, as the threaded development server uses a new thread
+    for every request.
+    """
+
+    _caches: dict[str, CacheInfoFunction]
+    _local: threading.local
+    _lock: threading.Lock
+    _retired: dict[str, RouteStats]
+    _shards: list[tuple[threading.Thread, dict[str, RouteStats]]]
+
+    def __init__(self) -> None:
+        self._caches = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._retired = {}
+        self._shards = []
+        self._handler_names: dict[str, str] = {}
+        for name, route in routes.items():
+            self._handler_names[name] = route.handler.rsplit('.', 1)[-1]
+        for name, route in ui_routes.items():
+            self._handler_names[f'ui-{name}'] = route.handler.rsplit('.', 1)[-1]
+
+    def init_app(self, app: flask.Flask) -> None:
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def register_cache(self, name: str, cache_info: CacheInfoFunction) -> None:
+        """
+        Add a functools.lru_cache() to the cache hit ratio statistics
+        """
+        self._caches[name] = cache_info
+
+    def handler_name(self, endpoint: str | None) -> str:
+        if endpoint is None:
+            return 'NotFound'
+        return self._handler_names.get(endpoint, endpoint)
+
+    def record_request(self, handler: str, duration: float, status: int,
+                       num_bytes: int, db_queries: int = 0, db_time: float = 0.0) -> None:
+        shard: dict[str, RouteStats] = self._get_shard()
+        try:
+            stats = shard[handler]
+        except KeyError:
+            stats = shard[handler] = RouteStats()
+        stats.add_request(duration, status, num_bytes, db_queries, db_time)
+
+    def collect(self) -> dict[str, RouteStats]:
+        """
+        Combine the statistics from all threads
+        """
+        result: dict[str, RouteStats] = {}
+        with self._lock:
+            self._retire_shards()
+            merge_route_stats(result, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            merge_route_stats(result, shard)
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Produce all metrics using the Prometheus text exposition format
+        """
+        stats: dict[str, RouteStats] = self.collect()
+        handlers: list[str] = sorted(stats.keys())
+        lines: list[str] = [
+            '# HELP dashlive_http_requests_total Total number of HTTP requests',
+            '# TYPE dashlive_http_requests_total counter',
+        ]
+        for handler in handlers:
+            for status, count in sorted(stats[handler].statuses.items()):
+                lines.append(
+                    f'dashlive_http_requests_total{{handler="{handler}",status="{status}"}} {count}')
+        lines += [
+            '# HELP dashlive_http_request_duration_seconds HTTP request latency',
+            '# TYPE dashlive_http_request_duration_seconds histogram',
+        ]
+        for handler in handlers:
+            rs: RouteStats = stats[handler]
+            total: int = 0
+            for upper, count in zip(LATENCY_BUCKETS, rs.buckets):
+                total += count
+                lines.append(
+                    f'dashlive_http_request_duration_seconds_bucket{{handler="{handler}",le="{upper}"}} {total}')
+            total += rs.buckets[-1]
+            lines += [
+                f'dashlive_http_request_duration_seconds_bucket{{handler="{handler}",le="+Inf"}} {total}',
+                f'dashlive_http_request_duration_seconds_sum{{handler="{handler}"}} {rs.latency_sum:.6f}',
+                f'dashlive_http_request_duration_seconds_count{{handler="{handler}"}} {total}',
+            ]
+        lines += [
+            '# HELP dashlive_http_response_bytes_total Total size of HTTP response bodies',
+            '# TYPE dashlive_http_response_bytes_total counter',
+        ]
+        for handler in handlers:
+            lines.append(
+                f'dashlive_http_response_bytes_total{{handler="{handler}"}} {stats[handler].bytes_sent}')
+        lines += [
+            '# HELP dashlive_db_queries_total Total number of database queries',
+            '# TYPE dashlive_db_queries_total counter',
+        ]
+        for handler in handlers:
+            lines.append(
+                f'dashlive_db_queries_total{{handler="{handler}"}} {stats[handler].db_queries}')
+        lines += [
+            '# HELP dashlive_db_query_seconds_total Total time spent waiting for database queries',
+            '# TYPE dashlive_db_query_seconds_total counter',
+        ]
+        for handler in handlers:
+            lines.append(
+                f'dashlive_db_query_seconds_total{{handler="{handler}"}} {stats[handler].db_time:.6f}')
+        cache_stats: list[tuple[str, CacheInfo]] = [
+            (name, cache_info()) for name, cache_info in sorted(self._caches.items())]
+        if cache_stats:
+            lines += [
+                '# HELP dashlive_cache_hit_ratio Ratio of cache hits to total cache lookups',
+                '# TYPE dashlive_cache_hit_ratio gauge',
+            ]
+            for name, info in cache_stats:
+                lookups: int = info.hits + info.misses
+                ratio: float = info.hits / lookups if lookups else 0.0
+                lines.append(f'dashlive_cache_hit_ratio{{cache="{name}"}} {ratio:.4f}')
+            lines += [
+                '# HELP dashlive_cache_hits_total Total number of cache hits',
+                '# TYPE dashlive_cache_hits_total counter',
+            ]
+            for name, info in cache_stats:
+                lines.append(f'dashlive_cache_hits_total{{cache="{name}"}} {info.hits}')
+            lines += [
+                '# HELP dashlive_cache_misses_total Total number of cache misses',
+                '# TYPE dashlive_cache_misses_total counter',
+            ]
+            for name, info in cache_stats:
+                lines.append(f'dashlive_cache_misses_total{{cache="{name}"}} {info.misses}')
+        lines.append('')
+        return '\n'.join(lines)
+
+    def _get_shard(self) -> dict[str, RouteStats]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        shard: dict[str, RouteStats] = {}
+        with self._lock:
+            self._retire_shards()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _retire_shards(self) -> None:
+        """
+        Merge the shards of threads that have exited into the retired
+        shard. Must be called with the lock held.
+        """
+        live: list[tuple[threading.Thread, dict[str, RouteStats]]] = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                merge_route_stats(self._retired, shard)
+        self._shards = live
+
+    def _before_request(self) -> None:
+        flask.g.metrics_start = time.perf_counter()
+
+    def _after_request(self, response: flask.Response) -> flask.Response:
+        start: float | None = flask.g.pop('metrics_start', None)
+        if start is None:
+            return response
+        num_bytes: int = response.content_length or 0
+        queries: QueryStats = request_query_stats()
+        self.record_request(
+            self.handler_name(flask.request.endpoint), time.perf_counter() - start,
+            response.status_code, num_bytes, queries.count, queries.duration)
+        return response
+
+    def _teardown_request(self, exc: BaseException | None) -> None:
+        # only called with a start time if _after_request() was not called,
+        # which happens when the handler raised an exception
+        start: float | None = flask.g.pop('metrics_start', None)
+        if start is None:
+            return
+        queries: QueryStats = request_query_stats()
+        self.record_request(
+            self.handler_name(flask.request.endpoint), time.perf_counter() - start,
+            500, 0, queries.count, queries.duration)
+
+
+server_metrics = ServerMetrics()
@@ -0,0 +1,81 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import itertools
+from typing import Protocol
+
+from sqlalchemy.event import listen  # type: ignore
+from sqlalchemy.orm import Session, SessionTransaction
+
+class GenerationCache(Protocol):
+    """
+    A cache whose generation is incremented every time it is invalidated
+    """
+
+    generation: int
+
+    def invalidate(self) -> None:
+        ...
+
+
+def invalidate_on_commit(name: str,
+                         cache: GenerationCache,
+                         model_classes: tuple[type, ...]) -> None:
+    """
+    Invalidates the cache when a transaction that adds, modifies or
+    deletes an instance of any of the given model classes is committed.
+    Mapper events are not used, as they fire when the session is flushed,
+    before the change is visible to other database connections.
+    """
+    generation_info: str = session_info_key(name, cache, 'generation')
+    dirty_info: str = session_info_key(name, cache, 'dirty')
+
+    # pylint: disable=unused-argument
+    def record_generation(session: Session, transaction, connection) -> None:
+        # the snapshot of the database seen by this transaction cannot be
+        # newer than the cache generation when the transaction started
+        session.info.setdefault(generation_info, cache.generation)
+
+    # pylint: disable=unused-argument
+    def find_modified_models(session: Session, flush_context) -> None:
+        for model in itertools.chain(session.new, session.dirty, session.deleted):
+            if isinstance(model, model_classes):
+                session.info[dirty_info] = True
+                return
+
+    def invalidate(session: Session) -> None:
+        if session.info.pop(dirty_info, False):
+            cache.invalidate()
+
+    def end_transaction(session: Session, transaction: SessionTransaction) -> None:
+        if transaction.parent is None:
+            session.info.pop(generation_info, None)
+            session.info.pop(dirty_info, None)
+
+    listen(Session, 'after_begin', record_generation)
+    listen(Session, 'after_flush', find_modified_models)
+    listen(Session, 'after_commit', invalidate)
+    listen(Session, 'after_transaction_end', end_transaction)
+
+
+def transaction_generation(session: Session, name: str, cache: GenerationCache) -> int:
+    """
+    The generation of the cache when the current transaction of the session
+    started. Values loaded by this transaction should only be added to the
+    cache if it has not been invalidated since this generation.
+    """
+    return session.info.get(session_info_key(name, cache, 'generation'), cache.generation)
+
+
+def session_info_key(name: str, cache: GenerationCache, field: str) -> str:
+    """
+    The key in session.info used to track the effect of a transaction on
+    the cache. The id of the cache is included, as a module that is
+    imported again (e.g. by the unit tests) creates a new cache with the
+    same name, and the listeners of the old cache are never removed.
+    """
+    return f'{name}_{id(cache)}_{field}'
@@ -7,14 +7,125 @@
 #############################################################################
 
 import json
+from collections.abc import Mapping
 from os import environ
 from pathlib import Path
 import re
+from typing import Any, NamedTuple
 
-from sqlalchemy import URL
+from sqlalchemy import URL, event, make_url
+from sqlalchemy.engine import Engine
 
 DEFAULT_SQLITE_DATABASE_NAME: str = "models.db3"
 
+class SqliteTuning(NamedTuple):
+    """
+    Settings for the optional SQLite tuning profile, which allows
+    requests that read from the database to continue while another
+    thread is writing to it.
+    """
+    # time (in milliseconds) to wait for a lock held by another connection
+    busy_timeout: int = 5000
+    # size (in KiB) of the page cache of each connection
+    cache_size: int = 16384
+    # maximum number of bytes of the database file to memory map
+    mmap_size: int = 268435456
+    # number of connections kept open in the connection pool
+    pool_size: int = 20
+    # number of extra connections allowed when the pool is exhausted
+    max_overflow: int = 80
+    # an in-memory database uses a single connection, and has no journal file
+    in_memory: bool = False
+
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, Any]) -> "SqliteTuning | None":
+        """
+        Creates a SqliteTuning if the DB_SQLITE_TUNING setting is enabled.
+        Any of the defaults can be changed using the DB_BUSY_TIMEOUT,
+        DB_SQLITE_CACHE_SIZE, DB_SQLITE_MMAP_SIZE, DB_POOL_SIZE and
+        DB_POOL_OVERFLOW settings. The connection pool and WAL settings are
+        not used if SQLALCHEMY_DATABASE_URI is an in-memory database.
+        """
+        enabled = settings.get('DB_SQLITE_TUNING', False)
+        if isinstance(enabled, str):
+            enabled = enabled.lower() in {'1', 'true', 'yes', 'on'}
+        if not enabled:
+            return None
+        names: dict[str, str] = {
+            'busy_timeout': 'DB_BUSY_TIMEOUT',
+            'cache_size': 'DB_SQLITE_CACHE_SIZE',
+            'mmap_size': 'DB_SQLITE_MMAP_SIZE',
+            'pool_size': 'DB_POOL_SIZE',
+            'max_overflow': 'DB_POOL_OVERFLOW',
+        }
+        kwargs: dict[str, int] = {}
+        for field, name in names.items():
+            value = settings.get(name)
+            if value is not None and value != '':
+                kwargs[field] = int(value)
+        uri: str | None = settings.get('SQLALCHEMY_DATABASE_URI')
+        return cls(in_memory=bool(uri) and is_in_memory_database(uri), **kwargs)
+
+    def engine_options(self) -> dict[str, Any]:
+        """
+        The SQLAlchemy create_engine() options for this profile
+        """
+        options: dict[str, Any] = {
+            'connect_args': {
+                'check_same_thread': False,
+                'timeout': self.busy_timeout / 1000.0,
+            },
+        }
+        if self.in_memory:
+            # Flask-SQLAlchemy uses a StaticPool, which cannot be sized
+            return options
+        return {
+            **options,
+            'max_overflow': self.max_overflow,
+            'pool_size': self.pool_size,
+            'pool_timeout': max(1.0, self.busy_timeout / 1000.0),
+        }
+
+    def pragmas(self) -> list[str]:
+        pragmas: list[str] = []
+        if not self.in_memory:
+            pragmas += [
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+            ]
+        return pragmas + [
+            f'PRAGMA busy_timeout={self.busy_timeout:d}',
+            f'PRAGMA cache_size=-{self.cache_size:d}',
+            f'PRAGMA mmap_size={self.mmap_size:d}',
+        ]
+
+    def apply_pragmas(self, dbapi_connection) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in self.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    def install(self, engine: Engine) -> None:
+        """
+        Apply the SQLite pragmas to every new connection made by the
+        given engine
+        """
+        def on_connect(dbapi_connection, connection_record) -> None:
+            self.apply_pragmas(dbapi_connection)
+
+        event.listen(engine, 'connect', on_connect)
+
+
+def is_in_memory_database(uri: str | URL) -> bool:
+    """
+    Is the given SQLite connection URL an in-memory database?
+    """
+    database: str | None = make_url(uri).database
+    return database is None or database in {'', ':memory:'}
+
+
 def make_db_connection_string(instance_path: Path, url_template: str) -> str:
     """
     Create a connection URL containing all the database settings
@@ -1,6 +1,11 @@
 from datetime import datetime
+import threading
+import time
+from typing import NamedTuple
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from .base import Base
 from .timezone_date_time import TimezoneForcingDateTime
@@ -9,3 +14,61 @@ db = SQLAlchemy(model_class=Base)
 db.Model.registry.update_type_annotation_map({
     datetime: TimezoneForcingDateTime
 })
+
+class QueryStats(NamedTuple):
+    count: int
+    duration: float
+
+    def __sub__(self, other: "QueryStats") -> "QueryStats":
+        return QueryStats(
+            count=self.count - other.count,
+            duration=self.duration - other.duration)
+
+
+class QueryCounter:
+    """
+    Counts the number of database queries, and the total time spent
+    waiting for them, made by each thread.
+    The queries made by one request can be found by subtracting a
+    snapshot taken at the start of the request from the values at the
+    end of the request.
+    """
+
+    _local: threading.local
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def instrument(self, engine: Engine) -> None:
+        if self.is_instrumented(engine):
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def is_instrumented(self, engine: Engine) -> bool:
+        """
+        Has instrument() added the query listeners to this engine?
+        """
+        return event.contains(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def stats(self) -> QueryStats:
+        """
+        The totals for all queries made by the current thread
+        """
+        return QueryStats(
+            count=getattr(self._local, 'count', 0),
+            duration=getattr(self._local, 'duration', 0.0))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault('query_counter', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        try:
+            start: float = conn.info['query_counter'].pop()
+        except (KeyError, IndexError):
+            return
+        self._local.count = getattr(self._local, 'count', 0) + 1
+        self._local.duration = getattr(self._local, 'duration', 0.0) + time.perf_counter() - start
+
+
+query_counter = QueryCounter()
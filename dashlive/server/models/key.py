@@ -1,4 +1,8 @@
-from typing import NotRequired, TypedDict, cast, AbstractSet, ClassVar, Optional, TYPE_CHECKING
+from collections import OrderedDict
+import threading
+from typing import (
+    NamedTuple, NotRequired, TypedDict, cast, AbstractSet, ClassVar, Optional, TYPE_CHECKING
+)
 
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -7,9 +11,11 @@ from dashlive.drm.keymaterial import KeyMaterial
 from dashlive.utils.json_object import JsonObject
 
 from .base import Base
+from .commit_invalidation import invalidate_on_commit, transaction_generation
 from .db import db
 from .mixin import ModelMixin
 from .mediafile_keys import mediafile_keys
+from .session import DatabaseSession
 
 if TYPE_CHECKING:
     from .mediafile import MediaFile
@@ -23,6 +29,104 @@ class KeyJson(TypedDict):
     guidKid: NotRequired[str]
 
 
+# maximum number of KIDs to keep in the JSON Web Key cache
+JWK_CACHE_SIZE: int = 1024
+
+JWK_CACHE_NAME: str = 'key_jwk'
+
+class KeyJwk(TypedDict):
+    kty: str
+    kid: str
+    k: str
+
+
+class JwkCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class KeyJwkCache:
+    """
+    LRU cache of the JSON Web Key of each Key, indexed by hex KID. The
+    cache is invalidated when a transaction that adds, modifies or
+    deletes a Key is committed.
+    """
+
+    entries: OrderedDict[str, KeyJwk]
+    generation: int
+    hits: int
+    lock: threading.Lock
+    maxsize: int
+    misses: int
+
+    def __init__(self, maxsize: int = JWK_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, kids: list[str]) -> tuple[dict[str, KeyJwk], list[str]]:
+        """
+        Returns the cached JWKs of the given KIDs, plus the list of KIDs
+        that are not in the cache
+        """
+        found: dict[str, KeyJwk] = {}
+        missing: list[str] = []
+        with self.lock:
+            for kid in kids:
+                try:
+                    found[kid] = self.entries[kid]
+                    self.entries.move_to_end(kid)
+                    self.hits += 1
+                except KeyError:
+                    missing.append(kid)
+                    self.misses += 1
+        return (found, missing,)
+
+    def put_many(self, jwks: dict[str, KeyJwk], generation: int) -> None:
+        """
+        Adds JWKs that were loaded from the database. The JWKs are ignored
+        if the cache has been invalidated since the given generation,
+        as they might have been loaded from a snapshot of the database
+        from before the change.
+        """
+        if self.maxsize < 1:
+            return
+        with self.lock:
+            if generation != self.generation:
+                return
+            for kid, jwk in jwks.items():
+                self.entries[kid] = jwk
+                self.entries.move_to_end(kid)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> JwkCacheInfo:
+        with self.lock:
+            return JwkCacheInfo(
+                hits=self.hits, misses=self.misses, maxsize=self.maxsize,
+                currsize=len(self.entries))
+
+
+key_jwk_cache = KeyJwkCache()
+
+
 class Key(ModelMixin["Key"], Base):
     __plural__: ClassVar[str] = 'Keys'
     __tablename__: ClassVar[str] = 'key'
@@ -50,20 +154,67 @@ class Key(ModelMixin["Key"], Base):
         return self.halg
 
     @classmethod
-    def get_kids(clz, kids: AbstractSet[KeyMaterial | str]) -> dict[str, "Key"]:
+    def get_kids(clz,
+                 kids: AbstractSet[KeyMaterial | str],
+                 derive_missing: bool = False,
+                 session: DatabaseSession | None = None) -> dict[str, "Key"]:
+        """
+        Returns a dictionary of the Keys for the given KIDs, indexed by
+        the lower case hex form of each KID. If derive_missing is True,
+        a computed Key is created for each KID that is not in the
+        database. These Keys are not added to the database session.
+        """
         def to_hex(kid: KeyMaterial | str) -> str:
             if isinstance(kid, KeyMaterial):
                 return kid.hex
             return kid.lower()
         kids = list(map(to_hex, kids))
+        if session is None:
+            session = db.session
         query = db.select(Key)
         if len(kids) == 1:
             query = query.filter_by(hkid=kids[0])
         else:
             query = query.filter(Key.hkid.in_(kids))
         rv = {}
-        for k in db.session.execute(query).scalars():
+        for k in session.execute(query).scalars():
             rv[k.hkid.lower()] = k
+        if derive_missing:
+            rv.update(clz.derive_keys([kid for kid in kids if kid not in rv]))
+        return rv
+
+    @classmethod
+    def get_jwks(clz, kids: list[str]) -> dict[str, KeyJwk]:
+        """
+        Returns the JSON Web Key of each of the given lower case hex KIDs
+        that is in the database. Only the KIDs that are not in
+        key_jwk_cache need a database query.
+        """
+        generation: int = transaction_generation(db.session, JWK_CACHE_NAME, key_jwk_cache)
+        rv, missing = key_jwk_cache.get_many(kids)
+        if missing:
+            loaded: dict[str, KeyJwk] = {
+                kid: key.toJWK() for kid, key in clz.get_kids(set(missing)).items()
+            }
+            key_jwk_cache.put_many(loaded, generation)
+            rv.update(loaded)
+        return rv
+
+    @classmethod
+    def derive_keys(clz, kids: list[str]) -> dict[str, "Key"]:
+        """
+        Creates computed Keys for the given hex KIDs, using the PlayReady
+        key derivation function
+        """
+        from dashlive.drm.playready import PlayReady
+
+        if not kids:
+            return {}
+        raw_keys: list[bytearray] = PlayReady.generate_content_keys(
+            [KeyMaterial(kid).raw for kid in kids])
+        rv: dict[str, Key] = {}
+        for kid, raw_key in zip(kids, raw_keys):
+            rv[kid] = Key(hkid=kid, hkey=KeyMaterial(raw=raw_key).hex, computed=True)
         return rv
 
     @classmethod
@@ -95,6 +246,16 @@ class Key(ModelMixin["Key"], Base):
             del js[ex]
         return js
 
+    def toJWK(self) -> KeyJwk:
+        """
+        The JSON Web Key form of this key, as used by ClearKey
+        """
+        return {
+            'kty': 'oct',
+            'kid': self.KID.b64url,
+            'k': self.KEY.b64url,
+        }
+
     def get_fields(self) -> list[JsonObject]:
         return [{
             "name": "hkid",
@@ -125,3 +286,6 @@ class Key(ModelMixin["Key"], Base):
             "value": self.computed,
             "columns": ["col-3", "col-6", ""],
         }]
+
+
+invalidate_on_commit(JWK_CACHE_NAME, key_jwk_cache, (Key,))
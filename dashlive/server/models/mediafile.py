@@ -9,13 +9,15 @@ import contextlib
 import hashlib
 import logging
 from pathlib import Path
-from typing import BinaryIO, cast, Callable, ClassVar, Optional, TYPE_CHECKING
+from typing import BinaryIO, cast, Callable, ClassVar, Iterable, Optional, TYPE_CHECKING
 
 import flask
 from langcodes import tag_is_valid
 import sqlalchemy as sa
 from sqlalchemy.event import listen  # type: ignore
-from sqlalchemy.orm import Mapped, reconstructor, relationship, mapped_column
+from sqlalchemy.orm import (
+    Mapped, joinedload, reconstructor, relationship, mapped_column
+)
 import sqlalchemy_jsonfield  # type: ignore
 
 from dashlive.mpeg.dash.representation import Representation
@@ -135,6 +137,26 @@ class MediaFile(ModelMixin["MediaFile"], Base):
             order_by = [MediaFile.bitrate]
         return super().search(max_items=max_items, order_by=order_by, **kwargs)
 
+    @classmethod
+    def search_streams(clz,
+                       stream_pks: Iterable[int],
+                       session: DatabaseSession | None = None) -> list["MediaFile"]:
+        """
+        Get all of the MediaFiles of the given streams using one query.
+        The blob and encryption keys of each MediaFile are also loaded
+        by this query.
+        """
+        from .db import db
+
+        if session is None:
+            session = db.session
+        query = db.select(MediaFile).filter(
+            MediaFile.stream_pk.in_(list(stream_pks))).options(
+                joinedload(MediaFile.blob),
+                joinedload(MediaFile.encryption_keys)).order_by(
+                    MediaFile.bitrate, MediaFile.pk)
+        return list(session.execute(query).unique().scalars())
+
     @classmethod
     def get(clz, **kwargs) -> Optional["MediaFile"]:
         """
@@ -213,8 +235,6 @@ class MediaFile(ModelMixin["MediaFile"], Base):
     def parse_media_file(self,
                          blob_folder: Path | None = None,
                          session: DatabaseSession | None = None) -> bool:
-        from dashlive.drm.keymaterial import KeyMaterial
-        from dashlive.drm.playready import PlayReady
         from .db import db
 
         if session is None:
@@ -270,14 +290,14 @@ class MediaFile(ModelMixin["MediaFile"], Base):
         self.bitrate = rep.bitrate
         self.encrypted = rep.encrypted
         self.encryption_keys = []
-        for kid in rep.kids:
-            key_model = Key.get(hkid=kid.hex, session=session)
-            if key_model is None:
-                key = KeyMaterial(
-                    raw=PlayReady.generate_content_key(kid.raw))
-                key_model = Key(hkid=kid.hex, hkey=key.hex, computed=True)
-                session.add(key_model)
-            self.encryption_keys.append(key_model)
+        if rep.kids:
+            keys: dict[str, Key] = Key.get_kids(
+                set(rep.kids), derive_missing=True, session=session)
+            for kid in rep.kids:
+                key_model = keys[kid.hex]
+                if key_model.pk is None:
+                    session.add(key_model)
+                self.encryption_keys.append(key_model)
         if rep.lang not in UNDEFINED_LANGS and not tag_is_valid(rep.lang):
             err = MediaFileError(
                 media_file=self,
@@ -9,11 +9,11 @@ import datetime
 import hashlib
 import logging
 from pathlib import Path
-from typing import cast, AbstractSet, ClassVar, Optional, NamedTuple
+from typing import cast, AbstractSet, ClassVar, Iterable, Optional, NamedTuple
 
 import flask
 import sqlalchemy as sa
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.orm import relationship, Mapped, mapped_column, selectinload
 import sqlalchemy_jsonfield  # type: ignore
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
@@ -80,6 +80,52 @@ class Stream(ModelMixin["Stream"], Base):
         """
         return cast(list["Stream"], cls.get_all())
 
+    @classmethod
+    def get_page(cls,
+                 after: int | None = None,
+                 limit: int | None = None,
+                 with_media_files: bool = False) -> list["Stream"]:
+        """
+        Return streams in primary key order, starting with the first
+        stream whose primary key is greater than "after".
+        :with_media_files: also load the MediaFiles of every stream,
+            using one extra query for all of the streams
+        """
+        query = db.select(Stream).order_by(Stream.pk)
+        if after is not None:
+            query = query.filter(Stream.pk > after)
+        if limit is not None:
+            query = query.limit(limit)
+        if with_media_files:
+            query = query.options(selectinload(Stream.media_files))
+        return list(db.session.execute(query).scalars())
+
+    @classmethod
+    def track_summaries(cls,
+                        stream_pks: Iterable[int]) -> dict[int, StreamTrackSummary]:
+        """
+        Produces a summary of the tracks of each of the given streams,
+        using one query for all of the streams
+        """
+        stream_pks = list(stream_pks)
+        counts: dict[tuple[int, str], int] = {}
+        if stream_pks:
+            stmt = db.select(
+                MediaFile.stream_pk, MediaFile.content_type,
+                sa.func.count(sa.distinct(MediaFile.track_id))).filter(
+                    MediaFile.stream_pk.in_(stream_pks)).group_by(
+                        MediaFile.stream_pk, MediaFile.content_type)
+            for stream_pk, content_type, num_tracks in db.session.execute(stmt):
+                counts[(stream_pk, content_type)] = num_tracks
+        rv: dict[int, StreamTrackSummary] = {}
+        for pk in stream_pks:
+            tracks: list[TrackSummary] = [
+                TrackSummary(content_type, counts.get((pk, content_type), 0))
+                for content_type in ['video', 'audio', 'text']]
+            rv[pk] = StreamTrackSummary(
+                video=tracks[0], audio=tracks[1], text=tracks[2])
+        return rv
+
     def toJSON(self, pure: bool = False,
                exclude: AbstractSet | None = None) -> JsonObject:
         timing_ref: str | None = None
@@ -137,6 +183,12 @@ class Stream(ModelMixin["Stream"], Base):
     def get_timing_reference_file(self) -> MediaFile | None:
         if self.timing_ref is None:
             return None
+        if 'media_files' not in sa.inspect(self).unloaded:
+            # avoid a query if the media files have already been loaded
+            for mf in self.media_files:
+                if mf.name == self.timing_ref['media_name']:
+                    return mf
+            return None
         return MediaFile.get(
             name=self.timing_ref['media_name'], stream_pk=self.pk)
 
@@ -213,12 +265,4 @@ class Stream(ModelMixin["Stream"], Base):
         """
         Produces a summary of all tracks in this stream
         """
-        tracks: list[TrackSummary] = []
-        for content_type in ['video', 'audio', 'text']:
-            stmt = db.select(
-                sa.func.count(sa.distinct(MediaFile.track_id))).filter_by(
-                    stream_pk=self.pk, content_type=content_type)
-            num_tracks: int = db.session.execute(stmt).scalar_one()
-            tracks.append(TrackSummary(content_type, num_tracks))
-        return StreamTrackSummary(
-            video=tracks[0], audio=tracks[1], text=tracks[2])
+        return Stream.track_summaries([self.pk])[self.pk]
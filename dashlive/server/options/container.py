@@ -262,23 +262,18 @@ class OptionsContainer(OptionsContainerType):
         for name in todo:
             setattr(self, name, getattr(defaults, name))
 
-    def reset_unused_parameters(
-            self,
-            mode: str,
-            encrypted: bool | None = None,
-            use: OptionUsage | None = None) -> None:
+    @staticmethod
+    def unused_parameter_names(mode: str, encrypted: bool, drms: AbstractSet[str]) -> list[str]:
         """
-        Reset to default all values that are not relevant based upon selected mode.
+        Names of the parameters that are not relevant for the given mode and
+        selection of DRM systems.
         """
-        if encrypted is None:
-            encrypted = self.encrypted
         todo: list[str] = []
         if mode != 'live':
             todo += ['availabilityStartTime', 'minimumUpdatePeriod',
                      'ntpSources', 'timeShiftBufferDepth', 'utcMethod',
                      'utcValue', 'patch']
         if encrypted:
-            drms: set[str] = {item[0] for item in self.drmSelection}
             if 'playready' not in drms:
                 todo += ['playready.licenseUrl', 'playready.piff', 'playready.version']
             if 'marlin' not in drms:
@@ -287,7 +282,23 @@ class OptionsContainer(OptionsContainerType):
                 todo.append('clearkey.licenseUrl')
         else:
             todo += ['marlin.licenseUrl', 'playready.licenseUrl', 'playready.piff',
-                     'playready.version', 'clearkey.licenseUrl']
+                     'playready.version', 'clearkey.licenseUrl', 'encryptionScheme']
+        return todo
+
+    def reset_unused_parameters(
+            self,
+            mode: str,
+            encrypted: bool | None = None,
+            use: OptionUsage | None = None) -> None:
+        """
+        Reset to default all values that are not relevant based upon selected mode.
+        """
+        if encrypted is None:
+            encrypted = self.encrypted
+        drms: set[str] = set()
+        if encrypted:
+            drms = {item[0] for item in self.drmSelection}
+        todo: list[str] = OptionsContainer.unused_parameter_names(mode, encrypted, drms)
         if use is not None:
             fields: set[str] = set()
             for field in dataclasses.fields(self):
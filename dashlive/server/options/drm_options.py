@@ -17,6 +17,7 @@ from .dash_option import (
     DashOption,
     FloatOrNoneDashOption,
     StringListDashOption,
+    StringOrNoneDashOption,
     UrlOrNoneDashOption,
 )
 from .types import OptionUsage
@@ -145,6 +146,27 @@ class DrmSelectionOption(DashOption[list[DrmSelectionTuple]]):
 
 DrmSelection = DrmSelectionOption()
 
+ENCRYPTION_SCHEME_HTML = '''
+<p>Encrypt clear media when it is requested, rather than using media that
+was encrypted before it was uploaded:</p>
+<ul>
+  <li>cenc - AES-CTR encryption</li>
+  <li>cbcs - AES-CBC encryption, using a 1:9 pattern for video</li>
+</ul>
+<p>Only used when a DRM has been selected.</p>
+'''
+
+EncryptionScheme = StringOrNoneDashOption(
+    usage=(OptionUsage.MANIFEST | OptionUsage.AUDIO | OptionUsage.VIDEO),
+    short_name='esch',
+    full_name='encryptionScheme',
+    title='Encryption scheme',
+    description='Encrypt clear media at request time, using the given protection scheme',
+    html=ENCRYPTION_SCHEME_HTML,
+    cgi_name='encryption',
+    cgi_choices=(None, 'cenc', 'cbcs'),
+    input_type='select')
+
 MarlinLicenseUrl = UrlOrNoneDashOption(
     usage=(OptionUsage.MANIFEST | OptionUsage.AUDIO | OptionUsage.VIDEO),
     short_name='mlu',
@@ -190,6 +212,7 @@ PlayreadyVersion = FloatOrNoneDashOption(
 drm_options = [
     ClearkeyLicenseUrl,
     DrmSelection,
+    EncryptionScheme,
     MarlinLicenseUrl,
     PlayreadyLicenseUrl,
     PlayreadyPiff,
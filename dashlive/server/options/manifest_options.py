@@ -204,6 +204,19 @@ ForcePeriodDurations = BoolDashOption(
         ('Yes', '1'),
     ))
 
+ServerTimingHeaders = BoolDashOption(
+    usage=OptionUsage.MANIFEST + OptionUsage.VIDEO + OptionUsage.AUDIO + OptionUsage.TEXT,
+    short_name='stm',
+    full_name='serverTiming',
+    title='Server-Timing headers',
+    description='Add a Server-Timing HTTP header to manifest and media segment responses',
+    input_type='checkbox',
+    cgi_name='timing',
+    cgi_choices=(
+        ('No', '0'),
+        ('Yes', '1'),
+    ))
+
 manifest_options = [
     AbrControl,
     AvailabilityStartTime,
@@ -215,6 +228,7 @@ manifest_options = [
     MinimumUpdatePeriod,
     OperatingMode,
     SegmentTimeline,
+    ServerTimingHeaders,
     TimeshiftBufferDepth,
     UpdateCount,
     UseBaseUrl,
@@ -68,6 +68,7 @@ class OptionsContainerType(OptionsGroup):
     clockDrift: int | None = None
     dashjsVersion: str | None = None
     drmSelection: list[tuple] = field(default_factory=list)
+    encryptionScheme: str | None = None
     eventTypes: list[str] = field(default_factory=list)
     failureCount: int | None = None
     forcePeriodDurations: bool = False
@@ -84,6 +85,7 @@ class OptionsContainerType(OptionsGroup):
     playready: PlayreadyOptionsType = field(default_factory=PlayreadyOptionsType)
     scte35: Scte35OptionsType = field(default_factory=Scte35OptionsType)
     segmentTimeline: bool = False
+    serverTiming: bool = False
     shakaVersion: str | None = None
     textCodec: str | None = None
     textErrors: list[tuple[int, str]] = field(default_factory=list)
@@ -113,6 +115,7 @@ class ShortOptionsContainerType(OptionsGroup):
     dft: int | None = None
     djVer: str | None = None
     drm: list[tuple] = field(default_factory=list)
+    esch: str | None = None
     evs: list[str] = field(default_factory=list)
     hfc: int | None = None
     fpd: bool = False
@@ -146,6 +149,7 @@ class ShortOptionsContainerType(OptionsGroup):
     sctValu: str | None = None
     sctVers: int = 0
     st: bool = False
+    stm: bool = False
     skVer: str | None = None
     tc: str | None = None
     the: list[tuple[int, str]] = field(default_factory=list)
@@ -175,6 +179,7 @@ class CgiOptionsContainerType(OptionsGroup):
     drift: int | None = None
     dashjs: str | None = None
     drm: list[tuple] = field(default_factory=list)
+    encryption: str | None = None
     events: list[str] = field(default_factory=list)
     failures: int | None = None
     periodDur: bool = False
@@ -208,6 +213,7 @@ class CgiOptionsContainerType(OptionsGroup):
     scte35__value: str | None = None
     scte35__version: int = 0
     timeline: bool = False
+    timing: bool = False
     shaka: str | None = None
     tcodec: str | None = None
     terr: list[tuple[int, str]] = field(default_factory=list)
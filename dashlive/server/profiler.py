@@ -0,0 +1,234 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import cProfile
+from dataclasses import asdict, dataclass
+import datetime
+import hashlib
+import json
+import logging
+from pathlib import Path
+import pstats
+import re
+import threading
+import time
+
+import flask
+
+from dashlive.server.metrics import server_metrics
+
+@dataclass(slots=True)
+class ProfileSummary:
+    """
+    Describes the aggregated profile of one route / options combination
+    """
+    fingerprint: str
+    handler: str
+    params: dict[str, str]
+    count: int
+    total_time: float
+    last_modified: float
+
+    @property
+    def mean_time(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.total_time / self.count
+
+    @property
+    def modified(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.last_modified, tz=datetime.timezone.utc)
+
+
+@dataclass(slots=True)
+class ProfilerSession:
+    """
+    The settings used while the profiler is armed
+    """
+    expires: float
+    handler: str
+    match: str
+
+
+class RequestProfiler:
+    """
+    On-demand cProfile hook for request handlers.
+
+    When an admin user starts a profiling session, every matching request
+    is run inside a cProfile.Profile until the session expires. The profiles
+    are aggregated per route and CGI parameter combination and saved
+    in the "profiles" directory of the instance folder.
+
+    When no session is active, the cost per request is one attribute lookup.
+    """
+
+    MAX_DURATION: int = 3600
+    FINGERPRINT_RE = re.compile(r'^[\w-]+$')
+
+    _active: threading.Lock
+    _lock: threading.Lock
+    _local: threading.local
+    session: ProfilerSession | None
+
+    def __init__(self) -> None:
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.session = None
+
+    def init_app(self, app: flask.Flask) -> None:
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def profile_dir() -> Path:
+        return Path(flask.current_app.instance_path) / "profiles"
+
+    def start(self, duration: int, handler: str = '', match: str = '') -> ProfilerSession:
+        """
+        Profile all matching requests for the next "duration" seconds
+        """
+        duration = max(1, min(duration, self.MAX_DURATION))
+        self.session = ProfilerSession(
+            expires=time.time() + duration, handler=handler, match=match)
+        return self.session
+
+    def stop(self) -> None:
+        self.session = None
+
+    def is_active(self) -> bool:
+        session: ProfilerSession | None = self.session
+        if session is None:
+            return False
+        if time.time() > session.expires:
+            self.session = None
+            return False
+        return True
+
+    @staticmethod
+    def fingerprint(handler: str, params: dict[str, str]) -> str:
+        """
+        Creates a filename safe identifier for a route and its CGI parameters
+        """
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+        return f'{handler}-{digest[:12]}'
+
+    def list_profiles(self) -> list[ProfileSummary]:
+        result: list[ProfileSummary] = []
+        profile_dir: Path = self.profile_dir()
+        if not profile_dir.exists():
+            return result
+        for js_file in profile_dir.glob('*.json'):
+            try:
+                with js_file.open('rt', encoding='utf-8') as src:
+                    result.append(ProfileSummary(**json.load(src)))
+            except (ValueError, TypeError) as err:
+                logging.warning('Failed to load profile summary %s: %s', js_file, err)
+        result.sort(key=lambda item: item.total_time, reverse=True)
+        return result
+
+    def profile_filename(self, fingerprint: str) -> Path | None:
+        if not self.FINGERPRINT_RE.match(fingerprint):
+            return None
+        filename: Path = self.profile_dir() / f'{fingerprint}.prof'
+        if not filename.exists():
+            return None
+        return filename
+
+    def clear(self) -> None:
+        profile_dir: Path = self.profile_dir()
+        if not profile_dir.exists():
+            return
+        with self._lock:
+            for item in profile_dir.iterdir():
+                if item.suffix in {'.json', '.prof'}:
+                    item.unlink()
+
+    def save_profile(self, profile: cProfile.Profile, handler: str,
+                     params: dict[str, str], duration: float) -> ProfileSummary:
+        """
+        Add the profile of one request to the aggregated profile for its
+        route and options combination
+        """
+        fingerprint: str = self.fingerprint(handler, params)
+        profile_dir: Path = self.profile_dir()
+        prof_file: Path = profile_dir / f'{fingerprint}.prof'
+        js_file: Path = profile_dir / f'{fingerprint}.json'
+        with self._lock:
+            profile_dir.mkdir(exist_ok=True)
+            stats = pstats.Stats(profile)
+            summary = ProfileSummary(
+                fingerprint=fingerprint, handler=handler, params=params, count=0,
+                total_time=0.0, last_modified=0.0)
+            if prof_file.exists() and js_file.exists():
+                stats.add(str(prof_file))
+                with js_file.open('rt', encoding='utf-8') as src:
+                    summary = ProfileSummary(**json.load(src))
+            stats.dump_stats(prof_file)
+            summary.count += 1
+            summary.total_time += duration
+            summary.last_modified = time.time()
+            with js_file.open('wt', encoding='utf-8') as dest:
+                json.dump(asdict(summary), dest)
+        return summary
+
+    def _matches(self, handler: str) -> bool:
+        session: ProfilerSession | None = self.session
+        if session is None:
+            return False
+        if session.handler and session.handler != handler:
+            return False
+        if session.match:
+            query: str = flask.request.query_string.decode('utf-8', errors='replace')
+            if session.match not in query:
+                return False
+        return True
+
+    def _before_request(self) -> None:
+        if not self.is_active():
+            return
+        if flask.request.endpoint in {'list-profiles', 'download-profile'}:
+            return
+        handler: str = server_metrics.handler_name(flask.request.endpoint)
+        if not self._matches(handler):
+            return
+        # only one request at a time is profiled, to avoid the
+        # profile of one request including work from other threads
+        if not self._active.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        self._local.request = (profile, handler, time.perf_counter())
+        profile.enable()
+
+    def _finish(self) -> None:
+        try:
+            profile, handler, start = self._local.request
+        except AttributeError:
+            return
+        duration: float = time.perf_counter() - start
+        profile.disable()
+        del self._local.request
+        self._active.release()
+        try:
+            self.save_profile(profile, handler, dict(flask.request.args), duration)
+        except (OSError, ValueError) as err:
+            logging.error('Failed to save profile: %s', err)
+
+    def _after_request(self, response: flask.Response) -> flask.Response:
+        self._finish()
+        return response
+
+    def _teardown_request(self, exc: BaseException | None) -> None:
+        # only has an active profile if _after_request() was not called,
+        # which happens when the handler raised an exception
+        self._finish()
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,55 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import logging
+
+import flask
+
+from dashlive.server.models.db import QueryStats, db, query_counter
+
+NO_QUERIES = QueryStats(count=0, duration=0.0)
+
+def request_query_stats() -> QueryStats:
+    """
+    Returns the number of database queries, and the time spent on them,
+    made so far by the current request.
+    """
+    if not flask.has_request_context():
+        return NO_QUERIES
+    start: QueryStats | None = flask.g.get('query_stats_start', None)
+    if start is None:
+        return NO_QUERIES
+    return query_counter.stats() - start
+
+def start_query_stats() -> None:
+    flask.g.query_stats_start = query_counter.stats()
+
+def log_query_stats(response: flask.Response) -> flask.Response:
+    stats: QueryStats = request_query_stats()
+    max_queries: int | None = flask.current_app.config.get('MAX_DB_QUERIES')
+    if max_queries is not None and stats.count > int(max_queries):
+        logging.warning(
+            '%s %s made %d database queries (%.3fms), more than the limit of %d',
+            flask.request.method, flask.request.path, stats.count,
+            1000.0 * stats.duration, int(max_queries))
+    elif stats.count:
+        logging.debug(
+            '%s %s made %d database queries (%.3fms)', flask.request.method,
+            flask.request.path, stats.count, 1000.0 * stats.duration)
+    return response
+
+def init_query_stats(app: flask.Flask) -> None:
+    """
+    Count the database queries made by each request.
+    If the app config MAX_DB_QUERIES is set, a warning is logged for
+    every request that makes more queries than this limit.
+    """
+    with app.app_context():
+        query_counter.instrument(db.engine)
+    app.before_request(start_query_stats)
+    app.after_request(log_query_stats)
@@ -18,6 +18,7 @@ from flask.views import MethodView  # type: ignore
 from dashlive.server import models
 from dashlive.server.routes import routes, Route
 from dashlive.server.options.container import OptionsContainer
+from dashlive.server.server_timing import server_timing
 from dashlive.utils.json_object import JsonObject
 
 from .csrf import CsrfProtection
@@ -68,6 +69,15 @@ class RequestHandlerBase(MethodView):
                           stream: models.Stream | None = None,
                           features: AbstractSet[str] | None = None,
                           restrictions: dict[str, tuple] | None = None) -> OptionsContainer:
+        with server_timing().span('options'):
+            return self._calculate_options(mode, args, stream, features, restrictions)
+
+    def _calculate_options(self,
+                           mode: str,
+                           args: dict[str, str],
+                           stream: models.Stream | None,
+                           features: AbstractSet[str] | None,
+                           restrictions: dict[str, tuple] | None) -> OptionsContainer:
         options = OptionsContainer(mode=mode)
         if stream is not None:
             if stream.defaults is not None:
@@ -22,39 +22,40 @@
 
 import binascii
 import base64
+from typing import Any
 
 from flask import Response, request
 
 from dashlive.server import models
+from dashlive.server.models.key import KeyJwk
+from dashlive.utils.json_object import JsonObject
+
 from .base import RequestHandlerBase
 from .utils import jsonify
 
 class ClearkeyHandler(RequestHandlerBase):
     def post(self) -> Response:
-        result = {"error": None}
         req = request.get_json(force=True, cache=False)
-        try:
-            kids = req["kids"]
-        except KeyError:
+        if isinstance(req, list):
+            # a batch of license requests, that produces a list of
+            # license responses in the same order
+            return jsonify([self.license_response(item) for item in req])
+        if 'kids' not in req:
             return jsonify('kids property missing', 400)
+        return jsonify(self.license_response(req))
+
+    def license_response(self, req: dict[str, Any]) -> JsonObject:
+        result = {"error": None}
         try:
-            kids = list(map(self.base64url_decode, kids))
-            kids = [self.to_hex(k) for k in kids]
-            keys = []
-            for kid, key in models.Key.get_kids(kids).items():
-                item = {
-                    "kty": "oct",
-                    "kid": self.base64url_encode(key.KID.raw),
-                    "k": self.base64url_encode(key.KEY.raw)
-                }
-                keys.append(item)
+            kids: list[str] = [self.to_hex(self.base64url_decode(k)) for k in req["kids"]]
+            jwks: dict[str, KeyJwk] = models.Key.get_jwks(kids)
             result = {
-                "keys": keys,
+                "keys": [jwks[kid] for kid in dict.fromkeys(kids) if kid in jwks],
                 "type": req["type"]
             }
         except (TypeError, ValueError, KeyError) as err:
             result["error"] = f'Error: {err}'
-        return jsonify(result)
+        return result
 
     @staticmethod
     def to_hex(data: bytes) -> str:
@@ -62,18 +63,11 @@ class ClearkeyHandler(RequestHandlerBase):
 
     @staticmethod
     def base64url_encode(b: bytes) -> str:
-        b = str(base64.b64encode(b), 'ascii')
-        b = b.replace('+', '-')
-        b = b.replace('/', '_')
-        return b.replace('=', '')
+        return str(base64.urlsafe_b64encode(b).rstrip(b'='), 'ascii')
 
     @staticmethod
     def base64url_decode(txt: str) -> bytes:
-        txt = txt.replace('-', '+')
-        txt = txt.replace('_', '/')
         padding: int = len(txt) % 4
-        if padding == 2:
-            txt += '=='
-        elif padding == 3:
-            txt += '='
-        return base64.b64decode(txt)
+        if padding > 1:
+            txt += '=' * (4 - padding)
+        return base64.urlsafe_b64decode(txt)
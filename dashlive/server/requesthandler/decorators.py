@@ -126,10 +126,14 @@ def uses_media_file(func):
             if not sdir:
                 # print(f'MediaFile {filename} not found')
                 return flask.make_response(f'MediaFile {filename} not found', 404)
-            stream = Stream.get(directory=sdir)
+            # re-use the Stream if it has already been found by uses_stream
+            stream: Stream | None = flask.g.get('stream', None)
+            if stream is None or stream.directory != sdir:
+                stream = Stream.get(directory=sdir)
             if not stream:
                 # print(f'Stream {sdir} not found')
                 return flask.make_response(f'Stream {sdir} not found', 404)
+            flask.g.stream = stream
             mf = MediaFile.get(stream_pk=stream.pk, name=filename.lower())
             if not mf:
                 mf = MediaFile.get(stream_pk=stream.pk, name=f'{filename.lower()}.mp4')
@@ -159,16 +163,19 @@ def uses_stream(func):
     """
     @wraps(func)
     def decorated_function(*args, **kwargs):
-        stream: Stream | None = None
+        # the Stream might have already been found by uses_media_file
+        stream: Stream | None = flask.g.get('stream', None)
         spk = kwargs.get('spk', None)
         if spk:
-            stream = Stream.get(pk=spk)
+            if stream is None or str(stream.pk) != str(spk):
+                stream = Stream.get(pk=spk)
         else:
             sid = kwargs.get('stream', None)
             if not sid:
                 # print('Stream ID missing')
                 return flask.make_response('Stream ID missing', 400)
-            stream = Stream.get(directory=sid)
+            if stream is None or stream.directory != sid:
+                stream = Stream.get(directory=sid)
         if not stream:
             # print(f'Stream not found')
             return flask.make_response(f'Stream {spk} not found', 404)
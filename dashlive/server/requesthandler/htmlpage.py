@@ -212,7 +212,7 @@ class VideoPlayer(RequestHandlerBase):
             multi_period=mps_model)
         dash: JsonObject = mc.to_dict(exclude={
             'ref_representation', 'cgi_params', 'options', 'periods', 'period',
-            'timing_ref',
+            'timing_ref', 'layout', 'media_index', '_keys',
         })
         dash['periods'] = []
         for period in mc.periods:
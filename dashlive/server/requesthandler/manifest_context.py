@@ -13,7 +13,9 @@ import urllib.parse
 
 import flask  # type: ignore
 
+from dashlive.drm.key_tuple import KeyTuple
 from dashlive.drm.keymaterial import KeyMaterial
+from dashlive.drm.sample_encryptor import EncryptionScheme
 from dashlive.mpeg.dash.adaptation_set import AdaptationSet
 from dashlive.mpeg.dash.patch_location import PatchLocation
 from dashlive.mpeg.dash.period import Period
@@ -37,6 +39,13 @@ from dashlive.utils.lang import lang_is_equal
 
 from .cgi_parameter_collection import CgiParameterCollection
 from .drm_context import DrmContext
+from .media_file_index import MediaFileIndex
+from .period_layout import PeriodLayout
+from .runtime_encryption import (
+    runtime_encrypted_representation,
+    runtime_encryption_scheme,
+    stream_runtime_key
+)
 from .time_source_context import TimeSourceContext
 from .utils import is_https_request
 
@@ -45,16 +54,19 @@ class ManifestContext:
     cgi_params: CgiParameterCollection
     locationURL: str
     manifest: DashManifest | None
+    media_index: MediaFileIndex
     mediaDuration: float
     minBufferTime: datetime.timedelta
     mpd_name: str
     mpd_id: str
     now: datetime.datetime
+    layout: PeriodLayout | None = None
     options: OptionsContainer
     patch: PatchLocation | None = None
     periods: list[Period]
     profiles: list[str]
     publishTime: datetime.datetime
+    runtime_scheme: EncryptionScheme | None
     startNumber: int
     stream: models.Stream
     suggestedPresentationDelay: int
@@ -79,13 +91,17 @@ class ManifestContext:
         if multi_period:
             self.mpd_id = multi_period.name
             self.title = multi_period.title
+            self.media_index = MediaFileIndex.for_multi_period(multi_period)
         else:
             self.mpd_id = stream.directory
             self.title = stream.title
             self.timing_ref = stream.timing_reference
+            self.media_index = MediaFileIndex.for_stream(stream)
         self.now = now
         self.options = options
+        self.runtime_scheme = runtime_encryption_scheme(options)
         self.periods = []
+        self._keys: dict[frozenset[str], dict[str, models.Key]] = {}
         self.profiles = [primary_profiles[options.mode]]
         self.startNumber = 1
         self.suggestedPresentationDelay = 30
@@ -146,6 +162,13 @@ class ManifestContext:
             retval[key] = value
         return retval
 
+    @property
+    def media_encrypted(self) -> bool:
+        """
+        Should the stream use media that was encrypted before it was uploaded?
+        """
+        return self.options.encrypted and self.runtime_scheme is None
+
     @property
     def period(self) -> Period:
         if self.periods:
@@ -189,18 +212,22 @@ class ManifestContext:
 
     def create_all_vod_periods(self,
                                multi_period: models.MultiPeriodStream) -> None:
-        start: datetime.timedelta = datetime.timedelta(0)
-        for prd in multi_period.periods:
+        self.layout = PeriodLayout(
+            multi_period, encrypted=self.media_encrypted, media_index=self.media_index)
+        for index, prd in enumerate(self.layout.periods):
             timing = DashTiming(
                 self.now, prd.stream.timing_reference, self.options)
             period: Period = self.create_period(
-                stream=prd.stream, timing=timing, db_period=prd, start=start)
+                stream=prd.stream, timing=timing, db_period=prd,
+                start=self.layout.start_of(index))
             self.periods.append(period)
-            start += prd.duration
 
     def create_all_live_periods(self,
                                 multi_period: models.MultiPeriodStream) -> None:
-        duration: datetime.timedelta = multi_period.total_duration()
+        layout = PeriodLayout(
+            multi_period, encrypted=self.media_encrypted, media_index=self.media_index)
+        self.layout = layout
+        duration: datetime.timedelta = layout.duration
         timing_ref = StreamTimingReference(
             media_name=multi_period.name,
             media_duration=int(duration.total_seconds() * 1000),
@@ -210,33 +237,21 @@ class ManifestContext:
         timing = DashTiming(self.now, timing_ref, self.options)
         assert timing.availabilityStartTime is not None
         oldest_frag: datetime.datetime = timing.availabilityStartTime + timing.firstAvailableTime
-        num_loops = int(timing.firstAvailableTime.total_seconds() //
-                        duration.total_seconds())
         logging.debug(
             "First available fragment=%s (%s) elapsed=%s",
             timing.firstAvailableTime, oldest_frag, timing.elapsedTime)
-        logging.debug(
-            'num_loops=%d mps_duration=%s', num_loops, duration)
-        start: datetime.timedelta = duration * num_loops
-        periods: list[models.Period] = list(multi_period.periods)
-        index: int = 0
-        while start <= timing.elapsedTime:
-            prd: models.Period = periods[index]
+        logging.debug('mps_duration=%s', duration)
+        # Periods where all of their fragments are no longer available
+        # are skipped without being created
+        for item in layout.visible_periods(timing.firstAvailableTime, timing.elapsedTime):
+            prd: models.Period = item.period
             prd_timing = DashTiming(
                 self.now, prd.stream.timing_reference, self.options)
             period: Period = self.create_period(
                 stream=prd.stream, timing=prd_timing, db_period=prd,
-                start=start)
-            period.id = f"{period.id}_{num_loops}"
-            period_end: datetime.timedelta = start + prd.duration
-            if period_end >= timing.firstAvailableTime:
-                # don't output Periods where all its fragments are
-                # no longer available
-                self.periods.append(period)
-            start += prd.duration
-            index = (index + 1) % len(periods)
-            if index == 0:
-                num_loops += 1
+                start=item.start)
+            period.id = f"{period.id}_{item.loop}"
+            self.periods.append(period)
         if self.options.segmentTimeline:
             self.periods[-1].duration = None
 
@@ -264,19 +279,17 @@ class ManifestContext:
         audio_adps: list[AdaptationSet] = []
         text_adps: list[AdaptationSet] = []
         if db_period:
-            for adp in db_period.adaptation_sets:
+            if self.layout is None:
+                self.layout = PeriodLayout(
+                    db_period.parent, encrypted=self.media_encrypted, media_index=self.media_index)
+            for adp, reps in self.layout.representations(db_period):
                 adp_set = AdaptationSet(
                     mode=opts.mode,
                     content_type=adp.content_type.name,
                     id=adp.track_id,
                     role=adp.role.name.lower(),
                     segment_timeline=opts.segmentTimeline)
-                for mf in adp.media_files(encrypted=opts.encrypted):
-                    if mf.representation is None:
-                        mf.parse_media_file()
-                    if mf.representation is None:
-                        continue
-                    adp_set.representations.append(mf.representation)
+                adp_set.representations += reps
                 adp_set.compute_av_values()
                 period.adaptationSets.append(adp_set)
                 if adp_set.content_type == 'video':
@@ -292,6 +305,8 @@ class ManifestContext:
             text_adps = self.calculate_text_adaptation_sets(
                 stream, video.lang)
         assert video is not None
+        if self.runtime_scheme is not None:
+            self.apply_runtime_encryption(stream, [video] + audio_adps)
         if timing:
             self.update_timing(timing, db_period)
             if opts.mode == "live":
@@ -315,8 +330,10 @@ class ManifestContext:
                 self.cgi_params.manifest, question_mark=False))
             self.locationURL = urllib.parse.urlunparse(url_parts)
         event_generators = EventFactory.create_event_generators(opts)
+        ev_window = self.calculate_event_window(timing, start, db_period)
         for evgen in event_generators:
-            ev_stream = evgen.create_manifest_context(context=vars(self))
+            ev_stream = evgen.create_manifest_context(
+                context=vars(self), window=ev_window)
             if evgen.inband:
                 # TODO: allow AdaptationSet for inband events to be
                 # configurable
@@ -347,13 +364,68 @@ class ManifestContext:
         for adp in period.adaptationSets:
             if not adp.encrypted:
                 continue
-            kids: Set[KeyMaterial] = adp.key_ids()
-            keys = models.Key.get_kids(kids)
+            keys = self.get_keys(adp.key_ids())
             dc = DrmContext(stream, keys, self.options)
             adp.drm = dc.manifest_context
             adp.default_kid = list(keys.keys())[0]
         return period
 
+    def apply_runtime_encryption(self,
+                                 stream: models.Stream,
+                                 adaptation_sets: list[AdaptationSet]) -> None:
+        """
+        Replaces the clear Representations of the given AdaptationSets with
+        Representations that will be encrypted when they are requested
+        """
+        assert self.runtime_scheme is not None
+        key: KeyTuple | None = stream_runtime_key(
+            stream.pk, lambda: self.media_index.search(stream, encrypted=True))
+        if key is None:
+            logging.warning('No keys available to encrypt stream %s', stream.directory)
+            return
+        for adp in adaptation_sets:
+            adp.representations = [
+                rep if rep.encrypted else runtime_encrypted_representation(
+                    rep, key, self.runtime_scheme)
+                for rep in adp.representations]
+            adp.protection_scheme = self.runtime_scheme.value
+
+    def get_keys(self, kids: Set[KeyMaterial]) -> dict[str, models.Key]:
+        """
+        Looks up the keys for the given KIDs, re-using the result of
+        previous lookups of the same KIDs for this manifest
+        """
+        key = frozenset(kid.hex for kid in kids)
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+        keys: dict[str, models.Key] = models.Key.get_kids(kids)
+        self._keys[key] = keys
+        return keys
+
+    @staticmethod
+    def calculate_event_window(
+            timing: DashTiming | None,
+            start: datetime.timedelta,
+            db_period: models.Period | None
+    ) -> tuple[datetime.timedelta, datetime.timedelta] | None:
+        """
+        Calculates the time range (relative to the start of the Period)
+        of the events that should be included in the manifest.
+        """
+        if timing is None:
+            return None
+        if timing.mode != 'live':
+            if db_period is not None:
+                return (datetime.timedelta(0), db_period.duration,)
+            return (datetime.timedelta(0), timing.mediaDuration,)
+        win_end: datetime.timedelta = timing.elapsedTime
+        if timing.minimumUpdatePeriod:
+            # include events that will start before the next manifest refresh
+            win_end += datetime.timedelta(seconds=timing.minimumUpdatePeriod)
+        return (timing.firstAvailableTime - start, win_end - start,)
+
     def calculate_video_adaptation_set(
             self,
             stream: models.Stream,
@@ -361,8 +433,8 @@ class ManifestContext:
         video = AdaptationSet(
             mode=self.options.mode, content_type='video', id=1,
             segment_timeline=self.options.segmentTimeline)
-        media_files = models.MediaFile.search(
-            content_type='video', encrypted=self.options.encrypted,
+        media_files = self.media_index.search(
+            content_type='video', encrypted=self.media_encrypted,
             stream=stream, max_items=max_items)
         for mf in media_files:
             if mf.representation is None:
@@ -387,7 +459,7 @@ class ManifestContext:
             max_items: int | None = None) -> list[AdaptationSet]:
         opts = self.options
         adap_sets: dict[int, AdaptationSet] = {}
-        media_files = models.MediaFile.search(
+        media_files = self.media_index.search(
             content_type='audio', stream=stream, max_items=max_items)
         audio_files: list[Representation] = []
         acodec = opts.audioCodec
@@ -395,7 +467,7 @@ class ManifestContext:
             if mf.representation is None:
                 continue
             r = mf.representation
-            if r.encrypted != opts.encrypted:
+            if r.encrypted != self.media_encrypted:
                 continue
             if acodec in {None, 'any'} or r.codecs.startswith(acodec):
                 audio_files.append(r)
@@ -450,14 +522,14 @@ class ManifestContext:
             max_items: int | None = None) -> list[AdaptationSet]:
         opts = self.options
 
-        media_files = models.MediaFile.search(
+        media_files = self.media_index.search(
             content_type='text', stream=stream, max_items=max_items)
         text_tracks: list[Representation] = []
         for mf in media_files:
             if mf.representation is None:
                 continue
             r = mf.representation
-            if r.encrypted == opts.encrypted:
+            if r.encrypted == self.media_encrypted:
                 if opts.textCodec is None or r.codecs.startswith(
                         opts.textCodec):
                     text_tracks.append(r)
@@ -499,8 +571,8 @@ class ManifestContext:
         return result
 
     def calculate_thumbnail_adaptation_set(self, stream: models.Stream) -> AdaptationSet:
-        video_files = models.MediaFile.search(
-            content_type='video', encrypted=self.options.encrypted,
+        video_files = self.media_index.search(
+            content_type='video', encrypted=self.media_encrypted,
             stream=stream, max_items=1)
 
         thumbnail = AdaptationSet(
@@ -18,6 +18,7 @@ from dashlive.mpeg.dash.profiles import primary_profiles
 from dashlive.server.models import Stream
 from dashlive.server.manifests import DashManifest, manifest_map
 from dashlive.server.options.container import OptionsContainer
+from dashlive.server.server_timing import server_timing
 from dashlive.utils.objects import dict_to_cgi_params
 from dashlive.utils.json_object import JsonObject
 from dashlive.utils.timezone import UTC
@@ -80,16 +81,18 @@ class ServeManifest(RequestHandlerBase):
         elif mft.segment_timeline or options.patch:
             options.update(segmentTimeline=True)
         options.reset_unused_parameters(mode)
-        dash = ManifestContext(
-            manifest=mft, options=options, stream=current_stream,
-            multi_period=None)
+        with server_timing().span('context'):
+            dash = ManifestContext(
+                manifest=mft, options=options, stream=current_stream,
+                multi_period=None)
         context: ManifestTemplateContext = cast(ManifestTemplateContext, self.create_context(
             title=current_stream.title, mpd=dash, options=options,
             mode=mode, stream=current_stream))
         response = self.check_for_synthetic_manifest_error(options, context)
         if response is not None:
             return response
-        body = flask.render_template(f'manifests/{manifest}', **context)
+        with server_timing().span('render'):
+            body = flask.render_template(f'manifests/{manifest}', **context)
         try:
             max_age = int(math.floor(context["minimumUpdatePeriod"]))
         except KeyError:
@@ -146,13 +149,15 @@ class ServeMultiPeriodManifest(RequestHandlerBase):
             logging.info('Invalid CGI parameters: %s', e)
             return flask.make_response('Invalid CGI parameters', 400)
         options.segmentTimeline = True
-        dash = ManifestContext(
-            manifest=current_manifest, options=options, stream=None,
-            multi_period=current_mps)
+        with server_timing().span('context'):
+            dash = ManifestContext(
+                manifest=current_manifest, options=options, stream=None,
+                multi_period=current_mps)
         context: ManifestTemplateContext = cast(ManifestTemplateContext, self.create_context(
             title=current_mps.title, mpd=dash, options=options,
             mode=mode))
-        body = flask.render_template(f'manifests/{manifest}', **context)
+        with server_timing().span('render'):
+            body = flask.render_template(f'manifests/{manifest}', **context)
         try:
             max_age = int(math.floor(context["minimumUpdatePeriod"]))
         except KeyError:
@@ -257,15 +262,17 @@ class ServePatch(RequestHandlerBase):
         options.reset_unused_parameters('live')
         original_publish_time = datetime.datetime.fromtimestamp(
             publish, tz=UTC())
-        dash = ManifestContext(
-            manifest=mft, options=options, stream=current_stream,
-            multi_period=None)
+        with server_timing().span('context'):
+            dash = ManifestContext(
+                manifest=mft, options=options, stream=current_stream,
+                multi_period=None)
         context = cast(PatchTemplateContext, self.create_context(
             title=current_stream.title, mpd=dash, options=options,
             stream=current_stream,
             original_publish_time=original_publish_time))
 
-        body = flask.render_template(f'patches/{manifest}.xml', **context)
+        with server_timing().span('render'):
+            body = flask.render_template(f'patches/{manifest}.xml', **context)
         try:
             max_age = int(math.floor(context["minimumUpdatePeriod"]))
         except KeyError:
@@ -0,0 +1,77 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections.abc import Iterable
+
+from dashlive.server import models
+
+class MediaFileIndex:
+    """
+    All of the MediaFiles of one or more streams, loaded using a single
+    database query. The builders of each AdaptationSet select the
+    MediaFiles that they need from this index, rather than each of them
+    making its own database query.
+    """
+
+    media_files: list[models.MediaFile]
+    stream_pks: set[int]
+
+    def __init__(self, stream_pks: Iterable[int]) -> None:
+        self.stream_pks = set(stream_pks)
+        self.media_files = models.MediaFile.search_streams(self.stream_pks)
+
+    @classmethod
+    def for_stream(cls, stream: models.Stream) -> "MediaFileIndex":
+        return cls([stream.pk])
+
+    @classmethod
+    def for_multi_period(cls, multi_period: models.MultiPeriodStream) -> "MediaFileIndex":
+        return cls([prd.stream_pk for prd in multi_period.periods])
+
+    def search(self,
+               stream: models.Stream,
+               content_type: str | None = None,
+               encrypted: bool | None = None,
+               track_id: int | None = None,
+               max_items: int | None = None) -> list[models.MediaFile]:
+        """
+        Finds the MediaFiles of a stream that match all of the given values,
+        ordered by bitrate.
+        """
+        if stream.pk not in self.stream_pks:
+            raise KeyError(f'Stream {stream.directory} is not in this index')
+        result: list[models.MediaFile] = []
+        for mf in self.media_files:
+            if max_items is not None and len(result) >= max_items:
+                break
+            if mf.stream_pk != stream.pk:
+                continue
+            if content_type is not None and mf.content_type != content_type:
+                continue
+            if encrypted is not None and mf.encrypted != encrypted:
+                continue
+            if track_id is not None and mf.track_id != track_id:
+                continue
+            result.append(mf)
+        return result
+
+    def adaptation_set_media_files(self,
+                                   adp: models.AdaptationSet,
+                                   encrypted: bool | None = None) -> list[models.MediaFile]:
+        """
+        Finds the MediaFiles of an AdaptationSet of a MultiPeriodStream.
+        Provides the same results as models.AdaptationSet.media_files()
+        """
+        stream: models.Stream | None = adp.period.stream
+        if stream is None:
+            return []
+        result: list[models.MediaFile] = self.search(
+            stream, track_id=adp.track_id, encrypted=encrypted)
+        if not result and encrypted:
+            result = self.search(stream, track_id=adp.track_id, encrypted=False)
+        result.sort(key=lambda mf: mf.pk)
+        return result
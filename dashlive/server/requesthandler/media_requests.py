@@ -22,6 +22,7 @@ from dashlive.mpeg.dash.timing import DashTiming
 from dashlive.server import models
 from dashlive.server.events.factory import EventFactory
 from dashlive.server.options.container import OptionsContainer
+from dashlive.server.server_timing import server_timing
 from dashlive.utils.date_time import UTC, timedelta_to_timecode
 
 from .base import RequestHandlerBase
@@ -34,6 +35,7 @@ from .decorators import (
     current_mps
 )
 from .drm_context import DrmContext
+from .runtime_encryption import RuntimeEncryption
 from .utils import add_allowed_origins
 
 class OnDemandMedia(RequestHandlerBase):
@@ -98,7 +100,14 @@ class MediaRequestBase(RequestHandlerBase):
         if err is not None:
             return err
 
+        runtime: RuntimeEncryption | None = RuntimeEncryption.create(media, options)
+        if runtime is not None:
+            representation = runtime.representation
+
         atom: mp4.Mp4Atom = self.load_fragment(media, 0, options)
+        edit_span = server_timing().span('edit')
+        if runtime is not None:
+            runtime.encryptor.protect_init_segment(atom)
         if representation.encrypted:
             keys: dict[str, models.Key] = models.Key.get_kids(set(representation.kids))
             drms = DrmContext(current_stream, keys, options)
@@ -113,7 +122,9 @@ class MediaRequestBase(RequestHandlerBase):
                 del atom['moov.mehd']
             except KeyError:
                 pass
-        data: bytes = atom.encode_as_bytes()
+        edit_span.stop()
+        with server_timing().span('encode'):
+            data: bytes = atom.encode_as_bytes()
         headers: dict[str, str] = {
             'Accept-Ranges': 'bytes',
             'Content-Type': content_type_to_mime_type(
@@ -172,6 +183,7 @@ class MediaRequestBase(RequestHandlerBase):
         atom = self.load_fragment(
             media_file, mod_segment, options,
             parse_samples=(adp_set.content_type == 'video' and options.videoCorruption))
+        edit_span = server_timing().span('edit')
 
         moof_modified: bool = False
         traf_modified: bool = False
@@ -223,26 +235,29 @@ class MediaRequestBase(RequestHandlerBase):
         except KeyError:
             pass
 
+        emsg_data: bytes = b''
         if adp_set.content_type == 'video':
             event_generators = EventFactory.create_event_generators(options)
             if event_generators:
                 logging.debug('creating emsg boxes')
-                moof_idx = atom.index('moof')
                 for evgen in event_generators:
-                    boxes = evgen.create_emsg_boxes(
+                    emsg_data += evgen.encode_emsg_boxes(
                         moof=atom['moof'],
                         adaptation_set=adp_set,
                         segment_num=seg_num,
                         mod_segment=mod_segment,
                         representation=representation)
-                    # the emsg boxes must be inserted before the
-                    # moof box (see DASH section 5.10.3.3)
-                    for idx, emsg in enumerate(boxes):
-                        atom.children.insert(moof_idx + idx, emsg)
-                        moof_modified = True
-        if representation.encrypted:
-            traf_modified = self.update_traf_if_required(options, traf)
-            moof_modified = moof_modified or traf_modified
+                if emsg_data:
+                    moof_modified = True
+        runtime: RuntimeEncryption | None = RuntimeEncryption.create(media_file, options)
+        if runtime is not None:
+            runtime.encryptor.protect_media_segment(
+                atom, runtime.fragment_id(media_file, mod_segment))
+            traf_modified = True
+            moof_modified = True
+        if (representation.encrypted or runtime is not None) and self.update_traf_if_required(options, traf):
+            traf_modified = True
+            moof_modified = True
         if moof_modified:
             tfhd = traf.find_child('tfhd')
             if tfhd is not None:
@@ -255,8 +270,15 @@ class MediaRequestBase(RequestHandlerBase):
             if saio is not None and senc is not None:
                 # force re-calculation of SAIO offset to SENC box
                 saio.offsets = None
+        edit_span.stop()
         dest = io.BytesIO()
-        atom.encode(dest)
+        with server_timing().span('encode'):
+            if emsg_data:
+                # the emsg boxes must be inserted before the
+                # moof box (see DASH section 5.10.3.3)
+                atom.encode_with_prefix(dest, 'moof', emsg_data)
+            else:
+                atom.encode(dest)
         if media_file.content_type == 'video' and options.videoCorruption:
             self.apply_video_corruption(representation, seg_num, atom, dest, options)
         data = dest.getvalue()
@@ -303,7 +325,7 @@ class MediaRequestBase(RequestHandlerBase):
             mode='rw', lazy_load=True, bug_compatibility=options.bugCompatibility)
         if media.representation.encrypted:
             mp4_options.iv_size = media.representation.iv_size
-        with media.open_file(start=frag.pos, size=frag.size) as src:
+        with server_timing().span('load'), media.open_file(start=frag.pos, size=frag.size) as src:
             atom: mp4.Wrapper = mp4.IsoParser.load_wrapped(
                 cast(BinaryIO, src), options=mp4_options)
             if parse_samples:
@@ -0,0 +1,25 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import flask
+
+from dashlive.server.metrics import server_metrics
+
+from .base import RequestHandlerBase
+
+class MetricsHandler(RequestHandlerBase):
+    """
+    Returns the server metrics, using the Prometheus text format
+    """
+
+    def get(self) -> flask.Response:
+        headers = {
+            'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+            'Cache-Control': 'no-cache',
+        }
+        return flask.make_response((server_metrics.to_prometheus(), 200, headers))
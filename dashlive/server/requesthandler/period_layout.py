@@ -0,0 +1,113 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import bisect
+import datetime
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from dashlive.mpeg.dash.representation import Representation
+from dashlive.server import models
+
+from .media_file_index import MediaFileIndex
+
+class LayoutPeriod(NamedTuple):
+    index: int
+    loop: int
+    start: datetime.timedelta
+    period: models.Period
+
+
+class PeriodLayout:
+    """
+    The timeline of the Periods of a MultiPeriodStream. The start of each
+    Period is calculated once, allowing the Periods that are visible in
+    a live manifest to be found without stepping through every Period
+    since the availability start time. The Representations of each
+    Period are only looked up the first time that Period is used.
+    """
+
+    periods: list[models.Period]
+    ends: list[datetime.timedelta]
+    duration: datetime.timedelta
+    encrypted: bool
+    media_index: MediaFileIndex
+    _representations: dict[int, list[tuple[models.AdaptationSet, list[Representation]]]]
+
+    def __init__(self,
+                 multi_period: models.MultiPeriodStream,
+                 encrypted: bool,
+                 media_index: MediaFileIndex | None = None) -> None:
+        self.periods = list(multi_period.periods)
+        self.ends = []
+        self.duration = datetime.timedelta(0)
+        for prd in self.periods:
+            self.duration += prd.duration
+            self.ends.append(self.duration)
+        self.encrypted = encrypted
+        if media_index is None:
+            media_index = MediaFileIndex.for_multi_period(multi_period)
+        self.media_index = media_index
+        self._representations = {}
+
+    def start_of(self, index: int) -> datetime.timedelta:
+        """
+        Start of a Period, relative to the start of a loop of the stream
+        """
+        if index == 0:
+            return datetime.timedelta(0)
+        return self.ends[index - 1]
+
+    def visible_periods(self,
+                        first_available: datetime.timedelta,
+                        elapsed: datetime.timedelta) -> Iterator[LayoutPeriod]:
+        """
+        Yields every Period that contains at least some of the
+        time range first_available to elapsed, as the stream loops
+        """
+        if not self.periods or self.duration <= datetime.timedelta(0):
+            return
+        loop = int(first_available.total_seconds() // self.duration.total_seconds())
+        loop_start: datetime.timedelta = self.duration * loop
+        index: int = bisect.bisect_left(self.ends, first_available - loop_start)
+        if index == len(self.periods):
+            index = 0
+            loop += 1
+            loop_start += self.duration
+        start: datetime.timedelta = loop_start + self.start_of(index)
+        while start <= elapsed:
+            prd: models.Period = self.periods[index]
+            yield LayoutPeriod(index=index, loop=loop, start=start, period=prd)
+            start += prd.duration
+            index += 1
+            if index == len(self.periods):
+                index = 0
+                loop += 1
+
+    def representations(
+            self,
+            db_period: models.Period
+    ) -> list[tuple[models.AdaptationSet, list[Representation]]]:
+        """
+        Returns the Representations of each AdaptationSet in the given Period
+        """
+        try:
+            return self._representations[db_period.pk]
+        except KeyError:
+            pass
+        result: list[tuple[models.AdaptationSet, list[Representation]]] = []
+        for adp in db_period.adaptation_sets:
+            reps: list[Representation] = []
+            for mf in self.media_index.adaptation_set_media_files(adp, encrypted=self.encrypted):
+                if mf.representation is None:
+                    mf.parse_media_file()
+                if mf.representation is None:
+                    continue
+                reps.append(mf.representation)
+            result.append((adp, reps,))
+        self._representations[db_period.pk] = result
+        return result
@@ -0,0 +1,97 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import datetime
+import logging
+from pathlib import Path
+from typing import cast
+
+import flask
+
+from dashlive.server.profiler import ProfilerSession, ProfileSummary, request_profiler
+from dashlive.server.routes import routes
+from dashlive.utils.timezone import UTC
+
+from .base import HTMLHandlerBase, RequestHandlerBase
+from .decorators import login_required
+from .exceptions import CsrfFailureException
+from .template_context import TemplateContext
+
+class ProfilesTemplateContext(TemplateContext):
+    csrf_token: str
+    expires: datetime.datetime | None
+    handlers: list[str]
+    profiles: list[ProfileSummary]
+    session: ProfilerSession | None
+
+class ListProfiles(HTMLHandlerBase):
+    """
+    Admin page to start a profiling session and to download the
+    collected profiles
+    """
+    decorators = [login_required(html=True, admin=True)]
+
+    def get(self) -> flask.Response:
+        csrf_key = self.generate_csrf_cookie()
+        session: ProfilerSession | None = None
+        expires: datetime.datetime | None = None
+        if request_profiler.is_active():
+            session = request_profiler.session
+            expires = datetime.datetime.fromtimestamp(session.expires, tz=UTC())
+        handlers: set[str] = {
+            rt.handler.rsplit('.', 1)[-1] for rt in routes.values()}
+        context = cast(ProfilesTemplateContext, self.create_context(
+            csrf_token=self.generate_csrf_token('profiler', csrf_key),
+            expires=expires,
+            handlers=sorted(handlers),
+            profiles=request_profiler.list_profiles(),
+            session=session))
+        return flask.render_template('profiles.html', **context)
+
+    def post(self) -> flask.Response:
+        try:
+            self.check_csrf('profiler', flask.request.form)
+        except (ValueError, CsrfFailureException) as err:
+            logging.warning('CSRF failure: %s', err)
+            return flask.make_response(('CSRF failure', 400))
+        action: str = flask.request.form.get('action', '')
+        if action == 'start':
+            try:
+                duration = int(flask.request.form.get('duration', '60'), 10)
+            except ValueError:
+                flask.flash('Invalid profiling duration', 'error')
+                return flask.redirect(flask.url_for('list-profiles'))
+            request_profiler.start(
+                duration, handler=flask.request.form.get('handler', ''),
+                match=flask.request.form.get('match', '').strip())
+            flask.flash('Started profiling session', 'success')
+        elif action == 'stop':
+            request_profiler.stop()
+            flask.flash('Stopped profiling session', 'success')
+        elif action == 'clear':
+            request_profiler.clear()
+            flask.flash('Deleted all profiles', 'success')
+        else:
+            return flask.make_response(('Unknown action', 400))
+        return flask.redirect(flask.url_for('list-profiles'))
+
+
+class DownloadProfile(RequestHandlerBase):
+    """
+    Download one aggregated cProfile file, for use with the
+    pstats module or tools such as snakeviz
+    """
+    decorators = [login_required(admin=True)]
+
+    def get(self, fingerprint: str) -> flask.Response:
+        filename: Path | None = request_profiler.profile_filename(fingerprint)
+        if filename is None:
+            return flask.make_response(('Profile not found', 404))
+        return flask.send_file(
+            filename, mimetype='application/octet-stream', as_attachment=True,
+            download_name=filename.name, max_age=0)
@@ -0,0 +1,174 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections.abc import Callable, Iterable
+import logging
+import threading
+from typing import NamedTuple, cast
+
+from dashlive.drm.key_tuple import KeyTuple
+from dashlive.drm.sample_encryptor import (
+    EncryptionScheme,
+    SampleEncryptor,
+    encrypted_fragment_cache
+)
+from dashlive.mpeg.dash.representation import Representation
+from dashlive.server import models
+from dashlive.server.models.commit_invalidation import (
+    invalidate_on_commit,
+    transaction_generation
+)
+from dashlive.server.options.container import OptionsContainer
+
+RUNTIME_KEY_CACHE_NAME: str = 'runtime_key'
+
+class RuntimeKeyCache:
+    """
+    The key used to encrypt the clear media of each stream, indexed by
+    the primary key of the stream. The cache is invalidated when a
+    transaction that modifies a Key or MediaFile is committed.
+    """
+
+    generation: int
+    keys: dict[int, KeyTuple | None]
+    lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.keys = {}
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, stream_pk: int) -> KeyTuple | None:
+        """
+        Returns the key of the given stream, or raises KeyError if the
+        stream is not in the cache
+        """
+        with self.lock:
+            return self.keys[stream_pk]
+
+    def put(self, stream_pk: int, key: KeyTuple | None, generation: int) -> None:
+        with self.lock:
+            if generation == self.generation:
+                self.keys[stream_pk] = key
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.keys.clear()
+            self.generation += 1
+
+
+runtime_key_cache = RuntimeKeyCache()
+
+invalidate_on_commit(
+    RUNTIME_KEY_CACHE_NAME, runtime_key_cache, (models.Key, models.MediaFile))
+
+class RuntimeEncryption(NamedTuple):
+    """
+    The values needed to encrypt a clear MediaFile when it is requested
+    """
+    encryptor: SampleEncryptor
+    key: KeyTuple
+    representation: Representation
+
+    @classmethod
+    def create(cls,
+               media: models.MediaFile,
+               options: OptionsContainer) -> "RuntimeEncryption | None":
+        """
+        Returns a RuntimeEncryption if the given MediaFile needs to be
+        encrypted, based upon the given options.
+        """
+        if media.encrypted or media.content_type not in {'audio', 'video'}:
+            return None
+        scheme: EncryptionScheme | None = runtime_encryption_scheme(options)
+        if scheme is None:
+            return None
+        rep: Representation | None = media.representation
+        if rep is None:
+            return None
+        key: KeyTuple | None = stream_runtime_key(
+            media.stream_pk, lambda: models.MediaFile.search(
+                stream=media.stream, encrypted=True,
+                order_by=[models.MediaFile.bitrate, models.MediaFile.pk]))
+        if key is None:
+            logging.warning('No keys available to encrypt %s', media.name)
+            return None
+        encryptor = SampleEncryptor(
+            scheme, kid=key.KID, key=key.KEY, codecs=rep.codecs,
+            content_type=media.content_type,
+            nal_length_size=rep.nalLengthFieldLength,
+            cache=encrypted_fragment_cache)
+        return RuntimeEncryption(
+            encryptor=encryptor, key=key,
+            representation=runtime_encrypted_representation(rep, key, scheme))
+
+    def fragment_id(self, media: models.MediaFile, seg_index: int) -> str:
+        sha1_hash: str = '' if media.blob is None else media.blob.sha1_hash
+        return f'{media.pk}:{sha1_hash}:{seg_index}'
+
+
+def runtime_encryption_scheme(options: OptionsContainer) -> EncryptionScheme | None:
+    """
+    The scheme to use to encrypt clear media, or None if clear media
+    is not to be encrypted
+    """
+    if not options.encrypted or not options.encryptionScheme:
+        return None
+    try:
+        return EncryptionScheme.from_string(options.encryptionScheme)
+    except KeyError:
+        logging.warning('Unsupported encryption scheme "%s"', options.encryptionScheme)
+        return None
+
+
+def stream_runtime_key(stream_pk: int,
+                       encrypted_media: Callable[[], Iterable[models.MediaFile]]
+                       ) -> KeyTuple | None:
+    """
+    Returns the key used to encrypt the clear media of a stream, using
+    runtime_key_cache to avoid selecting the key for every request.
+    encrypted_media is only called if the stream is not in the cache.
+    """
+    generation: int = transaction_generation(
+        models.db.session, RUNTIME_KEY_CACHE_NAME, runtime_key_cache)
+    try:
+        return runtime_key_cache.get(stream_pk)
+    except KeyError:
+        pass
+    key: KeyTuple | None = select_runtime_key(encrypted_media())
+    runtime_key_cache.put(stream_pk, key, generation)
+    return key
+
+
+def select_runtime_key(encrypted_media: Iterable[models.MediaFile]) -> KeyTuple | None:
+    """
+    Selects the key used to encrypt clear media of a stream. The key of
+    the stream's encrypted media is used if available, otherwise the
+    first key in the database.
+    """
+    for mf in encrypted_media:
+        if mf.encryption_keys:
+            key: models.Key = min(mf.encryption_keys, key=lambda ky: ky.hkid)
+            return KeyTuple(KID=key.KID, KEY=key.KEY, ALG=key.ALG)
+    for key in models.Key.search(max_items=1, order_by=[models.Key.pk]):
+        return KeyTuple(KID=key.KID, KEY=key.KEY, ALG=key.ALG)
+    return None
+
+
+def runtime_encrypted_representation(rep: Representation,
+                                     key: KeyTuple,
+                                     scheme: EncryptionScheme) -> Representation:
+    """
+    Creates a copy of a clear Representation that describes the result
+    of encrypting it using the given key.
+    """
+    result: Representation = cast(Representation, rep.clone())
+    result.encrypted = True
+    result.kids = [key.KID]
+    result.default_kid = key.KID.hex
+    result.iv_size = 16 if scheme == EncryptionScheme.CENC else 0
+    return result
@@ -23,6 +23,7 @@ from dashlive.mpeg.dash.adaptation_set import AdaptationSet
 from dashlive.server import models
 from dashlive.server.manifests import default_manifest
 from dashlive.server.models.key import KeyJson
+from dashlive.server.models.stream import StreamTrackSummary
 from dashlive.server.models.token import EncodedJWToken
 from dashlive.server.options.container import OptionsContainer
 from dashlive.server.options.drm_options import DrmSelection
@@ -47,12 +48,14 @@ class ListStreamsTemplateContext(TemplateContext):
     drm: dict[str, DrmLicenseContext]
     keys: list[models.Key]
     streams: list[models.Stream]
+    track_summaries: dict[int, StreamTrackSummary]
     user_can_modify: bool
 
 class ListStreamsJson(TypedDict):
     csrf_tokens: CsrfTokenCollection
     keys: list[KeyJson]
     streams: list[JsonObject]
+    next: NotRequired[int]
 
 class ListStreams(HTMLHandlerBase):
     """
@@ -76,29 +79,13 @@ class ListStreams(HTMLHandlerBase):
             upload=upload)
 
         keys: list[models.Key] = models.Key.all(order_by=[models.Key.hkid])  # pyright: ignore[reportArgumentType]
-        streams: list[models.Stream] = models.Stream.all()
 
         if is_ajax():
-            exclude: set[str] = set()
-            if not current_user.has_permission(models.Group.MEDIA):
-                exclude.add('key')
-            result: ListStreamsJson = {
-                'keys': [
-                    k.toJSON(pure=True, exclude=exclude) for k in keys
-                ],
-                'csrf_tokens': csrf_tokens,
-                'streams': [],
-            }
-            for stream in streams:
-                jss: JsonObject = stream.to_dict(with_collections=True)
-                jss['duration'] = stream.duration()
-                media_files: list[JsonObject] = []
-                for mf in stream.media_files:
-                    media_files.append(mf.to_dict(with_collections=False, exclude={'rep', 'blob'}))
-                jss['media_files'] = media_files
-                result['streams'].append(jss)
-            return jsonify(result)
+            return self.get_json(keys, csrf_tokens)
 
+        streams: list[models.Stream] = models.Stream.get_page(with_media_files=True)
+        track_summaries: dict[int, StreamTrackSummary] = models.Stream.track_summaries(
+            [st.pk for st in streams])
         context: ListStreamsTemplateContext = cast(ListStreamsTemplateContext, self.create_context(
             csrf_tokens=csrf_tokens,
             drm={
@@ -108,9 +95,100 @@ class ListStreams(HTMLHandlerBase):
             keys=keys,
             streams=streams,
             title='All DASH streams',
+            track_summaries=track_summaries,
             user_can_modify=user_can_modify))
         return flask.render_template('media/index.html', **context)
 
+    def get_json(self,
+                 keys: list[models.Key],
+                 csrf_tokens: CsrfTokenCollection) -> flask.Response:
+        """
+        Get list of streams as JSON. The optional "limit" and "after"
+        query parameters select one page of streams, and the optional
+        "fields" query parameter selects which properties of each stream
+        are included in the response.
+        """
+        try:
+            after: int | None = self.get_int_argument('after')
+            limit: int | None = self.get_int_argument('limit')
+            fields: set[str] = self.get_stream_fields()
+        except ValueError as err:
+            return jsonify({'error': f'{err}'}, 400)
+
+        page_size: int | None = None
+        if limit is not None:
+            # fetch one extra stream to find out if there is another page
+            page_size = limit + 1
+        streams: list[models.Stream] = models.Stream.get_page(
+            after=after, limit=page_size,
+            with_media_files=bool(fields & {'duration', 'media_files'}))
+        next_pk: int | None = None
+        if limit is not None and len(streams) > limit:
+            streams = streams[:limit]
+            next_pk = streams[-1].pk
+        track_summaries: dict[int, StreamTrackSummary] = {}
+        if 'tracks' in fields:
+            track_summaries = models.Stream.track_summaries([st.pk for st in streams])
+
+        exclude: set[str] = set()
+        if not current_user.has_permission(models.Group.MEDIA):
+            exclude.add('key')
+        result: ListStreamsJson = {
+            'keys': [
+                k.toJSON(pure=True, exclude=exclude) for k in keys
+            ],
+            'csrf_tokens': csrf_tokens,
+            'streams': [],
+        }
+        if next_pk is not None:
+            result['next'] = next_pk
+        for stream in streams:
+            jss: JsonObject = stream.to_dict(with_collections=True, only=fields)
+            if 'duration' in fields:
+                jss['duration'] = stream.duration()
+            if 'media_files' in fields:
+                media_files: list[JsonObject] = []
+                for mf in stream.media_files:
+                    media_files.append(mf.to_dict(with_collections=False, exclude={'rep', 'blob'}))
+                jss['media_files'] = media_files
+            if 'tracks' in fields:
+                summary = track_summaries[stream.pk]
+                jss['tracks'] = {ts.content_type: ts.count for ts in summary}
+            result['streams'].append(jss)
+        return jsonify(result)
+
+    @staticmethod
+    def get_int_argument(name: str) -> int | None:
+        value: str | None = flask.request.args.get(name)
+        if value is None or value == '':
+            return None
+        try:
+            rv = int(value, 10)
+        except ValueError:
+            raise ValueError(f'Invalid {name} parameter "{value}"')
+        if rv < 0 or (name == 'limit' and rv == 0):
+            raise ValueError(f'Invalid {name} parameter "{value}"')
+        return rv
+
+    @staticmethod
+    def get_stream_fields() -> set[str]:
+        """
+        Returns the set of stream properties to include in the JSON
+        response. By default, all properties other than "tracks" are
+        included.
+        """
+        columns: list[str] = models.Stream.get_column_names(with_collections=False)
+        all_fields: set[str] = set(columns) | {'duration', 'media_files', 'tracks'}
+        value: str | None = flask.request.args.get('fields')
+        if not value:
+            return all_fields - {'tracks'}
+        fields: set[str] = {f.strip() for f in value.split(',') if f.strip()}
+        unknown: set[str] = fields - all_fields
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+        fields.add('pk')
+        return fields
+
 
 class AddStreamTemplateContext(TemplateContext):
     csrf_token: str
@@ -12,9 +12,10 @@ import logging
 from logging.handlers import QueueHandler, QueueListener
 import tempfile
 import time
-from typing import Optional, TypedDict
+from typing import TYPE_CHECKING, Optional, TypedDict
 
 import flask
+from flask_login import current_user
 from flask_socketio import SocketIO
 
 from dashlive.utils.json_object import JsonObject
@@ -23,6 +24,7 @@ from dashlive.management.backend_db import BackendDatabaseAccess
 from dashlive.mpeg.dash.validator.concurrent_pool import ConcurrentWorkerPool
 from dashlive.mpeg.dash.validator.options import ValidatorOptions
 from dashlive.mpeg.dash.validator.basic import BasicDashValidator
+from dashlive.mpeg.dash.validator.http_client import HttpClient
 from dashlive.mpeg.dash.validator.pool import WorkerPool
 from dashlive.mpeg.dash.validator.progress import Progress
 from dashlive.mpeg.dash.validator.requests_http_client import RequestsHttpClient
@@ -30,9 +32,14 @@ from dashlive.mpeg.dash.validator.validation_flag import ValidationFlag
 from dashlive.server.models import Stream
 from dashlive.server.asyncio_loop import AsyncioLoop
 from dashlive.server.thread_pool import pool_executor
+from dashlive.server.wsgi_http_client import WsgiHttpClient
 
+from .ws_emitter import CoalescingEmitter
 from .ws_log_handler import WebsocketLogHandler
 
+if TYPE_CHECKING:
+    from dashlive.server.validator_worker import ValidatorWorker
+
 class ValidatorSettings(TypedDict):
     duration: int
     encrypted: bool
@@ -47,10 +54,13 @@ class ValidatorSettings(TypedDict):
 
 class ClientConnection(Progress):
     _aborted: bool
+    app: flask.Flask | None
     dash_log: logging.Logger
+    emitter: CoalescingEmitter
     last_pct: int = 0
     listener: QueueListener
     loop: AsyncioLoop
+    origin: str | None
     pool: ConcurrentWorkerPool
     queue_handler: QueueHandler
     session_id: str
@@ -59,12 +69,16 @@ class ClientConnection(Progress):
     tmpdir: Optional[tempfile.TemporaryDirectory] = None
     upload_dir: str
 
-    def __init__(self, loop: AsyncioLoop, sockio: SocketIO, session_id: str, upload_dir: str) -> None:
+    def __init__(self, loop: AsyncioLoop, sockio: SocketIO, session_id: str, upload_dir: str,
+                 app: flask.Flask | None = None, origin: str | None = None) -> None:
         super().__init__()
+        self.app = app
+        self.origin = origin
         self.loop = loop
         self.sockio = sockio
         self.session_id = session_id
         self.upload_dir = upload_dir
+        self.emitter = CoalescingEmitter(sockio, session_id)
         self.dash_log = logging.getLogger('DashValidator')
         self.dash_log.propagate = False
         self._aborted = False
@@ -73,7 +87,7 @@ class ClientConnection(Progress):
         log_queue = queue.Queue(-1)
         self.queue_handler = QueueHandler(log_queue)
         self.dash_log.addHandler(self.queue_handler)
-        self.listener = QueueListener(log_queue, WebsocketLogHandler(sockio, session_id))
+        self.listener = QueueListener(log_queue, WebsocketLogHandler(self.emitter))
         self.listener.start()
 
     def shutdown(self) -> None:
@@ -85,6 +99,7 @@ class ClientConnection(Progress):
         if self.queue_handler:
             self.dash_log.removeHandler(self.queue_handler)
             self.queue_handler = None
+        self.emitter.flush()
         # if self.tmpdir:
         #     shutil.rmtree(self.tmpdir, ignore_errors=True)
         self.tmpdir = None
@@ -116,11 +131,11 @@ class ClientConnection(Progress):
             }, to=self.session_id)
 
     def emit(self, cmd: str, data: JsonObject) -> None:
-        self.sockio.emit(cmd, data, to=self.session_id)
+        self.emitter.emit(cmd, data)
 
     def send_progress(self, pct: float, text: str) -> None:
         self.last_pct = pct
-        self.emit('progress', {
+        self.emitter.progress({
             'pct': round(pct),
             'text': text,
             'aborted': self._aborted,
@@ -195,7 +210,13 @@ class ClientConnection(Progress):
             self.dash_log.setLevel(logging.INFO)
         if not media:
             opts.verify &= ~ValidationFlag.MEDIA
-        dv = BasicDashValidator(manifest, options=opts, http_client=RequestsHttpClient(opts))
+        http_client: HttpClient = RequestsHttpClient(opts)
+        if self.app is not None and self.origin is not None:
+            # streams served by this server are fetched without using the network
+            http_client = WsgiHttpClient(
+                self.app, origins=[self.origin], fallback=http_client, pool=pool,
+                log=self.dash_log)
+        dv = BasicDashValidator(manifest, options=opts, http_client=http_client)
         try:
             if not await dv.load():
                 self.dash_log.error('loading manifest failed')
@@ -279,19 +300,33 @@ class WebsocketHandler:
     loop: AsyncioLoop
     sockio: SocketIO
     clients: dict[str, ClientConnection]
+    worker: Optional["ValidatorWorker"]
 
-    def __init__(self, loop: AsyncioLoop, sockio: SocketIO) -> None:
+    def __init__(self, loop: AsyncioLoop, sockio: SocketIO,
+                 worker: Optional["ValidatorWorker"] = None) -> None:
         self.loop = loop
         self.sockio = sockio
         self.clients = {}
+        self.worker = worker
 
     def connect(self) -> None:
         logging.debug('WebSocket connection %s', flask.request.sid)
+        if self.worker is not None:
+            username: str | None = None
+            if current_user.is_authenticated:
+                username = current_user.username
+            self.worker.connect(flask.request.sid, flask.request.host_url, username)
+            return
         upload_dir: str = flask.current_app.config['UPLOAD_FOLDER']
-        con = ClientConnection(self.loop, self.sockio, flask.request.sid, upload_dir)
+        con = ClientConnection(
+            self.loop, self.sockio, flask.request.sid, upload_dir,
+            app=flask.current_app._get_current_object(), origin=flask.request.host_url)
         self.clients[flask.request.sid] = con
 
     def disconnect(self) -> None:
+        if self.worker is not None:
+            self.worker.disconnect(flask.request.sid)
+            return
         try:
             con: ClientConnection = self.clients[flask.request.sid]
             con.shutdown()
@@ -309,6 +344,9 @@ class WebsocketHandler:
                 "test": 'Invalid request - no method',
             }, to=flask.request.sid)
             return
+        if self.worker is not None:
+            self.worker.send(flask.request.sid, data)
+            return
         if 'websock_connection' not in flask.g:
             try:
                 con: ClientConnection = self.clients[flask.request.sid]
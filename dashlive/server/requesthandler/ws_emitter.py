@@ -0,0 +1,153 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections import deque
+import threading
+import time
+from typing import NamedTuple
+
+from flask_socketio import SocketIO
+
+from dashlive.utils.json_object import JsonObject
+
+class EmitterSettings(NamedTuple):
+    # maximum number of progress messages per second
+    max_progress_rate: float = 10.0
+    # minimum time (in seconds) between log-batch messages
+    log_interval: float = 0.25
+    # maximum number of log lines in each log-batch message
+    log_batch_size: int = 100
+    # maximum number of log lines waiting to be sent
+    max_pending_logs: int = 1000
+
+
+class CoalescingEmitter:
+    """
+    Reduces the number of socket.io messages sent to a client. Only the
+    most recent progress update is sent, at most max_progress_rate times
+    per second. Log lines are sent in "log-batch" messages, at most one
+    message every log_interval seconds. If log lines are produced faster
+    than they can be sent, the oldest lines are dropped and the number of
+    dropped lines is included in the next "log-batch" message.
+    """
+
+    dropped_logs: int
+    logs: deque[JsonObject]
+    lock: threading.Lock
+    last_progress: float
+    progress_data: JsonObject | None
+    session_id: str
+    settings: EmitterSettings
+    sockio: SocketIO
+    timer: threading.Timer | None
+
+    def __init__(self, sockio: SocketIO, session_id: str,
+                 settings: EmitterSettings | None = None) -> None:
+        if settings is None:
+            settings = EmitterSettings()
+        self.sockio = sockio
+        self.session_id = session_id
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.logs = deque(maxlen=settings.max_pending_logs)
+        self.dropped_logs = 0
+        self.progress_data = None
+        self.last_progress = 0
+        self.timer = None
+
+    def progress(self, data: JsonObject) -> None:
+        """
+        Sends a progress update. If the previous progress message was sent
+        too recently, this update replaces any update that is waiting to
+        be sent.
+        """
+        with self.lock:
+            self.progress_data = data
+            delay: float = self.last_progress + 1.0 / self.settings.max_progress_rate - time.monotonic()
+            if delay > 0:
+                self._start_timer(delay)
+                return
+            self._send(self._take_progress())
+
+    def log(self, level: str, text: str) -> None:
+        """
+        Adds a log line to the next log-batch message
+        """
+        with self.lock:
+            if len(self.logs) == self.logs.maxlen:
+                self.dropped_logs += 1
+            self.logs.append({
+                'level': level,
+                'text': text,
+            })
+            self._start_timer(self.settings.log_interval)
+
+    def emit(self, cmd: str, data: JsonObject) -> None:
+        """
+        Sends a message immediately, after sending any waiting log lines
+        and progress update, so that the client receives messages in the
+        order that they were created.
+        """
+        with self.lock:
+            self._flush()
+            self._send([(cmd, data)])
+
+    def flush(self) -> None:
+        """
+        Sends all waiting log lines and progress update
+        """
+        with self.lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        messages = self._take_logs()
+        while self.logs:
+            messages += self._take_logs()
+        self._send(messages + self._take_progress())
+
+    def _on_timer(self) -> None:
+        with self.lock:
+            self.timer = None
+            self._send(self._take_logs() + self._take_progress())
+            if self.logs:
+                self._start_timer(self.settings.log_interval)
+
+    def _start_timer(self, delay: float) -> None:
+        if self.timer is not None:
+            return
+        self.timer = threading.Timer(delay, self._on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _take_logs(self) -> list[tuple[str, JsonObject]]:
+        if not self.logs and self.dropped_logs == 0:
+            return []
+        entries: list[JsonObject] = []
+        while self.logs and len(entries) < self.settings.log_batch_size:
+            entries.append(self.logs.popleft())
+        batch: JsonObject = {
+            'entries': entries,
+            'dropped': self.dropped_logs,
+        }
+        self.dropped_logs = 0
+        return [('log-batch', batch)]
+
+    def _take_progress(self) -> list[tuple[str, JsonObject]]:
+        if self.progress_data is None:
+            return []
+        data: JsonObject = self.progress_data
+        self.progress_data = None
+        self.last_progress = time.monotonic()
+        return [('progress', data)]
+
+    def _send(self, messages: list[tuple[str, JsonObject]]) -> None:
+        # called with self.lock held, so that messages are never re-ordered
+        for cmd, data in messages:
+            self.sockio.emit(cmd, data, to=self.session_id)
@@ -7,20 +7,15 @@
 #############################################################################
 import logging
 
-from flask_socketio import SocketIO
+from .ws_emitter import CoalescingEmitter
 
 class WebsocketLogHandler(logging.Handler):
-    sock: SocketIO
-    session_id: str
+    emitter: CoalescingEmitter
 
-    def __init__(self, sock: SocketIO, session_id: str, level=logging.NOTSET) -> None:
+    def __init__(self, emitter: CoalescingEmitter, level=logging.NOTSET) -> None:
         super().__init__(level)
-        self.sock = sock
-        self.session_id = session_id
+        self.emitter = emitter
 
     def emit(self, record: logging.LogRecord) -> None:
         msg: str = record.getMessage()
-        self.sock.emit('log', {
-            'level': record.levelname.lower(),
-            'text': msg
-        }, to=self.session_id)
+        self.emitter.log(record.levelname.lower(), msg)
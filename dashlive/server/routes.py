@@ -209,6 +209,20 @@ routes: dict[str, Route] = {
         r'/streams',
         handler='streams.ListStreams',
         title='Available DASH streams'),
+    "list-profiles": Route(
+        r'/profiles',
+        handler='profiler.ListProfiles',
+        title='Request profiles',
+        parent='home'),
+    "download-profile": Route(
+        r'/profiles/<regex("[\w-]+"):fingerprint>.prof',
+        handler='profiler.DownloadProfile',
+        title='Download request profile',
+        parent='list-profiles'),
+    "metrics": Route(
+        r'/metrics',
+        handler='metrics.MetricsHandler',
+        title='Server metrics'),
     "time": Route(
         r'/time/<regex("(head|xsd|iso|http-ntp)"):method>',
         handler='utctime.UTCTimeHandler',
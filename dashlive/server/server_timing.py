@@ -0,0 +1,169 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import time
+from typing import ClassVar
+
+import flask
+
+from dashlive.server.models.db import QueryStats
+from dashlive.server.query_stats import request_query_stats
+
+class TimingSpan:
+    """
+    Measures the duration of one stage of a request. It can be used as
+    a context manager, or by calling stop() when the stage has completed.
+    """
+    __slots__ = ('_name', '_start', '_timing')
+
+    def __init__(self, timing: "ServerTiming", name: str) -> None:
+        self._timing = timing
+        self._name = name
+        self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._start is None:
+            return
+        self._timing.add(self._name, time.perf_counter() - self._start)
+        self._start = None
+
+    def __enter__(self) -> "TimingSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+class NullTimingSpan(TimingSpan):
+    def __init__(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class ServerTiming:
+    """
+    Collects the duration of each stage of a request, for use in
+    the Server-Timing HTTP response header.
+    Spans with the same name are added together.
+    """
+    DESCRIPTIONS: ClassVar[dict[str, str]] = {
+        'context': 'ManifestContext',
+        'db': 'DB lookup',
+        'edit': 'Atom edit',
+        'encode': 'Encode',
+        'load': 'Fragment load',
+        'options': 'calculate_options',
+        'render': 'Template render',
+        'total': 'Total',
+    }
+
+    __slots__ = ('created', 'descriptions', 'spans')
+
+    created: float
+    descriptions: dict[str, str]
+    spans: dict[str, float]
+
+    def __init__(self) -> None:
+        self.created = time.perf_counter()
+        self.descriptions = {}
+        self.spans = {}
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def span(self, name: str) -> TimingSpan:
+        """
+        Start measuring a stage of this request
+        """
+        return TimingSpan(self, name)
+
+    def add(self, name: str, duration: float) -> None:
+        """
+        Add a stage duration (in seconds)
+        """
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def add_description(self, name: str, description: str) -> None:
+        """
+        Replace the default description of a stage
+        """
+        self.descriptions[name] = description
+
+    def header_value(self) -> str:
+        items: list[str] = []
+        spans = {**self.spans, 'total': time.perf_counter() - self.created}
+        for name, duration in spans.items():
+            item = f'{name};dur={1000.0 * duration:.3f}'
+            desc: str | None = self.descriptions.get(name, self.DESCRIPTIONS.get(name))
+            if desc is not None:
+                item += f';desc="{desc}"'
+            items.append(item)
+        return ', '.join(items)
+
+
+class NullServerTiming(ServerTiming):
+    """
+    Used when Server-Timing is not enabled for the current request
+    """
+
+    _NULL_SPAN: ClassVar[TimingSpan] = NullTimingSpan()
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def span(self, name: str) -> TimingSpan:
+        return self._NULL_SPAN
+
+    def add(self, name: str, duration: float) -> None:
+        pass
+
+    def add_description(self, name: str, description: str) -> None:
+        pass
+
+
+NULL_SERVER_TIMING = NullServerTiming()
+
+def server_timing() -> ServerTiming:
+    """
+    Returns the ServerTiming object for the current request. If
+    Server-Timing is not enabled, a ServerTiming object that
+    discards all spans is returned.
+    """
+    if not flask.has_request_context():
+        return NULL_SERVER_TIMING
+    return flask.g.get('server_timing', NULL_SERVER_TIMING)
+
+def start_server_timing() -> None:
+    if (
+            flask.current_app.config.get('SERVER_TIMING', False) or
+            flask.request.args.get('timing', '0') == '1'):
+        flask.g.server_timing = ServerTiming()
+
+def add_server_timing_header(response: flask.Response) -> flask.Response:
+    timing: ServerTiming | None = flask.g.get('server_timing', None)
+    if timing is not None:
+        queries: QueryStats = request_query_stats()
+        if queries.count:
+            timing.add('db', queries.duration)
+            timing.add_description('db', f'{queries.count} DB queries')
+        response.headers['Server-Timing'] = timing.header_value()
+    return response
+
+def init_server_timing(app: flask.Flask) -> None:
+    """
+    Enable support for the Server-Timing HTTP response header.
+    The header is added if either the app config SERVER_TIMING is
+    True or if the request has a "timing=1" CGI parameter.
+    All database queries made by a request are included in the "db" span.
+    """
+    app.before_request(start_server_timing)
+    app.after_request(add_server_timing_header)
@@ -0,0 +1,314 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections import deque
+import logging
+import multiprocessing
+from multiprocessing.context import SpawnProcess
+from multiprocessing.queues import Queue as ProcessQueue
+import queue
+import threading
+from typing import NamedTuple
+
+import flask
+from flask_login import login_user
+from flask_socketio import SocketIO
+
+from dashlive.server.asyncio_loop import AsyncLoopOwner
+from dashlive.server.folders import AppFolders
+from dashlive.server.models.user import User
+from dashlive.server.requesthandler.websocket import ClientConnection
+from dashlive.utils.json_object import JsonObject
+
+class WorkerCommand(NamedTuple):
+    # one of "connect", "cmd" or "disconnect"
+    action: str
+    session_id: str
+    data: JsonObject | None = None
+
+
+class WorkerEvent(NamedTuple):
+    session_id: str
+    cmd: str
+    data: JsonObject
+
+
+class QueueSocket:
+    """
+    Provides the emit() function of SocketIO, sending each message to a queue
+    """
+
+    events: queue.Queue | ProcessQueue
+
+    def __init__(self, events: queue.Queue | ProcessQueue) -> None:
+        self.events = events
+
+    def emit(self, cmd: str, data: JsonObject, to: str) -> None:
+        self.events.put(WorkerEvent(session_id=to, cmd=cmd, data=data))
+
+
+class WorkerSession(NamedTuple):
+    connection: ClientConnection
+    origin: str
+    username: str | None
+
+
+class JobRunner:
+    """
+    Runs the commands of each websocket session inside the validator
+    worker process. At most max_jobs validations are run at the same time,
+    any others wait in a queue of up to queue_size jobs.
+    """
+
+    app: flask.Flask
+    loop: AsyncLoopOwner
+    max_jobs: int
+    pending: deque[tuple[str, JsonObject]]
+    queue_size: int
+    sessions: dict[str, WorkerSession]
+    sockio: QueueSocket
+
+    def __init__(self, app: flask.Flask, loop: AsyncLoopOwner,
+                 events: queue.Queue | ProcessQueue,
+                 max_jobs: int = 2, queue_size: int = 8) -> None:
+        self.app = app
+        self.loop = loop
+        self.sockio = QueueSocket(events)
+        self.max_jobs = max_jobs
+        self.queue_size = queue_size
+        self.pending = deque()
+        self.sessions = {}
+
+    def run(self, commands: queue.Queue | ProcessQueue) -> None:
+        while True:
+            try:
+                command: WorkerCommand | None = commands.get(timeout=0.1)
+            except queue.Empty:
+                self.start_pending()
+                continue
+            if command is None:
+                break
+            self.handle(command)
+            self.start_pending()
+        for session_id in list(self.sessions.keys()):
+            self.disconnect(session_id)
+
+    def handle(self, command: WorkerCommand) -> None:
+        if command.action == 'connect':
+            self.connect(command.session_id, **command.data)
+        elif command.action == 'disconnect':
+            self.disconnect(command.session_id)
+        elif command.session_id not in self.sessions:
+            logging.warning('Command for unknown validator session %s', command.session_id)
+        elif command.data.get('method') == 'validate':
+            self.add_job(command.session_id, command.data)
+        elif command.data.get('method') == 'cancel' and self.remove_job(command.session_id):
+            self.sockio.emit('log', {
+                'level': 'info',
+                'text': 'Cancelled validation before it started',
+            }, to=command.session_id)
+            self.sockio.emit('finished', {
+                'startTime': 0,
+                'endTime': 0,
+                'aborted': True,
+            }, to=command.session_id)
+        else:
+            self.dispatch(command.session_id, command.data)
+
+    def connect(self, session_id: str, origin: str, username: str | None = None) -> None:
+        upload_dir: str = self.app.config['UPLOAD_FOLDER']
+        conn = ClientConnection(
+            self.loop, self.sockio, session_id, upload_dir, app=self.app, origin=origin)
+        self.sessions[session_id] = WorkerSession(
+            connection=conn, origin=origin, username=username)
+
+    def disconnect(self, session_id: str) -> None:
+        self.remove_job(session_id)
+        try:
+            session: WorkerSession = self.sessions.pop(session_id)
+        except KeyError:
+            return
+        session.connection.shutdown()
+
+    def add_job(self, session_id: str, data: JsonObject) -> None:
+        if len(self.pending) >= self.queue_size:
+            self.sockio.emit('validate-errors', {
+                'manifest': 'Too many validation jobs are waiting, please try again later',
+            }, to=session_id)
+            return
+        self.remove_job(session_id)
+        self.pending.append((session_id, data,))
+        if self.running_jobs() >= self.max_jobs:
+            self.sockio.emit('log', {
+                'level': 'info',
+                'text': f'Waiting for {self.running_jobs()} other validation job(s) to complete',
+            }, to=session_id)
+
+    def remove_job(self, session_id: str) -> bool:
+        found: bool = False
+        for item in list(self.pending):
+            if item[0] == session_id:
+                self.pending.remove(item)
+                found = True
+        return found
+
+    def running_jobs(self) -> int:
+        count: int = 0
+        for session in self.sessions.values():
+            session.connection.join_finished_tasks()
+            count += len(session.connection.tasks)
+        return count
+
+    def start_pending(self) -> None:
+        while self.pending and self.running_jobs() < self.max_jobs:
+            session_id, data = self.pending.popleft()
+            self.dispatch(session_id, data)
+
+    def dispatch(self, session_id: str, data: JsonObject) -> None:
+        try:
+            session: WorkerSession = self.sessions[session_id]
+        except KeyError:
+            return
+        with self.app.test_request_context(base_url=session.origin):
+            if session.username is not None:
+                user: User | None = User.get(username=session.username)
+                if user is not None:
+                    login_user(user)
+            session.connection.event_handler(data)
+
+
+def worker_main(commands: ProcessQueue, events: ProcessQueue, config: JsonObject,
+                folders: AppFolders, max_jobs: int, queue_size: int) -> None:
+    """
+    Entry point of the validator worker process
+    """
+    from dashlive.server.app import asyncio_loop, create_app
+
+    app: flask.Flask = create_app(
+        config=config, create_default_user=False, folders=folders, wss=False)
+    runner = JobRunner(app, asyncio_loop, events, max_jobs=max_jobs, queue_size=queue_size)
+    try:
+        runner.run(commands)
+    finally:
+        asyncio_loop.stop()
+        events.put(None)
+
+
+def worker_config(app: flask.Flask) -> JsonObject:
+    """
+    The settings of app that can be passed to the worker process
+    """
+    simple_types = (str, int, float, bool, dict, list, tuple, type(None))
+    return {key: value for key, value in app.config.items() if isinstance(value, simple_types)}
+
+
+class ValidatorWorker:
+    """
+    Runs DASH validation and stream installation jobs in a separate process,
+    so that parsing the media segments of a stream does not slow down the
+    requests being handled by this process. The websocket commands of each
+    session are sent to the worker process, and the socket.io messages
+    produced by the worker are forwarded to the session.
+    """
+
+    commands: ProcessQueue | None
+    config: JsonObject
+    events: ProcessQueue | None
+    folders: AppFolders
+    lock: threading.Lock
+    max_jobs: int
+    process: SpawnProcess | None
+    queue_size: int
+    reader: threading.Thread | None
+    sessions: dict[str, JsonObject]
+    sockio: SocketIO
+    started_sessions: set[str]
+
+    def __init__(self, sockio: SocketIO, config: JsonObject, folders: AppFolders,
+                 max_jobs: int = 2, queue_size: int = 8) -> None:
+        self.sockio = sockio
+        self.config = config
+        self.folders = folders
+        self.max_jobs = max_jobs
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.commands = None
+        self.events = None
+        self.process = None
+        self.reader = None
+        self.sessions = {}
+        self.started_sessions = set()
+
+    def connect(self, session_id: str, origin: str, username: str | None) -> None:
+        # the worker process is only started when the first command is received
+        with self.lock:
+            self.sessions[session_id] = {
+                'origin': origin,
+                'username': username,
+            }
+
+    def disconnect(self, session_id: str) -> None:
+        with self.lock:
+            self.sessions.pop(session_id, None)
+            if session_id in self.started_sessions:
+                self.started_sessions.remove(session_id)
+                self.commands.put(WorkerCommand('disconnect', session_id))
+
+    def send(self, session_id: str, data: JsonObject) -> None:
+        with self.lock:
+            try:
+                settings: JsonObject = self.sessions[session_id]
+            except KeyError:
+                return
+            self._start()
+            if session_id not in self.started_sessions:
+                self.commands.put(WorkerCommand('connect', session_id, settings))
+                self.started_sessions.add(session_id)
+            self.commands.put(WorkerCommand('cmd', session_id, data))
+
+    def stop(self, timeout: float = 5) -> None:
+        with self.lock:
+            if self.process is None:
+                return
+            process = self.process
+            reader = self.reader
+            self.commands.put(None)
+            self.process = None
+            self.reader = None
+            self.started_sessions.clear()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            self.events.put(None)
+        reader.join(timeout)
+
+    def _start(self) -> None:
+        if self.process is not None:
+            if self.process.is_alive():
+                return
+            logging.warning('Validator worker process exited with code %s', self.process.exitcode)
+            self.events.put(None)
+            self.reader.join()
+        ctx = multiprocessing.get_context('spawn')
+        self.commands = ctx.Queue()
+        self.events = ctx.Queue()
+        self.started_sessions.clear()
+        self.process = ctx.Process(
+            target=worker_main, name='validator-worker', daemon=True,
+            args=(self.commands, self.events, self.config, self.folders,
+                  self.max_jobs, self.queue_size))
+        self.process.start()
+        self.reader = threading.Thread(
+            target=self._forward_events, args=(self.events,), daemon=True)
+        self.reader.start()
+
+    def _forward_events(self, events: ProcessQueue) -> None:
+        while True:
+            event: WorkerEvent | None = events.get()
+            if event is None:
+                break
+            self.sockio.emit(event.cmd, event.data, to=event.session_id)
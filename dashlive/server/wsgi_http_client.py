@@ -0,0 +1,134 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+from collections.abc import Iterable
+import io
+import json
+import logging
+import urllib.parse
+
+import flask
+from lxml import etree as ET
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+from werkzeug.utils import cached_property
+
+from dashlive.mpeg.dash.validator.http_client import HttpClient, HttpResponse
+from dashlive.mpeg.dash.validator.pool import WorkerPool
+
+class WsgiResponse:
+    headers: dict[str, str]
+    status: str
+    status_int: int
+    status_code: int
+    body: bytes
+    _src: io.BytesIO
+
+    def __init__(self, status: str, headers: Iterable[tuple[str, str]], body: bytes) -> None:
+        code, _, reason = status.partition(' ')
+        self.status_int = self.status_code = int(code, 10)
+        self.status = 'OK' if 200 <= self.status_code < 300 else reason
+        self.headers = {}
+        for key, value in headers:
+            name: str = '-'.join([k.title() for k in key.split('-')])
+            self.headers[name] = value
+        self.body = body
+        self._src = io.BytesIO(body)
+
+    @cached_property
+    def xml(self) -> ET.Element:
+        return ET.fromstring(self.body)
+
+    @property
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+    def get_data(self, as_text: bool) -> bytes | str:
+        if as_text:
+            return self.body.decode('utf-8')
+        return self.body
+
+    def tell(self) -> int:
+        return self._src.tell()
+
+    def read(self, length: int) -> bytes:
+        return self._src.read(length)
+
+    async def read_chunk(self, length: int) -> bytes:
+        return self._src.read(length)
+
+    def release(self) -> None:
+        pass
+
+
+class WsgiHttpClient:
+    """
+    Implements HttpClient protocol by calling the Flask app directly for any
+    URL that is served by this server, without using the network. Requests
+    for any other URL are passed to the fallback HttpClient.
+    """
+
+    app: flask.Flask
+    fallback: HttpClient
+    hosts: set[str]
+    log: logging.Logger
+    pool: WorkerPool
+
+    def __init__(self, app: flask.Flask, origins: Iterable[str], fallback: HttpClient,
+                 pool: WorkerPool, log: logging.Logger | None = None) -> None:
+        self.app = app
+        self.fallback = fallback
+        self.pool = pool
+        self.hosts = {urllib.parse.urlsplit(origin).netloc.lower() for origin in origins}
+        self.log = log if log is not None else logging.getLogger()
+
+    def is_local(self, url: str) -> bool:
+        return urllib.parse.urlsplit(url).netloc.lower() in self.hosts
+
+    async def head(self, url, headers=None, params=None, status=None,
+                   xhr=False) -> HttpResponse:
+        if not self.is_local(url):
+            return await self.fallback.head(
+                url, headers=headers, params=params, status=status, xhr=xhr)
+        return await self.request('HEAD', url, headers, params, xhr)
+
+    async def get(self,
+                  url: str,
+                  headers: dict | None = None,
+                  params: dict | None = None,
+                  status: int | None = None,
+                  xhr: bool = False,
+                  **kwargs) -> HttpResponse:
+        if not self.is_local(url):
+            return await self.fallback.get(
+                url, headers=headers, params=params, status=status, xhr=xhr, **kwargs)
+        self.log.debug('GET %s (in-process)', url)
+        return await self.request('GET', url, headers, params, xhr)
+
+    async def request(self, method: str, url: str, headers: dict | None,
+                      params: dict | None, xhr: bool) -> WsgiResponse:
+        if xhr:
+            headers = {
+                'X-REQUESTED-WITH': 'XMLHttpRequest',
+                **(headers if headers is not None else {})
+            }
+        async with self.pool.group() as tg:
+            resp = tg.submit(self.call_app, method, url, headers, params)
+        return resp.result()
+
+    def call_app(self, method: str, url: str, headers: dict | None,
+                 params: dict | None) -> WsgiResponse:
+        parts = urllib.parse.urlsplit(url)
+        builder = EnvironBuilder(
+            method=method, base_url=f'{parts.scheme}://{parts.netloc}/',
+            path=parts.path, query_string=parts.query, headers=headers, data=params)
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+        # buffered=True causes the response to be fully read and the app_iter closed
+        app_iter, status, resp_headers = run_wsgi_app(self.app, environ, buffered=True)
+        return WsgiResponse(status, resp_headers.items(), b''.join(app_iter))
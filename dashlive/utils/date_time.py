@@ -31,6 +31,8 @@ from .timezone import UTC, FixedOffsetTimeZone
 # time values are in seconds since midnight, Jan. 1, 1904, in UTC time
 ISO_EPOCH = datetime.datetime(year=1904, month=1, day=1, tzinfo=UTC())
 
+MICROSECONDS_PER_SECOND: int = 1_000_000
+
 date_hacks = [
     (re.compile('Apri[^l]'), 'Apr '),
     (re.compile('Sept[^e]'), 'Sep '),
@@ -247,6 +249,24 @@ def scale_timedelta(delta: datetime.timedelta, num: int, denom: int) -> float:
         return secs
     return secs / float(denom)
 
+def timedelta_to_microseconds(delta: datetime.timedelta) -> int:
+    """
+    Convert a timedelta into an integer number of microseconds
+    """
+    return (delta.days * 86400 + delta.seconds) * MICROSECONDS_PER_SECOND + delta.microseconds
+
+def microseconds_to_timecode(micros: int, timescale: int) -> int:
+    """
+    Convert a time in microseconds into a timecode, rounding down
+    """
+    return micros * timescale // MICROSECONDS_PER_SECOND
+
+def timecode_to_microseconds(timecode: int, timescale: int) -> int:
+    """
+    Convert a timecode into microseconds, rounding down
+    """
+    return timecode * MICROSECONDS_PER_SECOND // timescale
+
 def timecode_to_timedelta(timecode: int, timescale: int) -> datetime.timedelta:
     """
     Convert a timecode and timescale into a timedelta
@@ -53,6 +53,7 @@ export type OptionsContainerType = {
   clockDrift: number | null;
   dashjsVersion: string | null;
   drmSelection: unknown[];
+  encryptionScheme: string | null;
   eventTypes: string[];
   failureCount: number | null;
   forcePeriodDurations: boolean;
@@ -69,6 +70,7 @@ export type OptionsContainerType = {
   playready: PlayreadyOptionsType;
   scte35: Scte35OptionsType;
   segmentTimeline: boolean;
+  serverTiming: boolean;
   shakaVersion: string | null;
   textCodec: string | null;
   textErrors: [number, string][];
@@ -97,6 +99,7 @@ export type ShortOptionsContainerType = {
   dft: number | null;
   djVer: string | null;
   drm: unknown[];
+  esch: string | null;
   evs: string[];
   hfc: number | null;
   fpd: boolean;
@@ -130,6 +133,7 @@ export type ShortOptionsContainerType = {
   sctValu: string | null;
   sctVers: number;
   st: boolean;
+  stm: boolean;
   skVer: string | null;
   tc: string | null;
   the: [number, string][];
@@ -158,6 +162,7 @@ export type CgiOptionsContainerType = {
   drift: number | null;
   dashjs: string | null;
   drm: unknown[];
+  encryption: string | null;
   events: string[];
   failures: number | null;
   periodDur: boolean;
@@ -191,6 +196,7 @@ export type CgiOptionsContainerType = {
   scte35__value: string | null;
   scte35__version: number;
   timeline: boolean;
+  timing: boolean;
   shaka: string | null;
   tcodec: string | null;
   terr: [number, string][];
@@ -31,6 +31,11 @@ export interface ValidatorFinishedEvent {
     aborted: boolean;
 }
 
+export interface LogBatchEvent {
+    entries: Omit<LogEntry, 'id'>[];
+    dropped: number;
+}
+
 export interface InstallStreamCommand {
     filename: string;
     title: string;
@@ -45,6 +50,7 @@ type SocketEventListeners = {
     finished: (data: ValidatorFinishedEvent) => void;
     install: (cmd: InstallStreamCommand) => void;
     log: (msg: Omit<LogEntry, 'id'>) => void;
+    'log-batch': (data: LogBatchEvent) => void;
     manifest: (ev: ManifestEvent) => void;
     'manifest-errors': (data: ErrorEntry[]) => void;
     progress: (ev: ValidatorProgressEvent) => void;
@@ -113,6 +119,24 @@ export function useValidatorWebsocket(wssUrl: string): UseValidatorWebsocketHook
         nextMsgId.current += 1;
     }, [log]);
 
+    const addLogBatch = useCallback(({ entries, dropped }: LogBatchEvent) => {
+        const items: LogEntry[] = [];
+        if (dropped > 0) {
+            items.push({
+                id: nextMsgId.current++,
+                level: 'info',
+                text: `${dropped} log messages were dropped`,
+            });
+        }
+        for (const msg of entries) {
+            items.push({
+                ...msg,
+                id: nextMsgId.current++,
+            });
+        }
+        log.value = [...log.value, ...items];
+    }, [log]);
+
     const listeners: SocketEventListeners = useMemo(() => ({
         connect: () => {
             state.value = ValidatorState.IDLE;
@@ -131,6 +155,7 @@ export function useValidatorWebsocket(wssUrl: string): UseValidatorWebsocketHook
             addLogMessage(msg);
         },
         log: addLogMessage,
+        'log-batch': addLogBatch,
         progress: (data: ValidatorProgressEvent) => {
             const { aborted, pct, text, finished } = data;
             batch(() => {
@@ -214,7 +239,7 @@ export function useValidatorWebsocket(wssUrl: string): UseValidatorWebsocketHook
                 state.value = ValidatorState.DONE;
             });
         },
-    }), [addLogMessage, codecs, errors, manifestText, progress, result, socket, state]);
+    }), [addLogBatch, addLogMessage, codecs, errors, manifestText, progress, result, socket, state]);
 
     const start = useCallback((settings: ValidatorSettings) => {
         if (state.value === ValidatorState.CONNECTION_FAILED || state.value === ValidatorState.DISCONNECTED) {
@@ -0,0 +1,242 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import argparse
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import datetime
+import json
+from pathlib import Path
+import platform
+import re
+import statistics
+import time
+from typing import Any, NamedTuple
+
+class BenchmarkCase(NamedTuple):
+    """
+    The function to measure. If setup is not None, it is called before
+    every call to run() (outside of the timed section) and its return
+    value is passed to run().
+    """
+    run: Callable[..., Any]
+    setup: Callable[[], Any] | None = None
+
+
+BenchmarkFactory = Callable[[], BenchmarkCase]
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """
+    Timing of one benchmark. All times are per call, in microseconds.
+    """
+    name: str
+    rounds: int
+    loops: int
+    min_us: float
+    median_us: float
+    mean_us: float
+    stdev_us: float
+
+
+@dataclass(slots=True)
+class Comparison:
+    name: str
+    baseline_us: float
+    current_us: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_us / self.baseline_us
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.ratio > (1.0 + threshold)
+
+
+class BenchmarkRegistry:
+    """
+    Collection of benchmarks, in registration order
+    """
+    factories: dict[str, BenchmarkFactory]
+
+    def __init__(self) -> None:
+        self.factories = {}
+
+    def register(self, name: str) -> Callable[[BenchmarkFactory], BenchmarkFactory]:
+        def decorator(func: BenchmarkFactory) -> BenchmarkFactory:
+            if name in self.factories:
+                raise ValueError(f'Duplicate benchmark name {name}')
+            self.factories[name] = func
+            return func
+        return decorator
+
+    def names(self, pattern: str | None = None) -> list[str]:
+        if pattern is None:
+            return list(self.factories.keys())
+        rgx = re.compile(pattern)
+        return [name for name in self.factories.keys() if rgx.search(name)]
+
+
+def measure(name: str, case: BenchmarkCase, rounds: int = 7,
+            min_round_time: float = 0.02) -> BenchmarkResult:
+    """
+    Time the given benchmark. Cases without a per-call setup are called in a
+    loop, where the number of loops is chosen so that each round takes at
+    least min_round_time seconds.
+    """
+    samples: list[float] = []
+    loops: int = 1
+    if case.setup is None:
+        run = case.run
+        while loops < (1 << 20):
+            start = time.perf_counter_ns()
+            for _ in range(loops):
+                run()
+            if (time.perf_counter_ns() - start) >= min_round_time * 1e9:
+                break
+            loops *= 2
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(loops):
+                run()
+            samples.append((time.perf_counter_ns() - start) / loops)
+    else:
+        # each sample is only one call, so more samples are needed
+        for _ in range(5 * rounds):
+            state = case.setup()
+            start = time.perf_counter_ns()
+            case.run(state)
+            samples.append(time.perf_counter_ns() - start)
+    samples = [ns / 1000.0 for ns in samples]
+    return BenchmarkResult(
+        name=name, rounds=len(samples), loops=loops, min_us=min(samples),
+        median_us=statistics.median(samples), mean_us=statistics.fmean(samples),
+        stdev_us=statistics.stdev(samples) if len(samples) > 1 else 0.0)
+
+
+def compare_results(current: dict[str, dict[str, Any]],
+                    baseline: dict[str, dict[str, Any]],
+                    field: str = 'min_us') -> list[Comparison]:
+    """
+    Compare the given timing field of each benchmark that exists in both
+    sets of results
+    """
+    result: list[Comparison] = []
+    for name, cur in current.items():
+        try:
+            base = baseline[name]
+        except KeyError:
+            continue
+        result.append(Comparison(name=name, baseline_us=base[field], current_us=cur[field]))
+    return result
+
+
+def environment_info() -> dict[str, str]:
+    return {
+        'created': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+    }
+
+
+def save_results(filename: Path, results: dict[str, Any]) -> None:
+    """
+    Save results, along with a description of the environment that produced them
+    """
+    js = {
+        'environment': environment_info(),
+        'results': results,
+    }
+    with filename.open('wt', encoding='utf-8') as dest:
+        json.dump(js, dest, indent=2, sort_keys=True)
+        dest.write('\n')
+
+
+def load_results(filename: Path) -> dict[str, Any]:
+    with filename.open('rt', encoding='utf-8') as src:
+        js = json.load(src)
+    return js['results']
+
+
+def run_benchmarks(registry: BenchmarkRegistry, names: list[str],
+                   rounds: int) -> dict[str, BenchmarkResult]:
+    results: dict[str, BenchmarkResult] = {}
+    for name in names:
+        case: BenchmarkCase = registry.factories[name]()
+        results[name] = measure(name, case, rounds=rounds)
+        res = results[name]
+        print(f'{name:<52} min={res.min_us:12.2f}us median={res.median_us:12.2f}us '
+              f'stdev={res.stdev_us:10.2f}us')
+    return results
+
+
+def create_argument_parser(description: str, default_baseline: Path) -> argparse.ArgumentParser:
+    """
+    Command line arguments that are common to all of the benchmark suites
+    """
+    ap = argparse.ArgumentParser(description=description)
+    ap.add_argument('--filter', help='Only run benchmarks matching this regex')
+    ap.add_argument('--output', type=Path, help='Write results to this JSON file')
+    ap.add_argument('--baseline', type=Path, default=default_baseline,
+                    help='Baseline results to compare against')
+    ap.add_argument('--save-baseline', action='store_true',
+                    help='Replace the baseline with these results')
+    ap.add_argument('--threshold', type=float, default=0.25,
+                    help='Fraction slower than baseline that counts as a regression')
+    return ap
+
+
+def check_baseline(args: argparse.Namespace, js_results: dict[str, Any], field: str) -> int:
+    """
+    Saves the results as requested by the command line arguments and compares
+    them with the baseline. Returns a non-zero value if any benchmark
+    is slower than the baseline by more than the threshold.
+    """
+    if args.output:
+        save_results(args.output, js_results)
+    if args.save_baseline:
+        if args.baseline.exists() and args.filter:
+            js_results = {**load_results(args.baseline), **js_results}
+        save_results(args.baseline, js_results)
+        return 0
+    if not args.baseline.exists():
+        print(f'Baseline {args.baseline} not found')
+        return 0
+    regressions: int = 0
+    print()
+    print(f'{"Benchmark":<52} {"Baseline":>12} {"Current":>12} {"Ratio":>7}')
+    for item in compare_results(js_results, load_results(args.baseline), field):
+        flag: str = ''
+        if item.is_regression(args.threshold):
+            flag = ' REGRESSION'
+            regressions += 1
+        print(f'{item.name:<52} {item.baseline_us:10.2f}us {item.current_us:10.2f}us '
+              f'{item.ratio:7.2f}{flag}')
+    return 1 if regressions else 0
+
+
+def main(registry: BenchmarkRegistry, default_baseline: Path, argv: list[str]) -> int:
+    """
+    Command line entry point. Returns a non-zero value if any benchmark
+    is slower than the baseline by more than the threshold.
+    """
+    ap = create_argument_parser('Run micro-benchmarks', default_baseline)
+    ap.add_argument('--list', action='store_true', help='List available benchmarks')
+    ap.add_argument('--rounds', type=int, default=7, help='Number of timed rounds')
+    args = ap.parse_args(argv[1:])
+
+    names: list[str] = registry.names(args.filter)
+    if args.list:
+        for name in names:
+            print(name)
+        return 0
+    results = run_benchmarks(registry, names, args.rounds)
+    js_results: dict[str, Any] = {name: asdict(res) for name, res in results.items()}
+    return check_baseline(args, js_results, 'min_us')
@@ -0,0 +1,243 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+"""
+Micro-benchmarks of the hot paths in the mp4, dash, scte35 and drm packages.
+They only use the files in tests/fixtures and do not need a database.
+
+    python -m tests.benchmarks.micro
+    python -m tests.benchmarks.micro --filter mp4 --output results.json
+    python -m tests.benchmarks.micro --save-baseline
+"""
+
+import datetime
+import io
+from pathlib import Path
+import sys
+
+from dashlive.drm.playready import PlayReady
+from dashlive.mpeg import mp4
+from dashlive.mpeg.dash.reference import StreamTimingReference
+from dashlive.mpeg.dash.representation import Representation
+from dashlive.mpeg.dash.segment import Segment
+from dashlive.mpeg.dash.timing import DashTiming
+from dashlive.scte35.binarysignal import BinarySignal, SapType
+from dashlive.scte35.splice_insert import SpliceInsert
+from dashlive.server.options.container import OptionsContainer
+
+from tests.key_stub import KeyStub
+
+from .harness import BenchmarkCase, BenchmarkRegistry, main
+
+FIXTURES_FOLDER: Path = Path(__file__).parent.parent / "fixtures"
+BASELINE_FILE: Path = Path(__file__).parent / "baselines" / "micro.json"
+
+registry = BenchmarkRegistry()
+
+def read_fixture(name: str) -> bytes:
+    return (FIXTURES_FOLDER / name).read_bytes()
+
+def first_fragment(name: str) -> bytes:
+    """
+    Returns the moof and mdat boxes of the first media segment of a fixture
+    """
+    data: bytes = read_fixture(name)
+    atoms: list[mp4.Mp4Atom] = mp4.IsoParser.load(
+        io.BytesIO(data), options=mp4.Options(mode='r', lazy_load=True))
+    for idx, atom in enumerate(atoms):
+        if atom.atom_type == 'moof':
+            mdat = atoms[idx + 1]
+            return data[atom.position:mdat.position + mdat.size]
+    raise ValueError(f'{name} does not contain any media segments')
+
+
+@registry.register('mp4.IsoParser.load[bbb_v7]')
+def iso_parser_load() -> BenchmarkCase:
+    data: bytes = read_fixture('bbb/bbb_v7.mp4')
+
+    def run() -> None:
+        mp4.IsoParser.load(io.BytesIO(data), options=mp4.Options(mode='r', lazy_load=True))
+
+    return BenchmarkCase(run)
+
+
+@registry.register('mp4.IsoParser.load[enc-moov]')
+def iso_parser_load_encrypted_moov() -> BenchmarkCase:
+    data: bytes = read_fixture('enc-moov.mp4')
+
+    def run() -> None:
+        mp4.IsoParser.load(io.BytesIO(data), options=mp4.Options(mode='r', lazy_load=False))
+
+    return BenchmarkCase(run)
+
+
+@registry.register('mp4.IsoParser.load[hevc-rep]')
+def iso_parser_load_hevc() -> BenchmarkCase:
+    data: bytes = read_fixture('hevc-rep.mp4')
+
+    def run() -> None:
+        mp4.IsoParser.load(io.BytesIO(data), options=mp4.Options(mode='r', lazy_load=False))
+
+    return BenchmarkCase(run)
+
+
+@registry.register('mp4.LazyLoadedBox.lazy_load[moof]')
+def lazy_load_moof() -> BenchmarkCase:
+    data: bytes = first_fragment('bbb/bbb_v7.mp4')
+
+    def setup() -> mp4.Mp4Atom:
+        wrap: mp4.Wrapper = mp4.IsoParser.load_wrapped(
+            io.BytesIO(data), options=mp4.Options(mode='rw', lazy_load=True))
+        return wrap.children[0]
+
+    def run(moof: mp4.Mp4Atom) -> None:
+        for child in moof.children:
+            child.lazy_load()
+
+    return BenchmarkCase(run, setup)
+
+
+@registry.register('mp4.Mp4Atom.encode[media-segment]')
+def encode_media_segment() -> BenchmarkCase:
+    data: bytes = first_fragment('bbb/bbb_v7.mp4')
+
+    def setup() -> mp4.Wrapper:
+        # the same modifications as a live media segment request
+        wrap: mp4.Wrapper = mp4.IsoParser.load_wrapped(
+            io.BytesIO(data), options=mp4.Options(mode='rw', lazy_load=True))
+        wrap['moof.mfhd'].sequence_number = 1234
+        wrap['moof.traf.tfdt'].base_media_decode_time += 123456789
+        return wrap
+
+    def run(wrap: mp4.Wrapper) -> None:
+        wrap.encode(io.BytesIO())
+
+    return BenchmarkCase(run, setup)
+
+
+@registry.register('mp4.Mp4Atom.encode[emsg]')
+def encode_emsg() -> BenchmarkCase:
+    atoms: list[mp4.Mp4Atom] = mp4.IsoParser.load(
+        io.BytesIO(read_fixture('emsg.mp4')),
+        options=mp4.Options(mode='rw', lazy_load=False))
+
+    def run() -> None:
+        dest = io.BytesIO()
+        for atom in atoms:
+            atom.encode(dest)
+
+    return BenchmarkCase(run)
+
+
+@registry.register('dash.Representation.load[bbb_v7]')
+def representation_load() -> BenchmarkCase:
+    filename: Path = FIXTURES_FOLDER / 'bbb' / 'bbb_v7.mp4'
+    atoms: list[mp4.Mp4Atom] = mp4.IsoParser.load(
+        io.BytesIO(filename.read_bytes()), options=mp4.Options(mode='r', lazy_load=True))
+
+    def run() -> None:
+        Representation.load(str(filename), atoms)
+
+    return BenchmarkCase(run)
+
+
+@registry.register('dash.Representation.generateSegmentTimeline[live]')
+def generate_segment_timeline() -> BenchmarkCase:
+    stream_ref = StreamTimingReference(
+        media_name='bbb_v1',
+        content_type='video',
+        media_duration=142080,
+        num_media_segments=148,
+        segment_duration=960,
+        timescale=240)
+    options = OptionsContainer(mode='live')
+    options.apply_options({
+        'leeway': '0',
+        'depth': '1800',
+        'start': '2020-01-01T00:00:00Z',
+    }, is_cgi=True)
+    now = datetime.datetime.fromisoformat('2020-01-03T01:02:03Z')
+    timing = DashTiming(now, stream_ref, options)
+    segments: list[Segment] = [Segment(pos=0, duration=0, size=42)]
+    for num in range(stream_ref.num_media_segments):
+        segments.append(Segment(
+            pos=(42 + num * 123), size=123, duration=stream_ref.segment_duration))
+    rep = Representation(
+        content_type='video',
+        segments=segments,
+        timescale=stream_ref.timescale,
+        segment_duration=stream_ref.segment_duration)
+    zero_td = datetime.timedelta()
+    rep.set_dash_timing(
+        timing, period_start=zero_td, period_time_offset=zero_td, duration=None)
+
+    return BenchmarkCase(rep.generateSegmentTimeline)
+
+
+@registry.register('options.OptionsContainer.apply_options')
+def apply_options() -> BenchmarkCase:
+    params: dict[str, str] = {
+        'abr': '0',
+        'depth': '60',
+        'events': 'ping,scte35',
+        'leeway': '0',
+        'ping__count': '5',
+        'ping__interval': '2000',
+        'scte35__program_id': '1234',
+        'start': 'epoch',
+        'timeline': '1',
+        'time': 'head',
+    }
+
+    def run() -> None:
+        OptionsContainer(mode='live').apply_options(params, is_cgi=True)
+
+    return BenchmarkCase(run)
+
+
+@registry.register('scte35.BinarySignal.encode[splice_insert]')
+def scte35_encode() -> BenchmarkCase:
+    splice = BinarySignal(
+        sap_type=SapType.CLOSED_GOP_NO_LEADING_PICTURES,
+        splice_insert=SpliceInsert(
+            out_of_network_indicator=True,
+            splice_time={
+                "pts": 0x123456789,
+            },
+            avails_expected=5,
+            splice_event_id=1234,
+            program_splice_flag=True,
+            avail_num=1,
+            unique_program_id=1620,
+            break_duration={
+                "duration": 20 * 90000,
+                "auto_return": True,
+            }))
+
+    return BenchmarkCase(splice.encode)
+
+
+@registry.register('drm.PlayReady.generate_pro')
+def playready_pro() -> BenchmarkCase:
+    la_url: str = 'https://amssamples.keydelivery.mediaservices.windows.net/PlayReady/'
+    keys: dict[str, KeyStub] = {}
+    for kid, key in [
+            ("1AB45440532C439994DC5C5AD9584BAC", "ccc0f2b3b279926496a7f5d25da692f6"),
+            ("db06a8feec164de292282c71e9b856ab", "3179923adf3c929892da73f2f03fe1f3")]:
+        keys[kid.lower()] = KeyStub(kid, key)
+    default_kid: str = list(keys.keys())[0]
+    mspr = PlayReady(la_url=la_url, version=4.3, header_version=4.3)
+
+    def run() -> None:
+        mspr.generate_pro(la_url, default_kid, keys, None)
+
+    return BenchmarkCase(run)
+
+
+if __name__ == '__main__':
+    sys.exit(main(registry, BASELINE_FILE, sys.argv))
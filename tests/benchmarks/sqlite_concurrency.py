@@ -0,0 +1,211 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+"""
+SQLite concurrency benchmark. Several reader threads repeatedly look up
+media files, as the segment handlers do, while a writer thread adds a
+large number of media files, as an upload and index job does. The
+latency of the reads is reported for the default SQLite settings and
+for the SqliteTuning profile.
+
+    python -m tests.benchmarks.sqlite_concurrency
+    python -m tests.benchmarks.sqlite_concurrency --duration 10 --readers 16
+"""
+
+import argparse
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from dashlive.server.models.all import models as all_models
+from dashlive.server.models.base import Base
+from dashlive.server.models.blob import Blob
+from dashlive.server.models.connection import SqliteTuning
+from dashlive.server.models.mediafile import MediaFile
+from dashlive.server.models.stream import Stream
+
+@dataclass(slots=True)
+class ConcurrencyResult:
+    """
+    Read latency while the database is being written. All latencies
+    are in microseconds.
+    """
+    profile: str
+    journal_mode: str
+    reads: int
+    writes: int
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    max_us: float
+
+
+@dataclass(slots=True, kw_only=True)
+class ConcurrencyOptions:
+    duration: float = 5.0
+    readers: int = 8
+    initial_files: int = 200
+    files_per_transaction: int = 50
+    payload_size: int = 16384
+
+
+class SqliteConcurrencyBenchmark:
+    def __init__(self, filename: Path, profile: str,
+                 tuning: SqliteTuning | None,
+                 options: ConcurrencyOptions) -> None:
+        self.options = options
+        self.profile = profile
+        self.tuning = tuning
+        engine_options = {} if tuning is None else tuning.engine_options()
+        # make sure every reader thread can have its own connection
+        engine_options.setdefault('pool_size', options.readers + 1)
+        self.engine = sa.create_engine(f'sqlite:///{filename}', **engine_options)
+        if tuning is not None:
+            tuning.install(self.engine)
+        self.names: list[str] = []
+        self.stop = threading.Event()
+        self.latencies: list[int] = []
+        self.lock = threading.Lock()
+        self.writes: int = 0
+
+    def populate(self) -> None:
+        assert len(all_models) > 0
+        Base.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            stream = Stream(directory='bench', title='SQLite concurrency')
+            session.add(stream)
+            for idx in range(self.options.initial_files):
+                self.names.append(self.add_media_file(session, stream, f'initial{idx}'))
+            session.commit()
+
+    def add_media_file(self, session: Session, stream: Stream, name: str) -> str:
+        blob = Blob(filename=f'{name}.mp4', size=self.options.payload_size,
+                    content_type='video/mp4', sha1_hash='0' * 40)
+        session.add(blob)
+        mf = MediaFile(
+            name=name, stream=stream, blob=blob, content_type='video', bitrate=1000,
+            encrypted=False, track_id=1, codec_fourcc='avc1',
+            rep={'id': name, 'payload': 'x' * self.options.payload_size})
+        session.add(mf)
+        return name
+
+    def reader(self, seed: int) -> None:
+        rand = random.Random(seed)
+        latencies: list[int] = []
+        while not self.stop.is_set():
+            name: str = rand.choice(self.names)
+            start: int = time.perf_counter_ns()
+            with Session(self.engine) as session:
+                mf = session.execute(
+                    sa.select(MediaFile).filter_by(name=name)).scalar_one()
+                assert mf.blob is not None
+            latencies.append(time.perf_counter_ns() - start)
+        with self.lock:
+            self.latencies += latencies
+
+    def writer(self) -> None:
+        end: float = time.perf_counter() + self.options.duration
+        count: int = 0
+        while time.perf_counter() < end:
+            with Session(self.engine) as session:
+                stream = session.execute(
+                    sa.select(Stream).filter_by(directory='bench')).scalar_one()
+                for _ in range(self.options.files_per_transaction):
+                    self.add_media_file(session, stream, f'upload{count}')
+                    count += 1
+                    session.flush()
+                session.commit()
+                self.writes += self.options.files_per_transaction
+        self.stop.set()
+
+    def journal_mode(self) -> str:
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql('PRAGMA journal_mode').scalar_one()
+
+    def run(self) -> ConcurrencyResult:
+        self.populate()
+        readers: list[threading.Thread] = [
+            threading.Thread(target=self.reader, args=(idx,))
+            for idx in range(self.options.readers)]
+        for thd in readers:
+            thd.start()
+        self.writer()
+        for thd in readers:
+            thd.join()
+        self.engine.dispose()
+        times_us: list[float] = [ns / 1000.0 for ns in self.latencies]
+        if len(times_us) > 1:
+            pct = statistics.quantiles(times_us, n=100, method='inclusive')
+            p50, p95, p99 = pct[49], pct[94], pct[98]
+        else:
+            p50 = p95 = p99 = times_us[0] if times_us else 0.0
+        return ConcurrencyResult(
+            profile=self.profile, journal_mode=self.journal_mode(),
+            reads=len(times_us), writes=self.writes, p50_us=p50, p95_us=p95,
+            p99_us=p99, max_us=max(times_us, default=0.0))
+
+
+def run_profiles(options: ConcurrencyOptions,
+                 profiles: dict[str, SqliteTuning | None] | None = None) -> list[ConcurrencyResult]:
+    if profiles is None:
+        profiles = {
+            'default': None,
+            'tuned': SqliteTuning(),
+        }
+    results: list[ConcurrencyResult] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, tuning in profiles.items():
+            filename = Path(tmpdir) / f'{name}.db3'
+            bench = SqliteConcurrencyBenchmark(filename, name, tuning, options)
+            results.append(bench.run())
+    return results
+
+
+def main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(
+        description='Measure SQLite read latency while media files are being added')
+    defaults = ConcurrencyOptions()
+    ap.add_argument('--duration', type=float, default=defaults.duration,
+                    help='Number of seconds to keep writing')
+    ap.add_argument('--readers', type=int, default=defaults.readers,
+                    help='Number of reader threads')
+    ap.add_argument('--files-per-transaction', type=int,
+                    default=defaults.files_per_transaction,
+                    help='Number of media files added by each write transaction')
+    ap.add_argument('--payload-size', type=int, default=defaults.payload_size,
+                    help='Size (in bytes) of the data stored with each media file')
+    ap.add_argument('--output', type=Path, help='Write results to this JSON file')
+    args = ap.parse_args(argv[1:])
+    options = ConcurrencyOptions(
+        duration=args.duration, readers=args.readers,
+        files_per_transaction=args.files_per_transaction,
+        payload_size=args.payload_size)
+    results: list[ConcurrencyResult] = run_profiles(options)
+    print(f'{"Profile":<10} {"Journal":<8} {"Reads":>8} {"Writes":>8} '
+          f'{"p50":>10} {"p95":>10} {"p99":>10} {"max":>10}')
+    for res in results:
+        print(f'{res.profile:<10} {res.journal_mode:<8} {res.reads:8d} {res.writes:8d} '
+              f'{res.p50_us / 1000:8.2f}ms {res.p95_us / 1000:8.2f}ms '
+              f'{res.p99_us / 1000:8.2f}ms {res.max_us / 1000:8.2f}ms')
+    if args.output:
+        with args.output.open('wt', encoding='utf-8') as dest:
+            json.dump([asdict(res) for res in results], dest, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,237 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+"""
+End-to-end request throughput benchmark. The fixture streams are loaded
+into a database and a mix of manifest, segment, patch and multi-period
+requests is sent to the app using the Flask test client. The requests
+per second and the p50, p95 and p99 latency of each route are reported.
+
+    python -m tests.benchmarks.throughput
+    python -m tests.benchmarks.throughput --iterations 20 --filter media
+    python -m tests.benchmarks.throughput --save-baseline
+"""
+
+from dataclasses import asdict, dataclass
+import datetime
+from pathlib import Path
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Any, ClassVar, NamedTuple
+import unittest
+
+import flask
+
+from dashlive.mpeg.dash.profiles import primary_profiles
+from dashlive.mpeg.dash.timing import DashTiming
+from dashlive.server import models
+from dashlive.server.manifests import manifest_map
+from dashlive.server.options.container import OptionsContainer
+
+from tests.mixins.flask_base import FlaskTestBase
+from tests.mixins.stream_fixtures import BBB_FIXTURE, MPS_FIXTURE
+
+from .harness import check_baseline, create_argument_parser
+
+BASELINE_FILE: Path = Path(__file__).parent / "baselines" / "throughput.json"
+
+class RequestSpec(NamedTuple):
+    route: str
+    url: str
+    headers: dict[str, str] | None = None
+
+
+@dataclass(slots=True)
+class RouteStats:
+    """
+    Throughput of one route. All latencies are in microseconds.
+    """
+    route: str
+    count: int
+    requests_per_second: float
+    mean_us: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+
+    @classmethod
+    def from_samples(cls, route: str, samples: list[int]) -> "RouteStats":
+        """
+        Create from a list of request durations, in nanoseconds
+        """
+        times_us: list[float] = [ns / 1000.0 for ns in samples]
+        if len(times_us) > 1:
+            pct = statistics.quantiles(times_us, n=100, method='inclusive')
+            p50, p95, p99 = pct[49], pct[94], pct[98]
+        else:
+            p50 = p95 = p99 = times_us[0]
+        return cls(
+            route=route, count=len(times_us),
+            requests_per_second=(1e6 * len(times_us) / sum(times_us)),
+            mean_us=statistics.fmean(times_us), p50_us=p50, p95_us=p95, p99_us=p99)
+
+
+class RequestThroughputBenchmark(FlaskTestBase):
+    """
+    Uses FlaskTestBase to create the app and its database, so all file I/O
+    is performed using the pyfakefs in-memory file system.
+    """
+    iterations: ClassVar[int] = 5
+    seed: ClassVar[int] = 1234
+    route_filter: ClassVar[str | None] = None
+
+    stats: dict[str, RouteStats]
+    requests_per_second: float
+
+    def manifest_requests(self) -> list[RequestSpec]:
+        requests: list[RequestSpec] = []
+        for name, mft in manifest_map.items():
+            modes = mft.restrictions.get('mode', primary_profiles.keys())
+            drm_modes = mft.restrictions.get('drm', {'none', 'all'})
+            for mode in sorted(modes):
+                url = flask.url_for(
+                    'dash-mpd-v3', mode=mode, stream=BBB_FIXTURE.name, manifest=name)
+                requests.append(RequestSpec(f'manifest:{name}:{mode}', url))
+                if 'all' in drm_modes and mode != 'odvod':
+                    requests.append(RequestSpec(
+                        f'manifest:{name}:{mode}:drm', f'{url}?drm=all'))
+        url = flask.url_for(
+            'mpd-patch', stream=BBB_FIXTURE.name, manifest=manifest_map['hand_made.mpd'].name,
+            publish=int(time.time()) - 8)
+        requests.append(RequestSpec('patch', url))
+        return requests
+
+    def media_requests(self, now: datetime.datetime) -> list[RequestSpec]:
+        stream = models.Stream.get(directory=BBB_FIXTURE.name)
+        timing = DashTiming(now, stream.timing_reference, OptionsContainer(mode='live'))
+        zero = datetime.timedelta()
+        requests: list[RequestSpec] = []
+        for mf in stream.media_files:
+            rep = mf.representation
+            ext: str = 'm4a' if rep.content_type == 'audio' else 'm4v'
+            query: str = '?drm=all' if mf.encrypted else ''
+            suffix: str = ':enc' if mf.encrypted else ''
+            for mode in ['vod', 'live']:
+                url = flask.url_for(
+                    'dash-media', mode=mode, stream=stream.directory, filename=mf.name,
+                    segment_num='init', ext=ext)
+                requests.append(RequestSpec(f'init:{mode}{suffix}', f'{url}{query}'))
+            for num in range(rep.start_number, rep.start_number + rep.num_media_segments):
+                url = flask.url_for(
+                    'dash-media', mode='vod', stream=stream.directory, filename=mf.name,
+                    segment_num=num, ext=ext)
+                requests.append(RequestSpec(f'media:vod{suffix}', f'{url}{query}'))
+            rep.set_dash_timing(timing, period_start=zero, period_time_offset=zero, duration=None)
+            first, last = rep.calculate_first_and_last_segment_number()
+            for num in range(max(first, last - 4), last):
+                url = flask.url_for(
+                    'dash-media', mode='live', stream=stream.directory, filename=mf.name,
+                    segment_num=num, ext=ext)
+                requests.append(RequestSpec(f'media:live{suffix}', f'{url}{query}'))
+            if mf.encrypted:
+                continue
+            url = flask.url_for('dash-od-media', stream=stream.directory, filename=mf.name, ext=ext)
+            for seg in rep.segments[1:4]:
+                requests.append(RequestSpec('od-media', url, headers={
+                    'Range': f'bytes={seg.pos}-{seg.pos + seg.size - 1}'}))
+        return requests
+
+    def multi_period_requests(self) -> list[RequestSpec]:
+        mps = models.MultiPeriodStream.get(name=MPS_FIXTURE.name)
+        requests: list[RequestSpec] = []
+        for mode in ['vod', 'live']:
+            url = flask.url_for(
+                'mps-manifest', mode=mode, mps_name=mps.name, manifest='hand_made.mpd')
+            requests.append(RequestSpec(f'mps-manifest:{mode}', url))
+        for period in mps.periods:
+            for mf in period.stream.media_files:
+                if mf.encrypted:
+                    continue
+                ext: str = 'm4a' if mf.content_type == 'audio' else 'm4v'
+                url = flask.url_for(
+                    'mps-init-seg', mode='vod', mps_name=mps.name, ppk=period.pk,
+                    filename=mf.name, ext=ext)
+                requests.append(RequestSpec('mps-init', url))
+                for num in range(1, 4):
+                    url = flask.url_for(
+                        'mps-media-seg-by-number', mode='vod', mps_name=mps.name,
+                        ppk=period.pk, filename=mf.name, segment_num=num, ext=ext)
+                    requests.append(RequestSpec('mps-media', url))
+        return requests
+
+    def request_mix(self) -> list[RequestSpec]:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        requests: list[RequestSpec] = (
+            self.manifest_requests() + self.media_requests(now) +
+            self.multi_period_requests())
+        if self.route_filter:
+            rgx = re.compile(self.route_filter)
+            requests = [req for req in requests if rgx.search(req.route)]
+        return requests
+
+    def test_request_throughput(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        self.setup_multi_period_stream(MPS_FIXTURE)
+        rand = random.Random(self.seed)
+        samples: dict[str, list[int]] = {}
+        total_time: int = 0
+        for _ in range(self.iterations):
+            # the live segment numbers are calculated for each iteration, as
+            # they move as time progresses
+            requests: list[RequestSpec] = self.request_mix()
+            self.assertGreater(len(requests), 0)
+            rand.shuffle(requests)
+            for req in requests:
+                start: int = time.perf_counter_ns()
+                response = self.client.get(req.url, headers=req.headers)
+                duration: int = time.perf_counter_ns() - start
+                self.assertIn(response.status_code, {200, 206}, msg=req.url)
+                samples.setdefault(req.route, []).append(duration)
+                total_time += duration
+        self.stats = {
+            route: RouteStats.from_samples(route, durations)
+            for route, durations in sorted(samples.items())}
+        num_requests: int = sum(len(durations) for durations in samples.values())
+        self.requests_per_second = 1e9 * num_requests / total_time
+
+
+def main(argv: list[str]) -> int:
+    """
+    Command line entry point. Returns a non-zero value if the median latency
+    of any route is slower than the baseline by more than the threshold.
+    """
+    ap = create_argument_parser('Run request throughput benchmark', BASELINE_FILE)
+    ap.add_argument('--iterations', type=int, default=RequestThroughputBenchmark.iterations,
+                    help='Number of times to make each request')
+    ap.add_argument('--seed', type=int, default=RequestThroughputBenchmark.seed,
+                    help='Seed used to shuffle the order of requests')
+    args = ap.parse_args(argv[1:])
+
+    RequestThroughputBenchmark.iterations = args.iterations
+    RequestThroughputBenchmark.seed = args.seed
+    RequestThroughputBenchmark.route_filter = args.filter
+    bench = RequestThroughputBenchmark('test_request_throughput')
+    result = unittest.TextTestRunner(verbosity=0).run(bench)
+    if not result.wasSuccessful():
+        return 2
+    print(f'{"Route":<52} {"Count":>6} {"Req/s":>9} {"p50":>10} {"p95":>10} {"p99":>10}')
+    for stats in bench.stats.values():
+        print(f'{stats.route:<52} {stats.count:6d} {stats.requests_per_second:9.1f} '
+              f'{stats.p50_us / 1000:8.2f}ms {stats.p95_us / 1000:8.2f}ms '
+              f'{stats.p99_us / 1000:8.2f}ms')
+    print(f'{"Total":<52} {"":>6} {bench.requests_per_second:9.1f}')
+    js_results: dict[str, Any] = {
+        route: asdict(stats) for route, stats in bench.stats.items()}
+    return check_baseline(args, js_results, 'p50_us')
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -7,6 +7,8 @@
 #############################################################################
 
 import binascii
+from collections.abc import Iterator
+import contextlib
 from datetime import timedelta, datetime
 import hashlib
 from importlib import metadata
@@ -30,6 +32,7 @@ from dashlive.mpeg.dash.representation import Representation
 from dashlive.server import models
 from dashlive.server.app import create_app
 from dashlive.server.folders import AppFolders
+from dashlive.server.models.db import QueryStats, query_counter
 from dashlive.server.requesthandler.user_management import LoginResponseJson
 
 from .async_flask_testing import AsyncFlaskTestCase
@@ -464,6 +467,29 @@ class FlaskTestBase(DashTestCaseMixin, AsyncFlaskTestCase, PyfakefsTestCaseMixin
         logout_url: str = flask.url_for('logout')
         return self.client.get(logout_url)
 
+    @contextlib.contextmanager
+    def assertMaxQueries(self, max_queries: int, msg: str | None = None) -> Iterator[None]:
+        """
+        Context manager that checks that the code it wraps makes no more
+        than max_queries database queries. Requests made using self.client
+        are handled in the current thread, so this can be used to check
+        the query budget of a route:
+
+            with self.assertMaxQueries(2):
+                response = self.client.get(url)
+        """
+        self.assertTrue(
+            query_counter.is_instrumented(models.db.engine),
+            'database queries are not being counted for this engine')
+        start: QueryStats = query_counter.stats()
+        yield
+        stats: QueryStats = query_counter.stats() - start
+        if stats.count > max_queries:
+            if msg is None:
+                msg = ''
+            self.fail(
+                f'{stats.count} database queries made, expected at most {max_queries} {msg}')
+
     def assertNotAuthorized(self, response, ajax: int) -> None:
         if ajax:
             self.assertEqual(response.status_code, 401)
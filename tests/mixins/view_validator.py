@@ -41,8 +41,11 @@ class ViewsTestDashValidator(DashValidator):
                  pool: WorkerPool,
                  encrypted: bool = False,
                  check_media: bool = True,
-                 debug: bool = False) -> None:
-        opts = ValidatorOptions(duration=duration, encrypted=encrypted, pool=pool)
+                 debug: bool = False,
+                 stream_segments: bool = False) -> None:
+        opts = ValidatorOptions(
+            duration=duration, encrypted=encrypted, pool=pool,
+            stream_segments=stream_segments)
         if not check_media:
             opts.verify &= ~ValidationFlag.MEDIA
         opts.log = logging.getLogger(__name__)
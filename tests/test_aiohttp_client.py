@@ -0,0 +1,95 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp import test_utils
+
+from dashlive.mpeg.dash.validator.aiohttp_http_client import AiohttpHttpClient
+
+class TestAiohttpHttpClient(unittest.IsolatedAsyncioTestCase):
+    MANIFEST: str = '<?xml version="1.0"?><MPD xmlns="urn:mpeg:dash:schema:mpd:2011" />'
+    PAYLOAD: bytes = bytes(range(256)) * 64
+
+    async def asyncSetUp(self) -> None:
+        self.active: int = 0
+        self.max_active: int = 0
+        self.peers: set[tuple] = set()
+        app = web.Application()
+        app.router.add_get('/manifest.mpd', self.manifest)
+        app.router.add_get('/media.mp4', self.media)
+        app.router.add_get('/slow', self.slow)
+        self.server = test_utils.TestServer(app)
+        await self.server.start_server()
+        self.client = AiohttpHttpClient(concurrency=2)
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+        await self.server.close()
+
+    async def manifest(self, request: web.Request) -> web.Response:
+        self.peers.add(request.transport.get_extra_info('peername'))
+        return web.Response(text=self.MANIFEST, content_type='application/dash+xml')
+
+    async def media(self, request: web.Request) -> web.Response:
+        if 'Range' in request.headers:
+            start, end = request.http_range.start, request.http_range.stop
+            return web.Response(
+                body=self.PAYLOAD[start:end], status=206, content_type='video/mp4')
+        return web.Response(body=self.PAYLOAD, content_type='video/mp4')
+
+    async def slow(self, request: web.Request) -> web.Response:
+        self.active += 1
+        self.max_active = max(self.active, self.max_active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return web.Response(text='ok')
+
+    async def test_get(self) -> None:
+        response = await self.client.get(str(self.server.make_url('/manifest.mpd')))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/dash+xml; charset=utf-8')
+        self.assertEqual(response.get_data(as_text=True), self.MANIFEST)
+        self.assertEqual(response.xml.tag, '{urn:mpeg:dash:schema:mpd:2011}MPD')
+        response = await self.client.get(
+            str(self.server.make_url('/media.mp4')), headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.get_data(as_text=False), self.PAYLOAD[10:20])
+        response = await self.client.get(str(self.server.make_url('/unknown')))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_connections_are_reused(self) -> None:
+        for _ in range(5):
+            response = await self.client.get(str(self.server.make_url('/manifest.mpd')))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.peers), 1)
+
+    async def test_concurrency_per_host(self) -> None:
+        url: str = str(self.server.make_url('/slow'))
+        responses = await asyncio.gather(*[self.client.get(url) for _ in range(6)])
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.max_active, 2)
+
+    async def test_streamed_body(self) -> None:
+        response = await self.client.get(str(self.server.make_url('/media.mp4')), stream=True)
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaises(ValueError):
+            response.get_data(as_text=False)
+        chunk: bytes = await response.read_chunk(100)
+        self.assertEqual(chunk, self.PAYLOAD[:100])
+        self.assertEqual(response.tell(), 100)
+        body: bytes = await response.load_body()
+        self.assertEqual(body, self.PAYLOAD[100:])
+        response.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
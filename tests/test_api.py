@@ -17,11 +17,14 @@ from unittest.mock import patch
 
 from bs4 import BeautifulSoup
 import flask
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
 from werkzeug.test import TestResponse
 
 from dashlive.mpeg.dash.representation import Representation
 from dashlive.mpeg.dash.segment import Segment
 from dashlive.server import models
+from dashlive.server.models.key import key_jwk_cache
 from dashlive.server.models.user import UserSummaryJson
 from dashlive.server.options.repository import OptionsRepository
 from dashlive.server.options.types import CgiOption
@@ -147,6 +150,68 @@ class TestRestApi(FlaskTestBase):
         self.assertIn(expected_result['title'], response.text)
         self.assertIn(expected_result['directory'], response.text)
 
+    def test_list_streams_pagination(self) -> None:
+        self.setup_media()
+        for idx in range(4):
+            models.Stream(title=f'stream {idx}', directory=f'stream{idx}').add()
+        models.db.session.commit()
+        all_pks: list[int] = sorted([st.pk for st in models.Stream.all()])
+        self.assertEqual(len(all_pks), 5)
+
+        response = self.client.get(flask.url_for('list-streams', ajax=1))
+        self.assert200(response)
+        self.assertNotIn('next', response.json)
+        self.assertListEqual(
+            [st['pk'] for st in response.json['streams']], all_pks)
+        bbb = response.json['streams'][0]
+        self.assertEqual(bbb['directory'], BBB_FIXTURE.name)
+        self.assertGreater(len(bbb['media_files']), 0)
+        self.assertNotEqual(bbb['duration'], 'PT0S')
+        self.assertNotIn('tracks', bbb)
+
+        pages: list[list[int]] = []
+        after: int | None = None
+        while True:
+            response = self.client.get(flask.url_for(
+                'list-streams', ajax=1, limit=2, after=after))
+            self.assert200(response)
+            pages.append([st['pk'] for st in response.json['streams']])
+            after = response.json.get('next')
+            if after is None:
+                break
+            self.assertEqual(after, pages[-1][-1])
+        self.assertListEqual(pages, [all_pks[0:2], all_pks[2:4], all_pks[4:]])
+
+    def test_list_streams_fields(self) -> None:
+        self.setup_media()
+        url: str = flask.url_for(
+            'list-streams', ajax=1, fields='title,directory,tracks')
+        with patch.object(models.Stream, 'duration') as duration:
+            response = self.client.get(url)
+            duration.assert_not_called()
+        self.assert200(response)
+        self.assertEqual(len(response.json['streams']), 1)
+        stream = response.json['streams'][0]
+        self.assertEqual(set(stream.keys()), {'pk', 'title', 'directory', 'tracks'})
+        db_stream = models.Stream.get(directory=BBB_FIXTURE.name)
+        assert db_stream is not None
+        expected: dict[str, int] = {}
+        for content_type in ['video', 'audio', 'text']:
+            expected[content_type] = len({
+                mf.track_id for mf in models.MediaFile.search(
+                    stream=db_stream, content_type=content_type)})
+        self.assertGreater(expected['audio'], 0)
+        self.assertDictEqual(stream['tracks'], expected)
+        summary = db_stream.track_summary()
+        self.assertEqual(summary.video.count, expected['video'])
+        self.assertEqual(summary.audio.count, expected['audio'])
+        self.assertEqual(summary.text.count, expected['text'])
+
+        for params in [{'fields': 'title,unknown'}, {'limit': '0'}, {'after': 'abc'}]:
+            response = self.client.get(flask.url_for('list-streams', ajax=1, **params))
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('error', response.json)
+
     def test_get_media_info(self):
         """
         Test getting info on one media file
@@ -658,6 +723,122 @@ class TestRestApi(FlaskTestBase):
             }
         self.assertEqual(expected_result, response.json)
 
+    def test_clearkey_batch_request(self):
+        keypair = models.Key(
+            hkid='1AB45440532C439994DC5C5AD9584BAC'.lower(),
+            hkey='ccc0f2b3b279926496a7f5d25da692f6',
+            computed=False)
+        keypair.add(commit=True)
+        url = flask.url_for('clearkey')
+        unknown_kid = self.base64url_encode(keypair.hkid.replace('0', '9'))
+        request = [{
+            "kids": [self.base64url_encode(keypair.KID.raw), unknown_kid],
+            "type": "temporary",
+        }, {
+            "kids": [unknown_kid],
+            "type": "persistent-license",
+        }, {
+            "type": "temporary",
+        }]
+        self.logout_user()
+        response = self.client.post(url, json=request)
+        self.assert200(response)
+        expected_result = [{
+            "keys": [{
+                "kty": "oct",
+                "kid": self.base64url_encode(keypair.KID.raw),
+                "k": self.base64url_encode(keypair.KEY.raw),
+            }],
+            "type": "temporary",
+        }, {
+            "keys": [],
+            "type": "persistent-license",
+        }, {
+            "error": "Error: 'kids'",
+        }]
+        self.assertEqual(expected_result, response.json)
+
+    def test_clearkey_key_cache(self):
+        keypair = models.Key(
+            hkid='1AB45440532C439994DC5C5AD9584BAC'.lower(),
+            hkey='ccc0f2b3b279926496a7f5d25da692f6',
+            computed=False)
+        keypair.add(commit=True)
+        url = flask.url_for('clearkey')
+        request = {
+            "kids": [self.base64url_encode(keypair.KID.raw)],
+            "type": "temporary",
+        }
+        self.logout_user()
+        for hkey in ['ccc0f2b3b279926496a7f5d25da692f6', '0123456789abcdef0123456789abcdef']:
+            if hkey != keypair.hkey:
+                keypair.hkey = hkey
+                models.db.session.commit()
+            info = key_jwk_cache.cache_info()
+            for idx in range(3):
+                response = self.client.post(url, json=request)
+                self.assert200(response)
+                self.assertEqual(
+                    response.json['keys'][0]['k'], self.base64url_encode(hkey))
+            # only the first request needs to query the database
+            self.assertEqual(key_jwk_cache.cache_info().misses, info.misses + 1)
+            self.assertEqual(key_jwk_cache.cache_info().hits, info.hits + 2)
+        keypair.delete()
+        models.db.session.commit()
+        response = self.client.post(url, json=request)
+        self.assertEqual({"keys": [], "type": "temporary"}, response.json)
+
+    def test_clearkey_cache_invalidated_on_commit(self):
+        keypair = models.Key(
+            hkid='1AB45440532C439994DC5C5AD9584BAC'.lower(),
+            hkey='ccc0f2b3b279926496a7f5d25da692f6',
+            computed=False)
+        keypair.add(commit=True)
+        url = flask.url_for('clearkey')
+        request = {
+            "kids": [self.base64url_encode(keypair.KID.raw)],
+            "type": "temporary",
+        }
+        self.logout_user()
+        response = self.client.post(url, json=request)
+        self.assertEqual(
+            response.json['keys'][0]['k'], self.base64url_encode(keypair.hkey))
+        self.assertEqual(key_jwk_cache.cache_info().currsize, 1)
+        generation: int = key_jwk_cache.generation
+
+        # a flush does not make the change visible to other connections
+        new_key: str = '0123456789abcdef0123456789abcdef'
+        keypair.hkey = new_key
+        models.db.session.flush()
+        self.assertEqual(key_jwk_cache.generation, generation)
+        self.assertEqual(key_jwk_cache.cache_info().currsize, 1)
+        models.db.session.commit()
+        self.assertGreater(key_jwk_cache.generation, generation)
+        self.assertEqual(key_jwk_cache.cache_info().currsize, 0)
+        response = self.client.post(url, json=request)
+        self.assertEqual(response.json['keys'][0]['k'], self.base64url_encode(new_key))
+
+        # a transaction that started before another session committed a
+        # change to a Key must not add its keys to the cache
+        key_jwk_cache.invalidate()
+        self.assertEqual(models.Key.count(), 1)
+        with Session(models.db.engine) as writer:
+            key = writer.execute(
+                sa.select(models.Key).filter_by(hkid=keypair.hkid)).scalar_one()
+            key.hkey = 'ccc0f2b3b279926496a7f5d25da692f6'
+            writer.commit()
+        models.Key.get_jwks([keypair.hkid])
+        self.assertEqual(key_jwk_cache.cache_info().currsize, 0)
+        models.db.session.commit()
+        jwks = models.Key.get_jwks([keypair.hkid])
+        self.assertEqual(
+            jwks[keypair.hkid]['k'], self.base64url_encode('ccc0f2b3b279926496a7f5d25da692f6'))
+        self.assertEqual(key_jwk_cache.cache_info().currsize, 1)
+        response = self.client.post(url, json=request)
+        self.assertEqual(
+            response.json['keys'][0]['k'],
+            self.base64url_encode('ccc0f2b3b279926496a7f5d25da692f6'))
+
     def base64url_encode(self, value):
         # See https://tools.ietf.org/html/rfc7515#page-54
         if len(value) != 16:
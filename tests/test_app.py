@@ -31,9 +31,11 @@ import unittest
 from unittest.mock import patch
 
 import flask
+import sqlalchemy as sa
 
 from dashlive.server import models
 from dashlive.server.app import create_app
+from dashlive.server.models.connection import SqliteTuning
 
 from .mixins.mixin import TestCaseMixin
 
@@ -92,6 +94,68 @@ class TestAppConfig(TestCaseMixin, unittest.TestCase):
             self.assertEqual(cfg['DEFAULT_ADMIN_PASSWORD'], 't3st.secret!')
             self.assertEqual(cfg['ALLOWED_DOMAINS'], 'a.domain')
 
+    def test_sqlite_tuning_settings(self) -> None:
+        self.assertIsNone(SqliteTuning.from_settings({}))
+        self.assertIsNone(SqliteTuning.from_settings({'DB_SQLITE_TUNING': 'false'}))
+        self.assertEqual(SqliteTuning.from_settings({'DB_SQLITE_TUNING': True}), SqliteTuning())
+        tuning = SqliteTuning.from_settings({
+            'DB_SQLITE_TUNING': 'on',
+            'DB_BUSY_TIMEOUT': '250',
+            'DB_POOL_SIZE': 4,
+            'DB_POOL_OVERFLOW': '',
+        })
+        self.assertEqual(tuning.busy_timeout, 250)
+        self.assertEqual(tuning.pool_size, 4)
+        self.assertEqual(tuning.max_overflow, SqliteTuning().max_overflow)
+        self.assertIn('PRAGMA journal_mode=WAL', tuning.pragmas())
+
+    def test_sqlite_tuning_from_environment(self) -> None:
+        tmpdir = self.create_temp_folder()
+        config = {
+            **self.config,
+            'FLASK_SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmpdir / 'tuned.db3'}",
+            'DB_SQLITE_TUNING': '1',
+            'DB_SQLITE_CACHE_SIZE': '4096',
+        }
+        with patch.dict('dashlive.server.app.environ', config, clear=True):
+            flask_app = create_app(create_default_user=False, wss=False)
+        with flask_app.app_context():
+            self.assertEqual(models.db.engine.pool.size(), SqliteTuning().pool_size)
+            session = models.db.session
+            self.assertEqual(
+                session.execute(sa.text('PRAGMA journal_mode')).scalar_one(), 'wal')
+            self.assertEqual(
+                session.execute(sa.text('PRAGMA cache_size')).scalar_one(), -4096)
+            # synchronous=NORMAL is reported as 1
+            self.assertEqual(
+                session.execute(sa.text('PRAGMA synchronous')).scalar_one(), 1)
+            models.db.session.remove()
+            models.db.engine.dispose()
+
+    def test_sqlite_tuning_in_memory_database(self) -> None:
+        tuning = SqliteTuning.from_settings({
+            'DB_SQLITE_TUNING': '1',
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        })
+        self.assertTrue(tuning.in_memory)
+        self.assertNotIn('pool_size', tuning.engine_options())
+        self.assertNotIn('PRAGMA journal_mode=WAL', tuning.pragmas())
+        config = {
+            **self.config,
+            'FLASK_SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'DB_SQLITE_TUNING': '1',
+            'DB_SQLITE_CACHE_SIZE': '4096',
+        }
+        with patch.dict('dashlive.server.app.environ', config, clear=True):
+            flask_app = create_app(create_default_user=True, wss=False)
+        with flask_app.app_context():
+            session = models.db.session
+            self.assertEqual(
+                session.execute(sa.text('PRAGMA cache_size')).scalar_one(), -4096)
+            self.assertIsNotNone(models.User.get(username='default.admin'))
+            models.db.session.remove()
+            models.db.engine.dispose()
+
     def create_temp_folder(self) -> Path:
         tmpdir = tempfile.mkdtemp()
         self._temp_dir.value = bytes(tmpdir, 'utf-8')
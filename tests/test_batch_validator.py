@@ -0,0 +1,134 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from collections.abc import Iterator
+import json
+import os
+import tempfile
+import unittest
+
+import flask
+
+from dashlive.mpeg.dash.validator.batch import (
+    BatchOptions,
+    BatchSummary,
+    BatchValidator,
+    is_encrypted_url,
+)
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestBatchValidator(FlaskTestBase):
+    def manifest_urls(self) -> list[str]:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name, manifest='hand_made.mpd')
+        unknown: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream='unknown', manifest='hand_made.mpd')
+        return [url, f'{url}?drm=clearkey', unknown]
+
+    async def run_batch(self, urls: list[str], resume: bool = False) -> BatchSummary:
+        options = BatchOptions(processes=0, concurrency=2, duration=4)
+        bv = BatchValidator(
+            urls, 'results.jsonl', options=options, resume=resume,
+            http_client=self.async_client)
+        return await bv.run()
+
+    def read_report(self) -> list[dict]:
+        with open('results.jsonl', 'rt') as src:
+            return [json.loads(line) for line in src]
+
+    async def test_json_lines_report(self) -> None:
+        urls: list[str] = self.manifest_urls()
+        summary = await self.run_batch(urls)
+        self.assertEqual(summary.passed, 2)
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual(summary.skipped, 0)
+        results = {item['url']: item for item in self.read_report()}
+        self.assertEqual(set(results.keys()), set(urls))
+        for url in urls[:2]:
+            item = results[url]
+            self.assertEqual(item['status'], 'ok')
+            self.assertEqual(item['errorCount'], 0)
+            self.assertGreater(item['bytes'], 0)
+            self.assertGreater(item['requests'], 1)
+            self.assertGreater(item['duration'], 0)
+        self.assertEqual(results[urls[2]]['status'], 'failed')
+        self.assertGreater(results[urls[2]]['errorCount'], 0)
+
+    async def test_resume_interrupted_run(self) -> None:
+        urls: list[str] = self.manifest_urls()
+        with open('results.jsonl', 'wt') as dest:
+            dest.write(json.dumps({'url': urls[0], 'status': 'ok', 'errorCount': 0}))
+            dest.write('\n{"url": "')
+        summary = await self.run_batch(urls, resume=True)
+        self.assertEqual(summary.skipped, 1)
+        self.assertEqual(summary.passed, 1)
+        self.assertEqual(summary.failed, 1)
+        self.assertEqual(summary.total, len(urls))
+        with open('results.jsonl', 'rt') as src:
+            lines: list[str] = src.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1], '{"url": "')
+        reported: list[str] = [json.loads(line)['url'] for line in lines if line != lines[1]]
+        self.assertListEqual(sorted(reported), sorted(urls))
+
+
+class TestBatchValidatorProcessPool(unittest.IsolatedAsyncioTestCase):
+    async def test_process_pool(self) -> None:
+        # nothing is listening on port 1, so every manifest fails to load
+        urls: list[str] = [
+            f'http://127.0.0.1:1/dash/vod/bbb/hand_made.mpd?id={idx}' for idx in range(3)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output: str = os.path.join(tmpdir, 'results.jsonl')
+            options = BatchOptions(processes=2, concurrency=2, http_client='requests')
+            summary = await BatchValidator(urls, output, options=options).run()
+            with open(output, 'rt') as src:
+                results = [json.loads(line) for line in src]
+        self.assertEqual(summary.failed, len(urls))
+        self.assertEqual(sorted([item['url'] for item in results]), urls)
+        for item in results:
+            self.assertEqual(item['status'], 'failed')
+            self.assertGreater(item['errorCount'], 0)
+
+    def test_chunks_only_skip_completed_urls(self) -> None:
+        urls: Iterator[str] = (f'http://localhost/{idx}.mpd' for idx in range(10))
+        bv = BatchValidator(urls, 'unused.jsonl', options=BatchOptions(concurrency=4))
+        done: set[str] = {'http://localhost/3.mpd'}
+        summary = BatchSummary()
+        chunks: list[list[str]] = list(bv.chunks(done, summary))
+        self.assertListEqual([len(chunk) for chunk in chunks], [4, 4, 1])
+        self.assertNotIn('http://localhost/3.mpd', sum(chunks, []))
+        self.assertEqual(summary.skipped, 1)
+        self.assertSetEqual(done, {'http://localhost/3.mpd'})
+
+    def test_manifest_combinations(self) -> None:
+        url: str = 'http://localhost:5000/dash/vod/bbb/hand_made.mpd'
+        urls: list[str] = list(BatchValidator.manifest_combinations(url, simplified=True))
+        self.assertGreater(len(urls), 1)
+        self.assertEqual(len(set(urls)), len(urls))
+        for item in urls:
+            self.assertTrue(item.startswith(url))
+        shards: list[str] = []
+        for shard in range(2):
+            shards += list(BatchValidator.manifest_combinations(
+                url, simplified=True, shard=shard, num_shards=2))
+        self.assertListEqual(sorted(shards), sorted(urls))
+        with self.assertRaises(ValueError):
+            next(BatchValidator.manifest_combinations('http://localhost:5000/index.html'))
+
+    def test_is_encrypted_url(self) -> None:
+        self.assertTrue(is_encrypted_url('http://a/b.mpd?drm=clearkey'))
+        self.assertTrue(is_encrypted_url('http://a/b.mpd?acodec=mp4a&drm=playready'))
+        self.assertFalse(is_encrypted_url('http://a/b.mpd?drm=none'))
+        self.assertFalse(is_encrypted_url('http://a/b.mpd'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from dataclasses import asdict
+from pathlib import Path
+import tempfile
+import unittest
+
+from .benchmarks.harness import (
+    BenchmarkCase,
+    BenchmarkRegistry,
+    BenchmarkResult,
+    compare_results,
+    load_results,
+    measure,
+    save_results,
+)
+from .benchmarks.micro import registry as micro_registry
+from .benchmarks import sqlite_concurrency, throughput
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_measure_without_setup(self) -> None:
+        calls: list[int] = []
+        result = measure('append', BenchmarkCase(lambda: calls.append(1)),
+                         rounds=3, min_round_time=0.001)
+        self.assertEqual(result.rounds, 3)
+        self.assertGreater(result.loops, 1)
+        self.assertGreaterEqual(len(calls), 3 * result.loops)
+        self.assertLessEqual(result.min_us, result.median_us)
+
+    def test_measure_with_setup(self) -> None:
+        states: list[list[int]] = []
+
+        def setup() -> list[int]:
+            states.append([])
+            return states[-1]
+
+        result = measure('setup', BenchmarkCase(lambda state: state.append(1), setup), rounds=2)
+        self.assertEqual(result.loops, 1)
+        self.assertEqual(result.rounds, len(states))
+        for state in states:
+            self.assertListEqual(state, [1])
+
+    def test_duplicate_name(self) -> None:
+        registry = BenchmarkRegistry()
+        registry.register('one')(lambda: BenchmarkCase(lambda: None))
+        with self.assertRaises(ValueError):
+            registry.register('one')(lambda: BenchmarkCase(lambda: None))
+        registry.register('two')(lambda: BenchmarkCase(lambda: None))
+        self.assertListEqual(registry.names(), ['one', 'two'])
+        self.assertListEqual(registry.names('^t'), ['two'])
+
+    def test_compare_with_baseline(self) -> None:
+        def result(name: str, min_us: float) -> BenchmarkResult:
+            return BenchmarkResult(
+                name=name, rounds=1, loops=1, min_us=min_us, median_us=min_us,
+                mean_us=min_us, stdev_us=0)
+
+        baseline = {'a': result('a', 10.0), 'b': result('b', 10.0), 'c': result('c', 1.0)}
+        current = {'a': result('a', 11.0), 'b': result('b', 20.0), 'd': result('d', 1.0)}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = Path(tmpdir) / 'baseline.json'
+            save_results(filename, {k: asdict(v) for k, v in baseline.items()})
+            loaded = load_results(filename)
+        self.assertEqual({k: BenchmarkResult(**v) for k, v in loaded.items()}, baseline)
+        current_js = {k: asdict(v) for k, v in current.items()}
+        comparisons = {item.name: item for item in compare_results(current_js, loaded)}
+        self.assertListEqual(sorted(comparisons.keys()), ['a', 'b'])
+        self.assertFalse(comparisons['a'].is_regression(0.25))
+        self.assertTrue(comparisons['b'].is_regression(0.25))
+        self.assertAlmostEqual(comparisons['b'].ratio, 2.0)
+
+    def test_micro_benchmarks_run(self) -> None:
+        for name in micro_registry.names():
+            with self.subTest(name=name):
+                case: BenchmarkCase = micro_registry.factories[name]()
+                if case.setup is None:
+                    case.run()
+                else:
+                    case.run(case.setup())
+
+
+class TestRequestThroughputBenchmark(throughput.RequestThroughputBenchmark):
+    """
+    Checks that every request in the throughput benchmark succeeds
+    """
+    iterations = 1
+
+    def test_request_throughput(self) -> None:
+        super().test_request_throughput()
+        for route in ['manifest:hand_made.mpd:live', 'media:vod:enc', 'mps-media', 'patch']:
+            self.assertIn(route, self.stats)
+        for stats in self.stats.values():
+            self.assertLessEqual(stats.p50_us, stats.p99_us)
+        self.assertGreater(self.requests_per_second, 0)
+
+
+class TestSqliteConcurrencyBenchmark(unittest.TestCase):
+    def test_sqlite_concurrency(self) -> None:
+        options = sqlite_concurrency.ConcurrencyOptions(
+            duration=0.2, readers=2, initial_files=5, files_per_transaction=5,
+            payload_size=64)
+        results = sqlite_concurrency.run_profiles(options)
+        self.assertListEqual([res.profile for res in results], ['default', 'tuned'])
+        self.assertNotEqual(results[0].journal_mode, 'wal')
+        self.assertEqual(results[1].journal_mode, 'wal')
+        for res in results:
+            self.assertGreater(res.reads, 0)
+            self.assertGreater(res.writes, 0)
+            self.assertLessEqual(res.p50_us, res.max_us)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@
 #
 #############################################################################
 
+import itertools
 import unittest
 
 from dashlive.drm.location import DrmLocation
@@ -15,6 +16,7 @@ from dashlive.server.options.options_types import PingOptionsType, PlayreadyOpti
 from dashlive.server.options.form_input_field import FieldOption
 from dashlive.server.options.repository import OptionsRepository
 from dashlive.server.options.types import OptionUsage
+from dashlive.server.manifests import SupportedOptionTupleList, manifest_map
 from dashlive.server.requesthandler.base import RequestHandlerBase
 from dashlive.utils.json_object import JsonObject
 
@@ -224,6 +226,7 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
             'clockDrift': None,
             'dashjsVersion': None,
             'drmSelection': [],
+            'encryptionScheme': None,
             'eventTypes': [],
             'failureCount': None,
             'forcePeriodDurations': False,
@@ -265,6 +268,7 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
                 'version': 0
             },
             'segmentTimeline': False,
+            'serverTiming': False,
             'shakaVersion': None,
             'textCodec': None,
             'textErrors': [],
@@ -289,13 +293,13 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
     def test_default_short_option_values(self) -> None:
         expected: dict[str, str] = {
             'ab': '1', 'ac': 'mp4a', 'ad': '', 'ahe': '[]', 'ast': 'year', 'bug': '',
-            'clu': None, 'dft': '', 'djVer': '', 'drm': '', 'evs': '', 'hfc': '', 'fpd': '0',
+            'clu': None, 'dft': '', 'djVer': '', 'drm': '', 'esch': '', 'evs': '', 'hfc': '', 'fpd': '0',
             'lee': '16', 'ma': '', 'mt': '', 'mhe': '[]', 'mlu': None, 'mup': '', 'ntps': '',
             'patch': '0', 'pinCoun': 0, 'pinDura': 200, 'pinInba': True, 'pinInte': 1000,
             'pinStar': 0, 'pinTime': 100, 'pinValu': '0', 'pinVers': 0, 'plu': None, 'pff': True,
             'pvn': None, 'sctCoun': 0, 'sctDura': 200, 'sctInba': True, 'sctInte': 1000,
             'sctProg': 1620, 'sctStar': 0, 'sctTime': 100, 'sctValu': None, 'sctVers': 0,
-            'st': '0', 'skVer': '', 'tc': '', 'the': '[]', 'tl': '', 'ptxLang': '', 'tbd': '1800',
+            'st': '0', 'stm': '0', 'skVer': '', 'tc': '', 'the': '[]', 'tl': '', 'ptxLang': '', 'tbd': '1800',
             'uc': '', 'base': '1', 'utc': '', 'utv': '', 'vcor': '', 'vcfc': '', 'vhe': '[]',
             'vp': 'native', 'vt': '0',
         }
@@ -397,6 +401,7 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
             "clockDrift": None,
             "dashjsVersion": None,
             "drmSelection": [],
+            "encryptionScheme": None,
             "eventTypes": [
                 "ping"
             ],
@@ -440,6 +445,7 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
                 "version": 0
             },
             "segmentTimeline": False,
+            "serverTiming": False,
             "shakaVersion": None,
             "textCodec": None,
             "textErrors": [],
@@ -675,6 +681,57 @@ class TestCgiOptions(TestCaseMixin, unittest.TestCase):
                 opts_from_cgi = OptionsRepository.convert_cgi_options(cgi_str)
                 self.assertDictEqual(opts.toJSON(), opts_from_cgi.toJSON())
 
+    @staticmethod
+    def all_cgi_query_combinations(options: SupportedOptionTupleList) -> set[str]:
+        """
+        Checks every possible combination of option values
+        """
+        result: set[str] = set()
+        for values in itertools.product(*[opt.options for opt in options.options]):
+            params: dict[str, str] = {}
+            allowed: bool = True
+            for opt, val in zip(options.options, values):
+                if opt.cgi_name in options.restrictions:
+                    allowed = allowed and val in options.restrictions[opt.cgi_name]
+                params[opt.cgi_name] = val
+            if not allowed:
+                continue
+            candidate = OptionsRepository.convert_cgi_options(params)
+            candidate.update(**options.kwargs)
+            candidate.reset_unused_parameters(options.mode)
+            result.add(candidate.generate_cgi_parameters_string())
+        return result
+
+    def test_cgi_query_combinations(self) -> None:
+        test_cases: list[tuple[str, str, dict]] = [
+            ('hand_made.mpd', 'vod', {}),
+            ('hand_made.mpd', 'live', {'only': {'playreadyVersion', 'patch', 'drmSelection'}}),
+            ('hand_made.mpd', 'odvod', {'abr': True}),
+            ('manifest_n.mpd', 'live', {}),
+            ('manifest_vod_aiv.mpd', 'odvod', {}),
+        ]
+        for name, mode, kwargs in test_cases:
+            with self.subTest(name=name, mode=mode, kwargs=kwargs):
+                options = manifest_map[name].get_supported_dash_options(
+                    mode=mode, use=OptionUsage.MANIFEST, **kwargs)
+                expected: set[str] = self.all_cgi_query_combinations(options)
+                actual: list[str] = list(options.cgi_query_combinations())
+                self.assertEqual(len(actual), len(set(actual)))
+                self.assertSetEqual(expected, set(actual))
+                shards: list[str] = []
+                for shard in range(3):
+                    shards += list(options.cgi_query_combinations(shard=shard, num_shards=3))
+                self.assertListEqual(sorted(actual), sorted(shards))
+
+    def test_cgi_query_combinations_prunes_unused_options(self) -> None:
+        options = manifest_map['hand_made.mpd'].get_supported_dash_options(mode='vod')
+        for block in options.combination_blocks():
+            values = dict(block)
+            self.assertEqual(len(values['drm']), 1)
+            # the patch option is only used by live streams
+            self.assertEqual(len(values['patch']), 1)
+            self.assertGreater(len(values['acodec']), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
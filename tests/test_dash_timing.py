@@ -7,6 +7,7 @@
 #############################################################################
 import datetime
 # import logging
+import random
 import unittest
 
 from dashlive.mpeg.dash.reference import StreamTimingReference
@@ -14,7 +15,11 @@ from dashlive.mpeg.dash.representation import Representation
 from dashlive.mpeg.dash.segment import Segment
 from dashlive.mpeg.dash.timing import DashTiming
 from dashlive.server.options.container import OptionsContainer
-from dashlive.utils.date_time import timecode_to_timedelta
+from dashlive.utils.date_time import (
+    scale_timedelta,
+    timecode_to_timedelta,
+    timedelta_to_timecode,
+)
 
 from .mixins.mixin import TestCaseMixin
 
@@ -249,6 +254,82 @@ class TestDashTiming(TestCaseMixin, unittest.TestCase):
                 exp, seg_time,
                 msg=f'segment {idx} expected time {exp} got {seg_time}')
 
+    def test_integer_timing_matches_timedelta_calculations(self) -> None:
+        """
+        Property test that checks the integer timing calculations produce
+        the same results as the (previous) timedelta and float based
+        calculations, over several years of simulated uptime.
+        """
+        rng = random.Random(0x28)
+        start = datetime.datetime.fromisoformat('2020-01-01T00:00:00Z')
+        ten_years: int = 10 * 365 * 86400
+        # (timescale, segment_duration) pairs
+        formats: list[tuple[int, int]] = [
+            (240, 960), (1000, 3840), (90000, 360000), (48000, 96000),
+            (44100, 88200), (25, 50), (10_000_000, 20_000_000),
+        ]
+        for _ in range(500):
+            timescale, seg_dur = rng.choice(formats)
+            now = start + datetime.timedelta(
+                seconds=rng.randint(1, ten_years),
+                microseconds=rng.randint(0, 999_999))
+            depth: int = rng.choice([30, 60, 1800, 3600])
+            leeway: int = rng.choice([0, 16, 60])
+            num_segments: int = rng.randint(10, 200)
+            stream_ref = StreamTimingReference(
+                media_name='prop', content_type='video',
+                media_duration=num_segments * seg_dur,
+                num_media_segments=num_segments,
+                segment_duration=seg_dur,
+                timescale=timescale)
+            options = OptionsContainer(mode='live')
+            options.apply_options({
+                'leeway': str(leeway),
+                'depth': str(depth),
+                'start': '2020-01-01T00:00:00Z',
+            }, is_cgi=True)
+            timing = DashTiming(now, stream_ref, options)
+            segments: list[Segment] = [Segment(pos=0, duration=0, size=42)]
+            for num in range(num_segments):
+                segments.append(Segment(pos=(42 + num * 123), size=123, duration=seg_dur))
+            rep = Representation(
+                content_type='video', segments=segments, timescale=timescale,
+                segment_duration=seg_dur)
+            zero_td = datetime.timedelta()
+            rep.set_dash_timing(
+                timing, period_start=zero_td, period_time_offset=zero_td, duration=None)
+
+            elapsed: datetime.timedelta = now - start
+            first_available = elapsed - datetime.timedelta(seconds=depth)
+            msg = f'now={now} timescale={timescale} segment_duration={seg_dur}'
+            self.assertEqual(timing.elapsedTime, elapsed, msg=msg)
+            self.assertEqual(timing.firstAvailableTime, first_available, msg=msg)
+
+            expected_last: int = rep.start_number + int(scale_timedelta(
+                elapsed, timescale, seg_dur))
+            expected_first: int = max(
+                rep.start_number,
+                expected_last - 2 - int(timescale * depth // seg_dur))
+            self.assertEqual(
+                (expected_first, expected_last),
+                rep.calculate_first_and_last_segment_number(), msg=msg)
+            self.assertEqual(
+                timedelta_to_timecode(first_available, timescale),
+                rep.timedelta_to_timescale(first_available), msg=msg)
+
+            fta = first_available - datetime.timedelta(seconds=leeway)
+            for seg_num in range(expected_first - 2, expected_last + 3):
+                seg_time = (seg_num - rep.start_number) * seg_dur
+                if seg_time < 0:
+                    continue
+                seg_delta = datetime.timedelta(seconds=(float(seg_time) / float(timescale)))
+                available: bool = fta <= seg_delta <= elapsed
+                try:
+                    rep.calculate_segment_number_and_time(seg_time, None)
+                    self.assertTrue(available, msg=f'{msg} segment={seg_num}')
+                except ValueError:
+                    self.assertFalse(available, msg=f'{msg} segment={seg_num}')
+
 
 if __name__ == "__main__":
     # logging.getLogger().setLevel(logging.DEBUG)
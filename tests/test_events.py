@@ -6,6 +6,7 @@
 #
 #############################################################################
 
+import datetime
 from typing import Any
 import unittest
 
@@ -15,6 +16,7 @@ from dashlive import scte35
 from dashlive.mpeg import MPEG_TIMEBASE, mp4
 from dashlive.mpeg.dash.validator.representation import Representation
 from dashlive.server.events.ping_pong import PingPongEvents
+from dashlive.server.events.repeating_event_base import emsg_schedule
 from dashlive.server.events.scte35_events import Scte35Events
 from dashlive.utils.buffered_reader import BufferedReader
 
@@ -229,5 +231,70 @@ class TestDashEventGeneration(DashManifestCheckMixin, FlaskTestBase):
                 presentationTime += Scte35Events.DEFAULT_VALUES['interval']
 
 
+class TestEmsgSchedule(unittest.TestCase):
+    def test_schedule_matches_emsg_boxes(self) -> None:
+        """
+        Check that the cached emsg schedule produces the same bytes as
+        encoding the EventMessageBox objects
+        """
+        for clazz in [PingPongEvents, Scte35Events]:
+            evgen = clazz(count=0, inband=True, start=50, interval=300, timescale=100)
+            for seg_start in range(0, 4000, 400):
+                seg_end = seg_start + 400
+                boxes = evgen.emsg_boxes_for_range(seg_start, seg_end)
+                self.assertGreater(len(boxes), 0)
+                expected = b''.join([emsg.encode_as_bytes() for emsg in boxes])
+                actual = emsg_schedule(clazz, evgen.cache_key(), seg_start, seg_end)
+                self.assertEqual(expected, actual)
+
+    def test_schedule_is_cached(self) -> None:
+        evgen = PingPongEvents(count=4, inband=True, start=100, interval=200)
+        emsg_schedule.cache_clear()
+        first = emsg_schedule(PingPongEvents, evgen.cache_key(), 0, 400)
+        second = emsg_schedule(PingPongEvents, evgen.cache_key(), 0, 400)
+        self.assertIs(first, second)
+        info = emsg_schedule.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(emsg_schedule(PingPongEvents, evgen.cache_key(), 1000, 1400), b'')
+
+
+class TestManifestEventWindow(unittest.TestCase):
+    def test_no_window(self) -> None:
+        evgen = PingPongEvents(count=3, inband=False, start=10, interval=100, duration=20)
+        self.assertEqual(evgen.manifest_event_ids(None), range(3))
+        evgen = PingPongEvents(count=0, inband=False)
+        self.assertEqual(len(evgen.manifest_event_ids(None)), 0)
+
+    def test_unbounded_events_are_windowed(self) -> None:
+        evgen = PingPongEvents(
+            count=0, inband=False, start=10, interval=100, duration=20,
+            timescale=100)
+        # events are at 0.1s, 1.1s, 2.1s ... and last 0.2 seconds
+        window = (datetime.timedelta(seconds=3600), datetime.timedelta(seconds=3660))
+        self.assertEqual(evgen.manifest_event_ids(window), range(3600, 3660))
+        # event 3599 ends at 3599.3 seconds, which overlaps the window
+        window = (datetime.timedelta(seconds=3599.25), datetime.timedelta(seconds=3660.1))
+        self.assertEqual(evgen.manifest_event_ids(window), range(3599, 3660))
+        # event 3660 starts at 3660.1 seconds, which is inside the window
+        window = (datetime.timedelta(seconds=3599.25), datetime.timedelta(seconds=3660.11))
+        self.assertEqual(evgen.manifest_event_ids(window), range(3599, 3661))
+        stream = evgen.create_manifest_context(context={}, window=window)
+        self.assertEqual(len(stream.events), 62)
+        for idx, event in enumerate(stream.events, start=3599):
+            self.assertEqual(event['id'], idx)
+            self.assertEqual(event['presentationTime'], 10 + idx * 100)
+            self.assertEqual(event['data'], 'ping' if (idx & 1) == 0 else 'pong')
+
+    def test_count_limits_window(self) -> None:
+        evgen = PingPongEvents(
+            count=5, inband=False, start=0, interval=100, duration=20,
+            timescale=100)
+        window = (datetime.timedelta(seconds=3), datetime.timedelta(seconds=60))
+        self.assertEqual(evgen.manifest_event_ids(window), range(3, 5))
+        window = (datetime.timedelta(seconds=30), datetime.timedelta(seconds=60))
+        self.assertEqual(len(evgen.manifest_event_ids(window)), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
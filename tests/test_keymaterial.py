@@ -80,6 +80,15 @@ class KeyMaterialTests(TestCaseMixin, unittest.TestCase):
         self.assertEqual(km.to_base64(), b64_value)
         self.assertEqual(km.b64, b64_value)
 
+    def test_base64url(self):
+        value = a2b_hex('fbff3e0123456789abcdef0123456789')
+        km = KeyMaterial(raw=value)
+        self.assertEqual(km.b64, '+/8+ASNFZ4mrze8BI0VniQ==')
+        self.assertEqual(km.b64url, '-_8-ASNFZ4mrze8BI0VniQ')
+        km = KeyMaterial(hex='0123456789abcdef0123456789abcdef')
+        km.b64url = '-_8-ASNFZ4mrze8BI0VniQ'
+        self.assertEqual(km.raw, value)
+
     def test_guid_generation(self) -> None:
         default_kid = '1AB45440-532C-4399-94DC-5C5AD9584BAC'.lower()
         expected_uuid = '4054b41a-2c53-9943-94dc-5c5ad9584bac'
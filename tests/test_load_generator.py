@@ -0,0 +1,97 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+from unittest.mock import Mock
+
+import flask
+
+from dashlive.mpeg.dash.validator.concurrent_pool import ConcurrentWorkerPool
+from dashlive.mpeg.dash.validator.http_client import HttpClient
+from dashlive.mpeg.dash.validator.load_generator import (
+    AbrPolicy,
+    LoadGenerator,
+    LoadGeneratorOptions,
+    LoadStats,
+)
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestLoadGenerator(FlaskTestBase):
+    async def run_load(self, mode: str, **kwargs) -> LoadStats:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode=mode, stream=BBB_FIXTURE.name, manifest='hand_made.mpd')
+        with ThreadPoolExecutor(max_workers=2) as tpe:
+            options = LoadGeneratorOptions(
+                pool=ConcurrentWorkerPool(tpe), seed=1, **kwargs)
+            return await LoadGenerator(url, self.async_client, options).run()
+
+    async def test_vod_accelerated_playback(self) -> None:
+        stats = await self.run_load(
+            'vod', players=2, duration=1.0, speed=1000.0, abr=AbrPolicy.LOWEST)
+        self.assertEqual(stats.kinds['manifest'].count, 2)
+        self.assertGreater(stats.kinds['init'].count, 0)
+        media = stats.kinds['media']
+        # each player should have looped back to the start of the stream
+        # at least once, fetching both audio and video segments
+        num_segments: int = round(BBB_FIXTURE.media_duration / BBB_FIXTURE.segment_duration)
+        self.assertGreater(media.count, 2 * 2 * num_segments)
+        self.assertEqual(stats.total.errors, 0)
+        self.assertGreater(media.num_bytes, 0)
+        summary = stats.to_dict()
+        self.assertEqual(summary['requests']['total']['requests'], stats.total.count)
+        p50, p95, p99 = media.percentiles()
+        self.assertLessEqual(p50, p95)
+        self.assertLessEqual(p95, p99)
+        self.assertEqual(len(stats.format_report()), 1 + len(LoadStats.KINDS) + 1)
+
+    async def test_live_playback(self) -> None:
+        stats = await self.run_load('live', players=1, duration=1.0)
+        self.assertEqual(stats.kinds['manifest'].count, 1)
+        # one audio and one video segment for each segment at the live edge
+        self.assertEqual(stats.kinds['media'].count, 2 * 3)
+        self.assertEqual(stats.total.errors, 0)
+
+    async def test_in_process_app(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        # the origin of the URL is not a running server, so every request
+        # must be handled by the in-process app
+        url: str = 'http://load.generator.test' + flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name, manifest='hand_made.mpd')
+        with ThreadPoolExecutor(max_workers=2) as tpe:
+            options = LoadGeneratorOptions(
+                pool=ConcurrentWorkerPool(tpe), seed=1, players=1, duration=0.5,
+                speed=1000.0, abr=AbrPolicy.LOWEST)
+            fallback = Mock(spec=HttpClient)
+            http_client = LoadGenerator.in_process_http_client(
+                url, fallback, options, app=self.app)
+            stats = await LoadGenerator(url, http_client, options).run()
+        self.assertEqual(stats.kinds['manifest'].count, 1)
+        self.assertGreater(stats.kinds['media'].count, 0)
+        self.assertEqual(stats.total.errors, 0)
+        fallback.get.assert_not_called()
+
+    async def test_manifest_errors_are_counted(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream='unknown', manifest='hand_made.mpd')
+        with ThreadPoolExecutor(max_workers=2) as tpe:
+            options = LoadGeneratorOptions(
+                players=3, duration=1.0, pool=ConcurrentWorkerPool(tpe))
+            stats = await LoadGenerator(url, self.async_client, options).run()
+        self.assertEqual(stats.kinds['manifest'].count, 3)
+        self.assertEqual(stats.kinds['manifest'].errors, 3)
+        self.assertEqual(stats.kinds['media'].count, 0)
+        self.assertAlmostEqual(stats.total.error_rate, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import unittest
+
+from dashlive.server import models
+from dashlive.server.requesthandler.media_file_index import MediaFileIndex
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestMediaFileIndex(FlaskTestBase):
+    def test_matches_media_file_search(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        with self.app.app_context():
+            stream = models.Stream.get(directory=BBB_FIXTURE.name)
+            assert stream is not None
+            index = MediaFileIndex.for_stream(stream)
+            self.assertEqual(len(index.media_files), models.MediaFile.count(stream=stream))
+            for content_type in ['video', 'audio', 'text', None]:
+                for encrypted in [None, False, True]:
+                    for max_items in [None, 1]:
+                        kwargs = {}
+                        if content_type is not None:
+                            kwargs['content_type'] = content_type
+                        if encrypted is not None:
+                            kwargs['encrypted'] = encrypted
+                        expected = models.MediaFile.search(
+                            stream=stream, max_items=max_items, **kwargs)
+                        actual = index.search(
+                            stream=stream, max_items=max_items, **kwargs)
+                        self.assertListEqual(
+                            [mf.bitrate for mf in actual],
+                            [mf.bitrate for mf in expected])
+                        self.assertSetEqual(
+                            {mf.pk for mf in actual}, {mf.pk for mf in expected})
+
+    def test_relationships_are_loaded(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        with self.app.app_context():
+            stream = models.Stream.get(directory=BBB_FIXTURE.name)
+            assert stream is not None
+            index = MediaFileIndex.for_stream(stream)
+            models.db.session.expunge_all()
+            # the blob and keys can be used without a database session
+            for mf in index.media_files:
+                self.assertIsNotNone(mf.blob.filename)
+                for key in mf.encryption_keys:
+                    self.assertIsNotNone(key.hkid)
+
+    def test_unknown_stream(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        with self.app.app_context():
+            stream = models.Stream.get(directory=BBB_FIXTURE.name)
+            assert stream is not None
+            index = MediaFileIndex([])
+            self.assertEqual(index.media_files, [])
+            with self.assertRaises(KeyError):
+                index.search(stream=stream, content_type='video')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import re
+import threading
+import unittest
+
+import flask
+
+from dashlive.server.metrics import LATENCY_BUCKETS, ServerMetrics, server_metrics
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestServerMetrics(unittest.TestCase):
+    def test_histogram_buckets(self) -> None:
+        metrics = ServerMetrics()
+        metrics.record_request('ServeManifest', 0.0001, 200, 1234, 3)
+        metrics.record_request('ServeManifest', 0.3, 200, 1000, 2)
+        metrics.record_request('ServeManifest', 60.0, 404, 10, 0)
+        stats = metrics.collect()['ServeManifest']
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.buckets[0], 1)
+        self.assertEqual(stats.buckets[LATENCY_BUCKETS.index(0.5)], 1)
+        self.assertEqual(stats.buckets[-1], 1)
+        self.assertEqual(stats.bytes_sent, 2244)
+        self.assertEqual(stats.db_queries, 5)
+        self.assertDictEqual(stats.statuses, {200: 2, 404: 1})
+        text = metrics.to_prometheus()
+        self.assertIn(
+            'dashlive_http_requests_total{handler="ServeManifest",status="200"} 2', text)
+        self.assertIn(
+            'dashlive_http_request_duration_seconds_bucket{handler="ServeManifest",le="0.5"} 2', text)
+        self.assertIn(
+            'dashlive_http_request_duration_seconds_bucket{handler="ServeManifest",le="+Inf"} 3', text)
+        self.assertIn('dashlive_http_response_bytes_total{handler="ServeManifest"} 2244', text)
+
+    def test_collect_from_multiple_threads(self) -> None:
+        metrics = ServerMetrics()
+
+        def worker() -> None:
+            for _ in range(100):
+                metrics.record_request('LiveProfileMedia', 0.002, 200, 10)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thd in threads:
+            thd.start()
+        for thd in threads:
+            thd.join()
+        stats = metrics.collect()['LiveProfileMedia']
+        self.assertEqual(stats.count, 400)
+        self.assertEqual(stats.bytes_sent, 4000)
+        metrics.reset()
+        self.assertDictEqual(metrics.collect(), {})
+
+    def test_shards_of_exited_threads_are_retired(self) -> None:
+        metrics = ServerMetrics()
+
+        def worker() -> None:
+            metrics.record_request('ServeManifest', 0.002, 200, 10, 1)
+
+        for _ in range(50):
+            thd = threading.Thread(target=worker)
+            thd.start()
+            thd.join()
+        self.assertLessEqual(len(metrics._shards), 1)
+        metrics.record_request('ServeManifest', 0.002, 404, 10, 1)
+        stats = metrics.collect()['ServeManifest']
+        self.assertEqual(len(metrics._shards), 1)
+        self.assertEqual(stats.count, 51)
+        self.assertEqual(stats.db_queries, 51)
+        self.assertDictEqual(stats.statuses, {200: 50, 404: 1})
+        metrics.reset()
+        self.assertDictEqual(metrics.collect(), {})
+
+
+class TestMetricsEndpoint(FlaskTestBase):
+    def test_metrics_route(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        server_metrics.reset()
+        url = flask.url_for('time', method='xsd')
+        for _ in range(3):
+            self.assert200(self.client.get(url))
+        url = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+        self.assert200(self.client.get(url))
+        response = self.client.get(flask.url_for('metrics'))
+        self.assert200(response)
+        self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+        text = response.text
+        self.assertIn('dashlive_http_requests_total{handler="UTCTimeHandler",status="200"} 3', text)
+        self.assertIn('dashlive_http_requests_total{handler="ServeManifest",status="200"} 1', text)
+        match = re.search(r'dashlive_db_queries_total{handler="ServeManifest"} (\d+)', text)
+        self.assertIsNotNone(match)
+        self.assertGreater(int(match.group(1)), 0)
+        self.assertIn('dashlive_cache_hit_ratio{cache="emsg_schedule"}', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,10 +19,14 @@
 #  Author              :    Alex Ashley
 #
 #############################################################################
+import datetime
 import logging
 import unittest
+from unittest.mock import patch
 
 from dashlive.server import models
+from dashlive.server.requesthandler.media_file_index import MediaFileIndex
+from dashlive.server.requesthandler.period_layout import PeriodLayout
 
 from .mixins.check_manifest import DashManifestCheckMixin
 from .mixins.flask_base import FlaskTestBase
@@ -83,6 +87,64 @@ class MultiPeriodTests(FlaskTestBase, DashManifestCheckMixin):
             debug=False,
             simplified=True)
 
+    def test_period_layout_visible_periods(self) -> None:
+        self.setup_multi_period_stream(MPS_FIXTURE)
+        with self.app.app_context():
+            mps = models.MultiPeriodStream.get(name=MPS_FIXTURE.name)
+            assert mps is not None
+            layout = PeriodLayout(mps, encrypted=False)
+            self.assertEqual(layout.duration, mps.total_duration())
+            periods: list[models.Period] = list(mps.periods)
+            step = datetime.timedelta(seconds=7)
+            for offset in range(0, 200):
+                first = step * offset
+                elapsed = first + datetime.timedelta(seconds=120)
+                # walk every Period from the start of the loop, keeping
+                # those that end after the first available fragment
+                expected: list[tuple[str, int, datetime.timedelta]] = []
+                num_loops = int(first.total_seconds() // layout.duration.total_seconds())
+                start = layout.duration * num_loops
+                index = 0
+                while start <= elapsed:
+                    prd = periods[index]
+                    if start + prd.duration >= first:
+                        expected.append((prd.pid, num_loops, start))
+                    start += prd.duration
+                    index = (index + 1) % len(periods)
+                    if index == 0:
+                        num_loops += 1
+                actual = [(item.period.pid, item.loop, item.start)
+                          for item in layout.visible_periods(first, elapsed)]
+                self.assertListEqual(actual, expected)
+
+    def test_live_manifest_only_creates_visible_periods(self) -> None:
+        self.setup_multi_period_stream(MPS_FIXTURE)
+        with patch.object(MediaFileIndex, 'adaptation_set_media_files', autospec=True,
+                          side_effect=MediaFileIndex.adaptation_set_media_files) as media_files:
+            self.check_generated_manifest_against_fixture(
+                'hand_made.mpd', mode='live', acodec='mp4a', encrypted=False,
+                now="2024-10-07T00:03:00Z", mps_name=MPS_FIXTURE.name,
+                start="2024-10-07T00:00:00Z")
+        adaptation_sets: set[int] = {call.args[1].pk for call in media_files.call_args_list}
+        # each AdaptationSet is only queried once
+        self.assertGreater(media_files.call_count, 0)
+        self.assertEqual(len(adaptation_sets), media_files.call_count)
+
+    def test_adaptation_set_media_files(self) -> None:
+        self.setup_multi_period_stream(MPS_FIXTURE)
+        with self.app.app_context():
+            mps = models.MultiPeriodStream.get(name=MPS_FIXTURE.name)
+            assert mps is not None
+            index = MediaFileIndex.for_multi_period(mps)
+            for prd in mps.periods:
+                for adp in prd.adaptation_sets:
+                    for encrypted in [None, False, True]:
+                        expected = [mf.pk for mf in adp.media_files(encrypted=encrypted)]
+                        actual = [mf.pk for mf in index.adaptation_set_media_files(
+                            adp, encrypted=encrypted)]
+                        self.assertListEqual(sorted(actual), sorted(expected))
+                        self.assertGreater(len(actual), 0)
+
 
 if __name__ == "__main__":
     logging.basicConfig()
@@ -102,6 +102,51 @@ class PlayreadyTests(FlaskTestBase, DashManifestCheckMixin):
         with self.assertRaises(ValueError):
             PlayReady.generate_content_key(keyId=kid, keySeed=b'123')
 
+    def test_bulk_content_key_generation(self) -> None:
+        kids: list[bytes] = [
+            binascii.a2b_hex('0102030405060708090AAABBCCDDEEFF'),
+            binascii.a2b_hex('a2c786d0f9ef4cb3b333cd323a4284a5'),
+            KeyMaterial(hex='1ab45440532c439994dc5c5ad9584bac').raw,
+        ]
+        key_seed: bytes = hashlib.sha256(b'bulk key seed').digest()
+        for seed in [None, key_seed]:
+            keys: list[bytearray] = PlayReady.generate_content_keys(kids, keySeed=seed)
+            self.assertEqual(len(keys), len(kids))
+            for kid, key in zip(kids, keys):
+                self.assertEqual(
+                    self.to_hex(key),
+                    self.to_hex(PlayReady.generate_content_key(kid, keySeed=seed)))
+        self.assertEqual(
+            self.to_hex(keys[1]), self.to_hex(PlayReady.generate_content_keys(kids[1:2], key_seed)[0]))
+        self.assertNotEqual(
+            self.to_hex(keys[1]), self.to_hex(PlayReady.generate_content_key(kids[1])))
+        # modifying a returned key must not modify the cached value
+        keys[0][0] ^= 0xFF
+        self.assertNotEqual(
+            self.to_hex(keys[0]),
+            self.to_hex(PlayReady.generate_content_keys(kids, keySeed=key_seed)[0]))
+        with self.assertRaises(ValueError):
+            PlayReady.generate_content_keys([b'123'])
+        with self.assertRaises(ValueError):
+            PlayReady.generate_content_keys(kids, keySeed=b'123')
+
+    def test_get_kids_derives_missing_keys(self) -> None:
+        self.setup_media()
+        missing = KeyMaterial(hex='0102030405060708090aaabbccddeeff')
+        with self.app.app_context():
+            known: models.Key = list(models.Key.all())[0]
+            keys = models.Key.get_kids({known.KID, missing})
+            self.assertListEqual(list(keys.keys()), [known.hkid.lower()])
+            keys = models.Key.get_kids({known.KID, missing}, derive_missing=True)
+            self.assertEqual(keys[known.hkid.lower()].pk, known.pk)
+            derived: models.Key = keys[missing.hex]
+            self.assertIsNone(derived.pk)
+            self.assertTrue(derived.computed)
+            self.assertEqual(
+                derived.KEY.hex,
+                KeyMaterial(raw=PlayReady.generate_content_key(missing.raw)).hex)
+            self.assertIsNone(models.Key.get(hkid=missing.hex))
+
     def test_checksum_generation(self) -> None:
         mspr = PlayReady(la_url=self.la_url)
         kid_hex = '01020304-0506-0708-090A-AABBCCDDEEFF'.replace('-', '')
@@ -0,0 +1,93 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import pstats
+import unittest
+
+from bs4 import BeautifulSoup
+import flask
+
+from dashlive.server.profiler import request_profiler
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestRequestProfiler(FlaskTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        request_profiler.stop()
+
+    def tearDown(self) -> None:
+        request_profiler.stop()
+        super().tearDown()
+
+    def start_session(self, **form) -> None:
+        url: str = flask.url_for('list-profiles')
+        response = self.client.get(url)
+        self.assert200(response)
+        html = BeautifulSoup(response.text, 'lxml')
+        csrf_token = html.find('input', attrs={"name": "csrf_token"})['value']
+        response = self.client.post(url, data={
+            'csrf_token': csrf_token,
+            'action': 'start',
+            **form,
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_requires_admin_user(self) -> None:
+        url: str = flask.url_for('list-profiles')
+        self.assertNotAuthorized(self.client.get(url), ajax=0)
+        self.login_user(is_admin=False)
+        self.assertNotAuthorized(self.client.get(url), ajax=0)
+        response = self.client.get(
+            flask.url_for('download-profile', fingerprint='ServeManifest-123'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_profile_matching_requests(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        self.login_user(is_admin=True)
+        self.start_session(duration='60', handler='ServeManifest', match='abr=0')
+        self.assertTrue(request_profiler.is_active())
+        mpd_url = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+        for _ in range(3):
+            self.assert200(self.client.get(f'{mpd_url}?abr=0'))
+        self.assert200(self.client.get(mpd_url))
+        self.assert200(self.client.get(flask.url_for('time', method='xsd')))
+        with self.app.app_context():
+            profiles = request_profiler.list_profiles()
+        self.assertEqual(len(profiles), 1)
+        summary = profiles[0]
+        self.assertEqual(summary.handler, 'ServeManifest')
+        self.assertEqual(summary.count, 3)
+        self.assertDictEqual(summary.params, {'abr': '0'})
+        self.assertGreater(summary.total_time, 0)
+
+        response = self.client.get(flask.url_for('list-profiles'))
+        self.assert200(response)
+        download_url = flask.url_for('download-profile', fingerprint=summary.fingerprint)
+        self.assertIn(download_url, response.text)
+        response = self.client.get(download_url)
+        self.assert200(response)
+        prof_file = self.app_folders.instance_path / 'profiles' / f'{summary.fingerprint}.prof'
+        self.assertEqual(response.data, prof_file.read_bytes())
+        stats = pstats.Stats(str(prof_file))
+        self.assertGreater(stats.total_calls, 0)
+        self.assert404(self.client.get(
+            flask.url_for('download-profile', fingerprint='unknown')))
+
+    def test_session_expires(self) -> None:
+        request_profiler.start(10)
+        self.assertTrue(request_profiler.is_active())
+        request_profiler.session.expires -= 20
+        self.assertFalse(request_profiler.is_active())
+        self.assertIsNone(request_profiler.session)
+
+
+if __name__ == '__main__':
+    unittest.main()
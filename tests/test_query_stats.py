@@ -0,0 +1,153 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import gc
+import re
+import unittest
+
+import flask
+import sqlalchemy as sa
+
+from dashlive.server import models
+from dashlive.server.metrics import server_metrics
+from dashlive.server.models.db import QueryCounter, QueryStats, query_counter
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE, MPS_FIXTURE
+
+class TestQueryStats(unittest.TestCase):
+    def test_subtract(self) -> None:
+        end = QueryStats(count=5, duration=0.5)
+        start = QueryStats(count=2, duration=0.25)
+        self.assertEqual(end - start, QueryStats(count=3, duration=0.25))
+
+    def test_instrument_new_engines(self) -> None:
+        counter = QueryCounter()
+        for idx in range(20):
+            engine = sa.create_engine('sqlite://')
+            self.assertFalse(counter.is_instrumented(engine))
+            counter.instrument(engine)
+            counter.instrument(engine)
+            self.assertTrue(counter.is_instrumented(engine), f'engine {idx}')
+            start: QueryStats = counter.stats()
+            with engine.connect() as conn:
+                conn.execute(sa.text('SELECT 1'))
+            self.assertEqual((counter.stats() - start).count, 1, f'engine {idx}')
+            engine.dispose()
+            del engine
+            gc.collect()
+
+
+class TestRequestQueryBudgets(FlaskTestBase):
+    def test_query_counter(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        start: QueryStats = query_counter.stats()
+        self.assertEqual(models.Stream.count(), 1)
+        models.MediaFile.search(content_type='video')
+        stats: QueryStats = query_counter.stats() - start
+        self.assertEqual(stats.count, 2)
+        self.assertGreater(stats.duration, 0)
+        with self.assertRaises(AssertionError):
+            with self.assertMaxQueries(1):
+                models.Stream.count()
+                models.Stream.count()
+
+    def test_manifest_query_budget(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        for mode in ['vod', 'live']:
+            url: str = flask.url_for(
+                'dash-mpd-v3', manifest='hand_made.mpd', mode=mode, stream=BBB_FIXTURE.name)
+            with self.assertMaxQueries(2, msg=url):
+                self.assert200(self.client.get(url))
+
+    def test_multi_period_manifest_query_budget(self) -> None:
+        self.setup_multi_period_stream(MPS_FIXTURE)
+        url: str = flask.url_for(
+            'mps-manifest', mps_name=MPS_FIXTURE.name, manifest='hand_made.mpd', mode='live')
+        self.assert200(self.client.get(url))
+        with self.assertMaxQueries(2, msg=url):
+            self.assert200(self.client.get(url))
+
+    def test_segment_query_budget(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        stream = models.Stream.get(directory=BBB_FIXTURE.name)
+        media_file = models.MediaFile.search(
+            max_items=1, content_type='video', encrypted=False, stream=stream)[0]
+        for segment_num in ['init', 1]:
+            url: str = flask.url_for(
+                'dash-media', mode='vod', stream=BBB_FIXTURE.name,
+                filename=media_file.representation.id, segment_num=segment_num,
+                ext='mp4')
+            with self.assertMaxQueries(3, msg=url):
+                self.assert200(self.client.get(url))
+
+    def test_runtime_encrypted_segment_query_budget(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        stream = models.Stream.get(directory=BBB_FIXTURE.name)
+        # end the transaction that started before setup_media_fixture()
+        # committed the media files, as each request normally uses a new
+        # transaction
+        models.db.session.commit()
+        # the key used to encrypt the stream is selected by the manifest
+        # request, segment requests must not select it again
+        url: str = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+        self.assert200(self.client.get(f'{url}?drm=clearkey&encryption=cbcs'))
+        for content_type in ['video', 'audio']:
+            media_file = models.MediaFile.search(
+                max_items=1, content_type=content_type, encrypted=False, stream=stream)[0]
+            for segment_num in ['init', 1, 2]:
+                url = flask.url_for(
+                    'dash-media', mode='vod', stream=BBB_FIXTURE.name,
+                    filename=media_file.representation.id, segment_num=segment_num,
+                    ext='mp4')
+                url += '?drm=clearkey&encryption=cbcs'
+                with self.assertMaxQueries(3, msg=url):
+                    self.assert200(self.client.get(url))
+
+    def test_list_streams_query_budget(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        for idx in range(5):
+            models.Stream(title=f'stream {idx}', directory=f'stream{idx}').add()
+        models.db.session.commit()
+        # the number of queries must not depend upon the number of streams
+        with self.assertMaxQueries(3):
+            self.assert200(self.client.get(flask.url_for('list-streams', ajax=1)))
+        with self.assertMaxQueries(4):
+            self.assert200(self.client.get(flask.url_for('list-streams')))
+
+    def test_server_timing_and_metrics(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        server_metrics.reset()
+        url: str = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+        start: QueryStats = query_counter.stats()
+        response = self.client.get(f'{url}?timing=1')
+        self.assert200(response)
+        num_queries: int = (query_counter.stats() - start).count
+        self.assertGreater(num_queries, 0)
+        self.assertIn(
+            f'desc="{num_queries} DB queries"', response.headers['Server-Timing'])
+        text: str = self.client.get(flask.url_for('metrics')).text
+        self.assertIn(f'dashlive_db_queries_total{{handler="ServeManifest"}} {num_queries}', text)
+        match = re.search(r'dashlive_db_query_seconds_total{handler="ServeManifest"} ([\d.]+)', text)
+        self.assertIsNotNone(match)
+        self.assertGreater(float(match.group(1)), 0)
+
+    def test_log_requests_over_limit(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        self.app.config['MAX_DB_QUERIES'] = 0
+        url: str = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+        with self.assertLogs(level='WARNING') as logs:
+            self.assert200(self.client.get(url))
+        self.assertIn('database queries', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
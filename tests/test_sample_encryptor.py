@@ -0,0 +1,346 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+import io
+import json
+from pathlib import Path
+from typing import ClassVar
+import unittest
+
+from Crypto.Cipher import AES
+import flask
+from lxml import etree
+
+from dashlive.drm.keymaterial import KeyMaterial
+from dashlive.drm.sample_encryptor import (
+    EncryptedFragmentCache,
+    EncryptionScheme,
+    SampleEncryptor,
+    encrypted_fragment_cache,
+)
+from dashlive.mpeg import mp4
+from dashlive.mpeg.dash.representation import Representation
+from dashlive.mpeg.mp4.boxes.tenc import TrackEncryptionBox
+from dashlive.server import models
+from dashlive.server.requesthandler.runtime_encryption import runtime_key_cache
+from dashlive.utils.binary import HexBinary
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+def find_atom(atoms: list[mp4.Mp4Atom], atom_type: str) -> mp4.Mp4Atom:
+    for atom in atoms:
+        if atom.atom_type == atom_type:
+            return atom
+    raise KeyError(atom_type)
+
+
+def mdat_samples(atoms: list[mp4.Mp4Atom]) -> list[bytes]:
+    moof = find_atom(atoms, 'moof')
+    mdat = find_atom(atoms, 'mdat')
+    traf = moof['traf']
+    base: int = traf['tfhd'].base_data_offset
+    if base is None:
+        base = moof.position
+    data: bytes = mdat.data.data if isinstance(mdat.data, HexBinary) else mdat.data
+    if not isinstance(data, bytes):
+        data = data.data
+    payload_start: int = mdat.position + mdat.header_size
+    result: list[bytes] = []
+    for sample in traf['trun'].samples:
+        start: int = base + sample.offset - payload_start
+        result.append(data[start:start + sample.size])
+    return result
+
+
+def decrypt_cbc_blocks(key: bytes, iv: bytes, data: bytes, crypt: int, skip: int) -> bytes:
+    """
+    Decrypts one protected range, one block at a time
+    """
+    ecb = AES.new(key, AES.MODE_ECB)
+    result = bytearray(data)
+    prev: bytes = iv
+    num_blocks: int = len(data) // 16
+    for idx in range(num_blocks):
+        if crypt and (idx % (crypt + skip)) >= crypt:
+            continue
+        block: bytes = data[idx * 16:(idx + 1) * 16]
+        plain: bytes = ecb.decrypt(block)
+        result[idx * 16:(idx + 1) * 16] = bytes(a ^ b for a, b in zip(plain, prev))
+        prev = block
+    return bytes(result)
+
+
+def decrypt_sample(key: bytes, tenc: TrackEncryptionBox, sample: bytes,
+                   aux: mp4.Mp4Atom | None) -> bytes:
+    ranges: list[tuple[int, int]] = [(0, len(sample))]
+    if aux is not None and aux.subsamples:
+        ranges = []
+        pos: int = 0
+        for sub in aux.subsamples:
+            pos += sub.clear
+            ranges.append((pos, pos + sub.encrypted))
+            pos += sub.encrypted
+    result = bytearray(sample)
+    if tenc.version == 0:
+        # cenc: the protected ranges form one AES-CTR stream
+        iv: bytes = aux.initialization_vector.data
+        counter = AES.new(key, AES.MODE_CTR, nonce=b'', initial_value=iv)
+        plain: bytes = counter.decrypt(b''.join([sample[a:b] for a, b in ranges]))
+        pos = 0
+        for start, end in ranges:
+            result[start:end] = plain[pos:pos + end - start]
+            pos += end - start
+        return bytes(result)
+    for start, end in ranges:
+        result[start:end] = decrypt_cbc_blocks(
+            key, tenc.constant_iv.data, sample[start:end],
+            tenc.crypt_byte_block, tenc.skip_byte_block)
+    return bytes(result)
+
+
+class SampleEncryptorTestBase:
+    KID: ClassVar[KeyMaterial] = KeyMaterial(hex='1ab45440532c439994dc5c5ad9584bac')
+    KEY: ClassVar[KeyMaterial] = KeyMaterial(hex='ccc0f2b3b279926496a7f5d25da692f6')
+
+    def check_encrypted_fragment(self, key: bytes, init: bytes, clear: bytes,
+                                 encrypted: bytes, scheme: EncryptionScheme) -> None:
+        init_atoms = mp4.IsoParser.load(io.BytesIO(init), options=mp4.Options())
+        moov = find_atom(init_atoms, 'moov')
+        tenc: TrackEncryptionBox = moov.find_child('tenc')
+        self.assertIsNotNone(tenc)
+        self.assertEqual(moov.find_child('schm').scheme_type, scheme.value)
+        self.assertEqual(tenc.default_kid.data, self.KID.raw)
+        clear_atoms = mp4.IsoParser.load(io.BytesIO(clear), options=mp4.Options())
+        enc_atoms = mp4.IsoParser.load(
+            io.BytesIO(encrypted), options=mp4.Options(iv_size=tenc.iv_size))
+        clear_samples: list[bytes] = mdat_samples(clear_atoms)
+        enc_samples: list[bytes] = mdat_samples(enc_atoms)
+        self.assertEqual(len(clear_samples), len(enc_samples))
+        senc = find_atom(enc_atoms, 'moof')['traf'].find_child('senc')
+        if tenc.iv_size or tenc.crypt_byte_block:
+            self.assertIsNotNone(senc)
+            self.assertEqual(len(senc.samples), len(enc_samples))
+        changed: int = 0
+        for idx, (plain, sample) in enumerate(zip(clear_samples, enc_samples)):
+            aux = senc.samples[idx] if senc is not None else None
+            if plain != sample:
+                changed += 1
+            self.assertEqual(plain, decrypt_sample(key, tenc, sample, aux),
+                             msg=f'Sample {idx} failed to decrypt')
+        self.assertGreater(changed, 0)
+
+
+class TestSampleEncryptor(SampleEncryptorTestBase, unittest.TestCase):
+    FIXTURES_PATH: ClassVar[Path] = Path(__file__).parent / "fixtures" / "bbb"
+
+    def load_representation(self, name: str) -> tuple[Representation, bytes]:
+        with (self.FIXTURES_PATH / f'rep-{name}.json').open('rt') as src:
+            rep = Representation(**json.load(src))
+        data: bytes = (self.FIXTURES_PATH / f'{name}.mp4').read_bytes()
+        return (rep, data,)
+
+    def load_segment(self, rep: Representation, data: bytes, index: int) -> mp4.Wrapper:
+        seg = rep.segments[index]
+        return mp4.IsoParser.load_wrapped(
+            io.BytesIO(data[seg.pos:seg.pos + seg.size]),
+            options=mp4.Options(mode='rw', lazy_load=True))
+
+    def encrypt_and_check(self, name: str, scheme: EncryptionScheme) -> None:
+        rep, data = self.load_representation(name)
+        encryptor = SampleEncryptor(
+            scheme, kid=self.KID, key=self.KEY, codecs=rep.codecs,
+            content_type=rep.content_type,
+            nal_length_size=rep.nalLengthFieldLength)
+        init = self.load_segment(rep, data, 0)
+        encryptor.protect_init_segment(init)
+        init_data: bytes = init.encode_as_bytes()
+        for index in [1, rep.num_media_segments]:
+            seg = rep.segments[index]
+            clear: bytes = data[seg.pos:seg.pos + seg.size]
+            frag = self.load_segment(rep, data, index)
+            encryptor.protect_media_segment(frag, f'{name}:{index}')
+            self.check_encrypted_fragment(
+                self.KEY.raw, init_data, clear, frag.encode_as_bytes(), scheme)
+
+    def test_cenc_video(self) -> None:
+        self.encrypt_and_check('bbb_v7', EncryptionScheme.CENC)
+
+    def test_cbcs_video(self) -> None:
+        self.encrypt_and_check('bbb_v7', EncryptionScheme.CBCS)
+
+    def test_cenc_audio(self) -> None:
+        self.encrypt_and_check('bbb_a1', EncryptionScheme.CENC)
+
+    def test_cbcs_audio(self) -> None:
+        self.encrypt_and_check('bbb_a1', EncryptionScheme.CBCS)
+
+    def test_cenc_sample_ivs(self) -> None:
+        encryptor = SampleEncryptor(
+            EncryptionScheme.CENC, kid=self.KID, key=self.KEY, codecs='mp4a.40.2',
+            content_type='audio')
+        result = encryptor.encrypt_samples(
+            bytes(100), [(0, 20), (20, 33), (53, 47)], 'frag')
+        nonce: bytes = encryptor.fragment_iv('frag')
+        self.assertListEqual([
+            nonce + bytes([0, 0, 0, 0, 0, 0, 0, 0]),
+            nonce + bytes([0, 0, 0, 0, 0, 0, 0, 2]),
+            nonce + bytes([0, 0, 0, 0, 0, 0, 0, 5]),
+        ], result.ivs)
+        self.assertNotEqual(encryptor.fragment_iv('frag'), encryptor.fragment_iv('frag2'))
+
+    def test_calculate_subsamples(self) -> None:
+        encryptor = SampleEncryptor(
+            EncryptionScheme.CENC, kid=self.KID, key=self.KEY, codecs='avc3.640028',
+            content_type='video', nal_length_size=4)
+        sps: bytes = (12).to_bytes(4, 'big') + bytes([0x67]) + bytes(11)
+        idr: bytes = (100).to_bytes(4, 'big') + bytes([0x65]) + bytes(99)
+        small: bytes = (20).to_bytes(4, 'big') + bytes([0x41]) + bytes(19)
+        sample = memoryview(sps + idr + small)
+        # 100 - 32 clear lead = 68 bytes, rounded down to 64 bytes
+        self.assertListEqual([
+            (16 + 4 + 36, 64),
+            (24, 0),
+        ], encryptor.calculate_subsamples(sample))
+        big_sei: bytes = (70000).to_bytes(4, 'big') + bytes([0x06]) + bytes(69999)
+        self.assertListEqual([
+            (0xFFFF, 0),
+            (70004 + 40 - 0xFFFF, 64),
+        ], encryptor.calculate_subsamples(memoryview(big_sei + idr)))
+
+    def test_tenc_version_1(self) -> None:
+        tenc = TrackEncryptionBox(
+            version=1, flags=0, is_encrypted=1, iv_size=0,
+            crypt_byte_block=1, skip_byte_block=9,
+            default_kid=HexBinary(self.KID.raw),
+            constant_iv=HexBinary(bytes(range(16))))
+        data: bytes = tenc.encode_as_bytes()
+        self.assertEqual(len(data), 8 + 4 + 4 + 16 + 1 + 16)
+        atoms = mp4.IsoParser.load(io.BytesIO(data), options=mp4.Options())
+        self.assertEqual(len(atoms), 1)
+        parsed = atoms[0]
+        self.assertEqual(parsed.version, 1)
+        self.assertEqual(parsed.crypt_byte_block, 1)
+        self.assertEqual(parsed.skip_byte_block, 9)
+        self.assertEqual(parsed.iv_size, 0)
+        self.assertEqual(parsed.constant_iv.data, bytes(range(16)))
+        self.assertEqual(parsed.default_kid.data, self.KID.raw)
+
+    def test_fragment_cache(self) -> None:
+        cache = EncryptedFragmentCache(maxsize=2)
+        encryptor = SampleEncryptor(
+            EncryptionScheme.CBCS, kid=self.KID, key=self.KEY, codecs='mp4a.40.2',
+            content_type='audio', cache=cache)
+        data: bytes = bytes(range(64))
+        first = encryptor.encrypt_fragment(data, [(0, 64)], 'a')
+        self.assertIs(first, encryptor.encrypt_fragment(data, [(0, 64)], 'a'))
+        encryptor.encrypt_fragment(data, [(0, 64)], 'b')
+        encryptor.encrypt_fragment(data, [(0, 64)], 'c')
+        info = cache.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.currsize, 2)
+        self.assertIsNot(first, encryptor.encrypt_fragment(data, [(0, 64)], 'a'))
+
+
+class TestRuntimeEncryption(SampleEncryptorTestBase, FlaskTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        encrypted_fragment_cache.clear()
+
+    def get_manifest(self, args: str) -> etree._ElementTree:
+        url: str = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', stream=BBB_FIXTURE.name,
+            mode='vod')
+        response = self.client.get(f'{url}?{args}')
+        self.assertEqual(response.status_code, 200)
+        return etree.parse(io.BytesIO(response.get_data(as_text=False)))
+
+    def get_segment(self, media: models.MediaFile, segment: str, args: str) -> bytes:
+        url: str = flask.url_for(
+            'dash-media', mode='vod', stream=BBB_FIXTURE.name, filename=media.name,
+            segment_num=segment, ext='m4v' if media.content_type == 'video' else 'm4a')
+        response = self.client.get(f'{url}?{args}')
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=False)
+
+    def test_manifest_uses_clear_media(self) -> None:
+        self.setup_media()
+        for scheme in ['cenc', 'cbcs']:
+            with self.subTest(scheme=scheme):
+                mpd = self.get_manifest(f'drm=clearkey&encryption={scheme}')
+                ns = {'dash': 'urn:mpeg:dash:schema:mpd:2011'}
+                reps = mpd.findall('.//dash:Representation', ns)
+                self.assertGreater(len(reps), 0)
+                for rep in reps:
+                    self.assertNotIn('_enc', rep.get('id'))
+                prot = mpd.findall(
+                    './/dash:ContentProtection[@schemeIdUri="urn:mpeg:dash:mp4protection:2011"]',
+                    ns)
+                self.assertGreater(len(prot), 0)
+                for elt in prot:
+                    self.assertEqual(elt.get('value'), scheme)
+
+    def test_encrypt_segments(self) -> None:
+        self.setup_media()
+        with self.app.app_context():
+            media_files: list[models.MediaFile] = [
+                mf for mf in models.MediaFile.all() if not mf.encrypted]
+            key: models.Key = models.Key.get(hkid=self.KID.hex)
+            self.assertIsNotNone(key)
+            for mf in media_files:
+                rep = mf.representation
+                with mf.open_file(start=0, size=mf.blob.size) as src:
+                    data: bytes = src.read(mf.blob.size)
+                for scheme in EncryptionScheme:
+                    with self.subTest(media=mf.name, scheme=scheme.value):
+                        args: str = f'drm=clearkey&encryption={scheme.value}'
+                        init: bytes = self.get_segment(mf, 'init', args)
+                        seg = rep.segments[1]
+                        clear: bytes = data[seg.pos:seg.pos + seg.size]
+                        frag: bytes = self.get_segment(mf, f'{rep.start_number}', args)
+                        self.check_encrypted_fragment(
+                            key.KEY.raw, init, clear, frag, scheme)
+                        pssh = find_atom(mp4.IsoParser.load(
+                            io.BytesIO(init), options=mp4.Options()), 'moov').find_child('pssh')
+                        self.assertIsNotNone(pssh)
+        info = encrypted_fragment_cache.cache_info()
+        self.assertEqual(info.misses, 2 * len(media_files))
+
+    def test_runtime_key_cache(self) -> None:
+        self.setup_media()
+        models.db.session.commit()
+        with self.app.app_context():
+            stream = models.Stream.get(directory=BBB_FIXTURE.name)
+            mf = models.MediaFile.get(name='bbb_v7')
+            stream_pk: int = stream.pk
+            self.get_segment(mf, 'init', 'drm=clearkey&encryption=cenc')
+        key = runtime_key_cache.get(stream_pk)
+        self.assertEqual(key.KID.hex, self.KID.hex)
+        with self.app.app_context():
+            extra = models.Key(
+                hkid='0102030405060708090aaabbccddeeff',
+                hkey='ccc0f2b3b279926496a7f5d25da692f6', computed=False)
+            models.db.session.add(extra)
+            models.db.session.flush()
+            # changes are not visible to other connections until commit
+            self.assertEqual(runtime_key_cache.get(stream_pk), key)
+            models.db.session.commit()
+        with self.assertRaises(KeyError):
+            runtime_key_cache.get(stream_pk)
+
+    def test_clear_segments_without_drm(self) -> None:
+        self.setup_media()
+        with self.app.app_context():
+            mf = models.MediaFile.get(name='bbb_v7')
+            init: bytes = self.get_segment(mf, 'init', 'encryption=cenc')
+        moov = find_atom(mp4.IsoParser.load(io.BytesIO(init), options=mp4.Options()), 'moov')
+        self.assertIsNone(moov.find_child('sinf'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+import unittest
+from unittest.mock import patch
+
+import flask
+
+from dashlive.mpeg import mp4
+from dashlive.mpeg.dash.validator.concurrent_pool import ConcurrentWorkerPool
+from dashlive.mpeg.dash.validator.media_segment import MediaSegment
+from dashlive.mpeg.dash.validator.segment_reader import StreamingSegmentReader
+from dashlive.server import models
+from dashlive.server.wsgi_http_client import WsgiHttpClient
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+from .mixins.view_validator import ViewsTestDashValidator
+
+class ChunkedResponse:
+    """
+    A streamed response that returns the body in small chunks
+    """
+
+    def __init__(self, body: bytes, chunk_size: int) -> None:
+        self.src = io.BytesIO(body)
+        self.chunk_size = chunk_size
+
+    async def read_chunk(self, length: int) -> bytes:
+        return self.src.read(min(length, self.chunk_size))
+
+    def release(self) -> None:
+        pass
+
+
+class TestStreamingSegmentReader(FlaskTestBase):
+    def get_media_file(self) -> bytes:
+        self.setup_media_fixture(BBB_FIXTURE)
+        media_file = models.MediaFile.search(max_items=1, content_type='video')[0]
+        url: str = flask.url_for(
+            'dash-od-media', stream=BBB_FIXTURE.name, filename=media_file.name, ext='mp4')
+        response = self.client.get(url, headers={'Range': 'bytes=0-'})
+        self.assertEqual(response.status_code, 206)
+        return response.get_data(as_text=False)
+
+    async def test_box_positions(self) -> None:
+        body: bytes = self.get_media_file()
+        expected = mp4.IsoParser.load(io.BytesIO(body), options={"lazy_load": True})
+        dest = io.BytesIO()
+        reader = StreamingSegmentReader(ChunkedResponse(body, 1000), dest=dest)
+        boxes = [item async for item in reader.boxes()]
+        self.assertFalse(reader.truncated)
+        self.assertEqual(len(boxes), len(expected))
+        for (box, data), atom in zip(boxes, expected):
+            self.assertEqual(box.atom_type, atom.atom_type)
+            self.assertEqual(box.position, atom.position)
+            self.assertEqual(box.size, atom.size)
+            if box.atom_type == 'mdat':
+                self.assertIsNone(data)
+                self.assertEqual(box.header_size, atom.header_size)
+            else:
+                self.assertEqual(data, body[atom.position:atom.position + atom.size])
+        self.assertEqual(reader.position, len(body))
+        self.assertEqual(dest.getvalue(), body)
+
+    async def test_truncated_response(self) -> None:
+        body: bytes = self.get_media_file()
+        expected = mp4.IsoParser.load(io.BytesIO(body), options={"lazy_load": True})
+        last = expected[-1]
+        truncated: bytes = body[:last.position + last.size - 10]
+        reader = StreamingSegmentReader(ChunkedResponse(truncated, 4096))
+        boxes = [item async for item in reader.boxes()]
+        self.assertTrue(reader.truncated)
+        self.assertEqual(len(boxes), len(expected) - 1)
+
+
+class TestStreamingValidation(FlaskTestBase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.http_client = WsgiHttpClient(
+            self.app, origins=['http://localhost/'], fallback=self.async_client,
+            pool=ConcurrentWorkerPool(self.executor))
+
+    async def asyncTearDown(self) -> None:
+        self.executor.shutdown()
+        await super().asyncTearDown()
+
+    async def validate_stream(self, encrypted: bool = False, **kwargs) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name,
+            manifest='hand_made.mpd', _external=True, **kwargs)
+        dv = ViewsTestDashValidator(
+            http_client=self.http_client, mode='vod', url=url,
+            duration=int(BBB_FIXTURE.media_duration), encrypted=encrypted,
+            pool=ConcurrentWorkerPool(self.executor), stream_segments=True)
+        with patch.object(MediaSegment, 'parse_data') as parse_data:
+            with patch.object(MediaSegment, 'stream_data', autospec=True,
+                              side_effect=MediaSegment.stream_data) as stream_data:
+                self.assertTrue(await dv.load())
+                await dv.validate()
+            parse_data.assert_not_called()
+            self.assertGreater(stream_data.call_count, 0)
+        if dv.has_errors():
+            dv.print_manifest_text()
+        self.assertFalse(dv.has_errors())
+        self.assertTrue(dv.finished())
+
+    async def test_clear_stream(self) -> None:
+        await self.validate_stream()
+
+    async def test_encrypted_stream(self) -> None:
+        await self.validate_stream(encrypted=True, drm='clearkey')
+
+    async def test_inband_events(self) -> None:
+        await self.validate_stream(events='ping', ping__inband='1', ping__interval='2')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import re
+import unittest
+
+import flask
+
+from dashlive.server import models
+from dashlive.server.server_timing import NULL_SERVER_TIMING, ServerTiming
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+
+class TestServerTimingHeader(unittest.TestCase):
+    def test_header_value(self) -> None:
+        timing = ServerTiming()
+        timing.add('db', 0.002)
+        timing.add('db', 0.001)
+        with timing.span('render'):
+            pass
+        timing.add('custom', 0.5)
+        value = timing.header_value()
+        items = [item.strip() for item in value.split(',')]
+        self.assertEqual(len(items), 4)
+        self.assertEqual(items[0], 'db;dur=3.000;desc="DB lookup"')
+        self.assertTrue(items[1].startswith('render;dur='))
+        self.assertEqual(items[2], 'custom;dur=500.000')
+        self.assertTrue(items[3].startswith('total;dur='))
+
+    def test_span_only_counted_once(self) -> None:
+        timing = ServerTiming()
+        span = timing.span('edit')
+        span.stop()
+        first = timing.spans['edit']
+        span.stop()
+        self.assertEqual(timing.spans['edit'], first)
+
+    def test_null_timing(self) -> None:
+        self.assertFalse(NULL_SERVER_TIMING.enabled)
+        with NULL_SERVER_TIMING.span('db'):
+            pass
+        NULL_SERVER_TIMING.add('db', 1.0)
+        self.assertDictEqual(NULL_SERVER_TIMING.spans, {})
+
+
+class TestServerTimingRequests(FlaskTestBase):
+    def durations(self, response: flask.Response) -> dict[str, float]:
+        self.assertIn('Server-Timing', response.headers)
+        result: dict[str, float] = {}
+        for item in response.headers['Server-Timing'].split(','):
+            match = re.match(r'\s*(\w+);dur=([\d.]+)', item)
+            self.assertIsNotNone(match, msg=item)
+            result[match.group(1)] = float(match.group(2))
+        return result
+
+    def test_manifest_server_timing(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url = flask.url_for(
+            'dash-mpd-v3', manifest='hand_made.mpd', mode='live', stream=BBB_FIXTURE.name)
+        response = self.client.get(url)
+        self.assert200(response)
+        self.assertNotIn('Server-Timing', response.headers)
+        response = self.client.get(f'{url}?timing=1')
+        self.assert200(response)
+        durations = self.durations(response)
+        for name in ['db', 'options', 'context', 'render', 'total']:
+            self.assertIn(name, durations)
+        self.assertGreaterOrEqual(durations['total'], durations['render'])
+        # the CGI parameter must be passed on to the media segment URLs
+        self.assertIn('timing=1', response.text)
+
+    def test_media_segment_server_timing(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        media_file = models.MediaFile.search(max_items=1, content_type='video')[0]
+        url = flask.url_for(
+            "dash-media", mode="vod", stream=BBB_FIXTURE.name,
+            filename=media_file.representation.id, segment_num=1, ext="mp4")
+        response = self.client.get(f'{url}?timing=1')
+        self.assert200(response)
+        durations = self.durations(response)
+        for name in ['db', 'options', 'load', 'edit', 'encode', 'total']:
+            self.assertIn(name, durations)
+
+    def test_enabled_by_app_config(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        self.app.config['SERVER_TIMING'] = True
+        try:
+            url = flask.url_for(
+                'dash-mpd-v3', manifest='hand_made.mpd', mode='vod', stream=BBB_FIXTURE.name)
+            response = self.client.get(url)
+            self.assert200(response)
+            self.assertIn('render', self.durations(response))
+        finally:
+            self.app.config['SERVER_TIMING'] = False
+
+
+if __name__ == '__main__':
+    unittest.main()
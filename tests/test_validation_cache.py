@@ -0,0 +1,108 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+from unittest.mock import patch
+
+import flask
+
+from dashlive.mpeg.dash.validator.concurrent_pool import ConcurrentWorkerPool
+from dashlive.mpeg.dash.validator.init_segment import InitSegment
+from dashlive.mpeg.dash.validator.media_segment import MediaSegment
+from dashlive.mpeg.dash.validator.validation_cache import ValidationCache
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+from .mixins.view_validator import ViewsTestDashValidator
+
+class TestValidationCache(unittest.TestCase):
+    def test_lru_eviction(self) -> None:
+        cache = ValidationCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.misses, 1)
+
+    def test_disabled(self) -> None:
+        cache = ValidationCache(max_entries=0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+
+    def test_content_id(self) -> None:
+        self.assertEqual(ValidationCache.content_id({'Etag': '"abc"'}, b'1234'), '"abc"')
+        self.assertEqual(
+            ValidationCache.content_id({}, b'1234'),
+            ValidationCache.content_id({}, b'1234'))
+        self.assertNotEqual(
+            ValidationCache.content_id({}, b'1234'),
+            ValidationCache.content_id({}, b'1235'))
+        self.assertIsNone(ValidationCache.content_id({}, None))
+
+
+class TestValidationCacheReuse(FlaskTestBase):
+    async def validate_twice(self, cache_size: int) -> tuple[ViewsTestDashValidator, int, int]:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name, manifest='hand_made.mpd')
+        with ThreadPoolExecutor(max_workers=2) as tpe:
+            dv = ViewsTestDashValidator(
+                http_client=self.async_client, mode='vod', url=url,
+                duration=int(BBB_FIXTURE.media_duration),
+                pool=ConcurrentWorkerPool(tpe))
+            dv.cache = ValidationCache(cache_size)
+            self.assertTrue(await dv.load())
+            await dv.validate()
+            self.assertFalse(dv.has_errors())
+            self.assertTrue(dv.finished())
+            with patch.object(MediaSegment, 'parse_data', autospec=True,
+                              side_effect=MediaSegment.parse_data) as parse_data:
+                with patch.object(InitSegment, 'validate_atoms', autospec=True,
+                                  side_effect=InitSegment.validate_atoms) as validate_atoms:
+                    # loading the manifest again creates new MediaSegment and
+                    # InitSegment objects, which can use the results of the
+                    # first validation
+                    self.assertTrue(await dv.load())
+                    await dv.validate()
+        self.assertFalse(dv.has_errors())
+        self.assertTrue(dv.finished())
+        return (dv, parse_data.call_count, validate_atoms.call_count)
+
+    async def test_repeated_segments_are_skipped(self) -> None:
+        dv, parse_count, init_count = await self.validate_twice(1024)
+        self.assertEqual(parse_count, 0)
+        self.assertEqual(init_count, 0)
+        self.assertGreater(dv.cache.hits, 0)
+        num_segments: int = 0
+        for period in dv.manifest.periods:
+            for adp in period.adaptation_sets:
+                for rep in adp.representations:
+                    num_segments += len([s for s in rep.media_segments if s.validated])
+                    for seg in rep.media_segments:
+                        if seg.validated:
+                            self.assertIsNotNone(seg.duration)
+                            self.assertIsNotNone(seg.next_decode_time)
+        self.assertGreaterOrEqual(dv.cache.hits, num_segments)
+
+    async def test_cache_disabled(self) -> None:
+        dv, parse_count, init_count = await self.validate_twice(0)
+        self.assertGreater(parse_count, 0)
+        self.assertGreater(init_count, 0)
+        self.assertEqual(dv.cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
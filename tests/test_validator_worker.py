@@ -0,0 +1,142 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import queue
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from flask_socketio import SocketIO
+
+from dashlive.mpeg.dash.validator.options import ValidatorOptions
+from dashlive.mpeg.dash.validator.requests_http_client import RequestsHttpClient
+from dashlive.server.app import asyncio_loop
+from dashlive.server.folders import AppFolders
+from dashlive.server.requesthandler.websocket import ValidatorSettings
+from dashlive.server.validator_worker import (
+    JobRunner,
+    ValidatorWorker,
+    WorkerCommand,
+    WorkerEvent,
+)
+
+from .mixins.flask_base import FlaskTestBase
+from .test_websocket import FakeValidator
+
+SETTINGS: ValidatorSettings = {
+    "duration": 10,
+    "encrypted": False,
+    "manifest": "http://unit.test.local/manifest.mpd",
+    "media": False,
+    "prefix": "",
+    "pretty": True,
+    "save": False,
+    "title": "",
+    "verbose": False,
+}
+
+class TestJobRunner(FlaskTestBase):
+    def create_runner(self) -> None:
+        self.events = queue.Queue()
+        self.runner = JobRunner(
+            self.app, asyncio_loop, self.events, max_jobs=1, queue_size=1)
+        for session_id in ['a', 'b', 'c']:
+            self.runner.handle(WorkerCommand(
+                'connect', session_id, {'origin': 'http://localhost/', 'username': None}))
+
+    def received(self) -> list[WorkerEvent]:
+        result: list[WorkerEvent] = []
+        while not self.events.empty():
+            result.append(self.events.get_nowait())
+        return result
+
+    def send(self, session_id: str, data: dict) -> None:
+        self.runner.handle(WorkerCommand('cmd', session_id, data))
+        self.runner.start_pending()
+
+    @patch("dashlive.server.requesthandler.websocket.BasicDashValidator")
+    def test_job_queue(self, bdv_mock) -> None:
+        def create_fake(manifest: str, options: ValidatorOptions,
+                        http_client: RequestsHttpClient) -> FakeValidator:
+            return FakeValidator(manifest, options, http_client)
+
+        bdv_mock.side_effect = create_fake
+        self.create_runner()
+        self.send('a', {'method': 'validate', **SETTINGS})
+        self.assertEqual(self.runner.running_jobs(), 1)
+        self.send('b', {'method': 'validate', **SETTINGS})
+        self.assertEqual(len(self.runner.pending), 1)
+        self.send('c', {'method': 'validate', **SETTINGS})
+        self.assertEqual(len(self.runner.pending), 1)
+        self.send('b', {'method': 'cancel'})
+        self.assertEqual(len(self.runner.pending), 0)
+        events: list[WorkerEvent] = self.received()
+        self.assertIn(('c', 'validate-errors'), [(ev.session_id, ev.cmd) for ev in events])
+        finished: list[WorkerEvent] = [ev for ev in events if ev.cmd == 'finished']
+        self.assertEqual(len(finished), 1)
+        self.assertEqual(finished[0].session_id, 'b')
+        self.assertTrue(finished[0].data['aborted'])
+
+        self.send('b', {'method': 'validate', **SETTINGS})
+        timeout: float = time.time() + 20
+        while (self.runner.pending or self.runner.running_jobs()) and time.time() < timeout:
+            time.sleep(0.05)
+            self.runner.start_pending()
+        self.assertEqual(self.runner.running_jobs(), 0)
+        self.assertEqual(bdv_mock.call_count, 2)
+        finished = [ev for ev in self.received() if ev.cmd == 'finished']
+        self.assertEqual(sorted([ev.session_id for ev in finished]), ['a', 'b'])
+        for ev in finished:
+            self.assertFalse(ev.data['aborted'])
+        for session_id in ['a', 'b', 'c']:
+            self.runner.handle(WorkerCommand('disconnect', session_id))
+
+
+class TestValidatorWorker(unittest.TestCase):
+    def test_validate_in_worker_process(self) -> None:
+        sockio = Mock(spec=SocketIO)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            folders = AppFolders(tmpdir)
+            config = {
+                'DASH': {'CSRF_SECRET': 'csrf.secret', 'ALLOWED_DOMAINS': '*'},
+                'LOG_LEVEL': 'critical',
+                'SECRET_KEY': 'cookie.secret',
+                'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmpdir}/worker.db3',
+                'TESTING': True,
+            }
+            worker = ValidatorWorker(sockio, config, folders, max_jobs=1, queue_size=2)
+            worker.connect('abc123', 'http://localhost/', None)
+            # nothing is listening on port 1, so the manifest fails to load
+            worker.send('abc123', {
+                'method': 'validate',
+                **SETTINGS,
+                'manifest': 'http://127.0.0.1:1/dash/vod/bbb/hand_made.mpd',
+            })
+            self.assertIsNotNone(worker.process)
+            cmds: list[str] = []
+            timeout: float = time.time() + 60
+            while 'finished' not in cmds and time.time() < timeout:
+                time.sleep(0.1)
+                cmds = [call.args[0] for call in sockio.emit.call_args_list]
+            worker.disconnect('abc123')
+            worker.stop()
+        self.assertIn('finished', cmds)
+        self.assertIsNone(worker.process)
+        messages: list[str] = []
+        for call in sockio.emit.call_args_list:
+            self.assertEqual(call.kwargs, {'to': 'abc123'})
+            if call.args[0] == 'log-batch':
+                messages += [entry['text'] for entry in call.args[1]['entries']]
+            elif call.args[0] == 'log':
+                messages.append(call.args[1]['text'])
+        self.assertTrue(any('hand_made.mpd' in msg for msg in messages), msg=messages)
+
+
+if __name__ == "__main__":
+    unittest.main()
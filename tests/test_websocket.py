@@ -243,6 +243,7 @@ class TestServerOptions(TestCaseMixin, PyfakefsTestCaseMixin, TestCase):
                     "codecs",
                     "finished",
                     "log",
+                    "log-batch",
                     "manifest",
                     "manifest-errors",
                     "progress",
@@ -0,0 +1,107 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+import time
+import unittest
+from unittest.mock import Mock
+
+from flask_socketio import SocketIO
+
+from dashlive.server.requesthandler.ws_emitter import CoalescingEmitter, EmitterSettings
+
+class TestCoalescingEmitter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.sockio = Mock(spec=SocketIO)
+
+    def sent(self, cmd: str) -> list[dict]:
+        result: list[dict] = []
+        for call in self.sockio.emit.call_args_list:
+            self.assertDictEqual(call.kwargs, {'to': 'abc123'})
+            if call.args[0] == cmd:
+                result.append(call.args[1])
+        return result
+
+    def test_progress_latest_wins(self) -> None:
+        emitter = CoalescingEmitter(
+            self.sockio, 'abc123', EmitterSettings(max_progress_rate=1.0))
+        for pct in range(100):
+            emitter.progress({'pct': pct, 'text': ''})
+        self.assertListEqual(self.sent('progress'), [{'pct': 0, 'text': ''}])
+        emitter.flush()
+        self.assertListEqual(
+            self.sent('progress'), [{'pct': 0, 'text': ''}, {'pct': 99, 'text': ''}])
+        emitter.flush()
+        self.assertEqual(len(self.sent('progress')), 2)
+
+    def test_progress_sent_by_timer(self) -> None:
+        emitter = CoalescingEmitter(
+            self.sockio, 'abc123', EmitterSettings(max_progress_rate=20.0))
+        emitter.progress({'pct': 1})
+        emitter.progress({'pct': 2})
+        emitter.progress({'pct': 3})
+        time.sleep(0.2)
+        self.assertListEqual(self.sent('progress'), [{'pct': 1}, {'pct': 3}])
+
+    def test_log_batches(self) -> None:
+        emitter = CoalescingEmitter(
+            self.sockio, 'abc123', EmitterSettings(log_interval=0.05, log_batch_size=10))
+        for idx in range(25):
+            emitter.log('info', f'line {idx}')
+        # log lines are only sent by the timer
+        self.assertListEqual(self.sent('log-batch'), [])
+        time.sleep(0.3)
+        batches: list[dict] = self.sent('log-batch')
+        self.assertEqual(len(batches), 3)
+        self.assertListEqual([len(b['entries']) for b in batches], [10, 10, 5])
+        for batch in batches:
+            self.assertEqual(batch['dropped'], 0)
+        texts: list[str] = [e['text'] for b in batches for e in b['entries']]
+        self.assertListEqual(texts, [f'line {idx}' for idx in range(25)])
+
+    def test_log_flood_is_rate_limited(self) -> None:
+        settings = EmitterSettings(log_interval=0.1, log_batch_size=100, max_pending_logs=1000)
+        emitter = CoalescingEmitter(self.sockio, 'abc123', settings)
+        num_lines: int = 2500
+        for idx in range(num_lines):
+            emitter.log('debug', f'line {idx}')
+        self.assertListEqual(self.sent('log-batch'), [])
+        time.sleep(0.15)
+        batches: list[dict] = self.sent('log-batch')
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0]['entries']), settings.log_batch_size)
+        self.assertEqual(batches[0]['dropped'], num_lines - settings.max_pending_logs)
+        self.assertEqual(batches[0]['entries'][0]['text'], f'line {num_lines - 1000}')
+
+    def test_log_drop_counter(self) -> None:
+        emitter = CoalescingEmitter(
+            self.sockio, 'abc123',
+            EmitterSettings(log_interval=10, log_batch_size=100, max_pending_logs=10))
+        for idx in range(15):
+            emitter.log('debug', f'line {idx}')
+        self.assertListEqual(self.sent('log-batch'), [])
+        emitter.flush()
+        batches: list[dict] = self.sent('log-batch')
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0]['dropped'], 5)
+        self.assertListEqual(
+            [e['text'] for e in batches[0]['entries']], [f'line {idx}' for idx in range(5, 15)])
+
+    def test_emit_flushes_pending_messages(self) -> None:
+        emitter = CoalescingEmitter(
+            self.sockio, 'abc123', EmitterSettings(max_progress_rate=1.0, log_interval=10))
+        emitter.progress({'pct': 10})
+        emitter.progress({'pct': 50})
+        emitter.log('info', 'Validation complete')
+        emitter.emit('finished', {'aborted': False})
+        cmds: list[str] = [call.args[0] for call in self.sockio.emit.call_args_list]
+        self.assertListEqual(cmds, ['progress', 'log-batch', 'progress', 'finished'])
+        self.assertIsNone(emitter.timer)
+
+
+if __name__ == "__main__":
+    unittest.main()
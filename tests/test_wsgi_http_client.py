@@ -0,0 +1,108 @@
+#############################################################################
+#
+#  Project Name        :    Simulated MPEG DASH service
+#
+#  Author              :    Alex Ashley
+#
+#############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+import flask
+
+from dashlive.mpeg.dash.validator.concurrent_pool import ConcurrentWorkerPool
+from dashlive.server import models
+from dashlive.server.wsgi_http_client import WsgiHttpClient, WsgiResponse
+
+from .mixins.flask_base import FlaskTestBase
+from .mixins.stream_fixtures import BBB_FIXTURE
+from .mixins.view_validator import ViewsTestDashValidator
+
+class FallbackHttpClient:
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    async def head(self, url: str, **kwargs) -> WsgiResponse:
+        self.urls.append(url)
+        return WsgiResponse('200 OK', [], b'')
+
+    async def get(self, url: str, **kwargs) -> WsgiResponse:
+        self.urls.append(url)
+        return WsgiResponse('404 NOT FOUND', [], b'')
+
+
+class TestWsgiHttpClient(FlaskTestBase):
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.fallback = FallbackHttpClient()
+        self.http_client = WsgiHttpClient(
+            self.app, origins=['http://localhost/'], fallback=self.fallback,
+            pool=ConcurrentWorkerPool(self.executor))
+
+    async def asyncTearDown(self) -> None:
+        self.executor.shutdown()
+        await super().asyncTearDown()
+
+    async def test_get_manifest(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name,
+            manifest='hand_made.mpd', _external=True)
+        self.assertTrue(url.startswith('http://localhost/'))
+        expected = self.client.get(url)
+        self.assert200(expected)
+        response = await self.http_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], expected.headers['Content-Type'])
+        self.assertEqual(response.get_data(as_text=True), expected.get_data(as_text=True))
+        self.assertEqual(response.xml.tag, '{urn:mpeg:dash:schema:mpd:2011}MPD')
+        response = await self.http_client.head(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=False), b'')
+        self.assertListEqual(self.fallback.urls, [])
+
+    async def test_range_request(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        media_file = models.MediaFile.search(max_items=1, content_type='video')[0]
+        url: str = flask.url_for(
+            'dash-od-media', stream=BBB_FIXTURE.name, filename=media_file.name,
+            ext='mp4', _external=True)
+        response = await self.http_client.get(url, headers={'Range': 'bytes=0-99'})
+        self.assertEqual(response.status_code, 206)
+        data: bytes = response.get_data(as_text=False)
+        self.assertEqual(len(data), 100)
+        self.assertEqual(response.read(8), data[:8])
+        self.assertEqual(response.tell(), 8)
+        response = await self.http_client.get(
+            flask.url_for('dash-od-media', stream='unknown', filename='unknown',
+                          ext='mp4', _external=True),
+            headers={'Range': 'bytes=0-99'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_other_hosts_use_fallback(self) -> None:
+        url: str = 'http://unit.test.example.com/dash/vod/bbb/hand_made.mpd'
+        response = await self.http_client.get(url)
+        self.assertEqual(response.status_code, 404)
+        await self.http_client.head(url)
+        self.assertListEqual(self.fallback.urls, [url, url])
+
+    async def test_validate_local_stream(self) -> None:
+        self.setup_media_fixture(BBB_FIXTURE)
+        url: str = flask.url_for(
+            'dash-mpd-v3', mode='vod', stream=BBB_FIXTURE.name,
+            manifest='hand_made.mpd', _external=True)
+        dv = ViewsTestDashValidator(
+            http_client=self.http_client, mode='vod', url=url,
+            duration=int(BBB_FIXTURE.media_duration),
+            pool=ConcurrentWorkerPool(self.executor))
+        self.assertTrue(await dv.load())
+        await dv.validate()
+        self.assertFalse(dv.has_errors())
+        self.assertTrue(dv.finished())
+        self.assertListEqual(self.fallback.urls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()